@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from data_cleaning import clean_transactions
+from data_loader import load_raw_data
+from parallel_agg import parallel_rollup
+from period_keys import calendar_month
+from rollup import SalesRollup
+from streaming_ingest import stream_rollup
+from synthetic_data import parse_rows, write_transactions
+import incremental
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCALES = '100k,1M'
+DATA_DIR = 'benchmark_data'
+RESULTS_DIR = 'benchmark_results'
+# A benchmark whose best time grows by more than this fraction is reported as a regression
+REGRESSION_THRESHOLD = 0.10
+
+
+class Dataset:
+    """Synthetic input file of one scale, with the pipeline stages the benchmarks start from.
+
+    The CSV is generated once per (rows, seed) and reused across runs; raw,
+    cleaned and aggregated frames are built on first use and shared.
+    """
+
+    def __init__(self, rows, data_dir=DATA_DIR, seed=0, scratch_dir=None):
+        self.rows = rows
+        self.path = os.path.join(data_dir, f'synthetic_{rows}_{seed}.csv')
+        self.scratch_dir = scratch_dir or tempfile.gettempdir()
+        if not os.path.exists(self.path):
+            print(f"Generating {rows:,} synthetic rows -> {self.path}")
+            write_transactions(self.path, rows, seed)
+        self.stages = {}
+
+    def get(self, stage):
+        if stage not in self.stages:
+            if stage == 'raw':
+                # Also builds the columnar cache the warm load benchmark reads
+                self.stages[stage] = load_raw_data(self.path)[0]
+            elif stage == 'cleaned':
+                self.stages[stage] = clean_transactions(self.get('raw'))
+            elif stage == 'frame':
+                # What the workingcode scripts' load_and_clean_data returns
+                frame = self.get('cleaned').copy()
+                frame['Month'] = calendar_month(frame['MonthKey'])
+                frame['Year'] = frame['MonthKey'] // 12 + 1970
+                self.stages[stage] = frame
+            elif stage == 'rollup':
+                self.stages[stage] = SalesRollup.from_frame(self.get('cleaned'))
+            else:
+                raise KeyError(stage)
+        return self.stages[stage]
+
+    def fresh_incremental_update(self):
+        """Incremental ingest into an empty state directory (a full first run)"""
+        state_dir = os.path.join(self.scratch_dir, f'state_{self.rows}')
+        shutil.rmtree(state_dir, ignore_errors=True)
+        return incremental.incremental_update(self.get('raw'), state_dir)
+
+
+def benchmark_registry():
+    """``(name, setup)`` pairs; ``setup(dataset)`` prepares inputs and returns the callable to time.
+
+    Chart modules are imported here, after the caller has switched to a
+    scratch directory, because they write their output files relative to
+    the working directory.
+    """
+    os.environ.setdefault('MPLBACKEND', 'Agg')
+    sys.path.insert(0, os.path.join(ROOT, 'workingcode'))
+    import generate_all_visualizations as generate_all
+    import interactive_sales_dashboard as dashboard
+    import sales_analysis_enhanced as enhanced
+
+    def warm_load(dataset):
+        dataset.get('raw')
+        return partial(generate_all.load_data, dataset.path)
+
+    def incremental_update(dataset):
+        dataset.get('raw')
+        return dataset.fresh_incremental_update
+
+    registry = [
+        ('load_data.cold', lambda d: partial(generate_all.load_data, d.path, rebuild_cache=True)),
+        ('load_data.warm', warm_load),
+        ('clean.clean_transactions', lambda d: partial(clean_transactions, d.get('raw'))),
+        ('clean.track_memory', lambda d: partial(clean_transactions, d.get('raw'), track_memory=True)),
+        ('clean.stream_rollup', lambda d: partial(stream_rollup, d.path)),
+        ('clean.incremental_update', incremental_update),
+        ('aggregate.from_frame', lambda d: partial(SalesRollup.from_frame, d.get('cleaned'))),
+        ('aggregate.parallel_rollup', lambda d: partial(parallel_rollup, d.get('cleaned'))),
+    ]
+    charts = [
+        ('generate_all', 'cleaned', [generate_all.create_monthly_sales_chart, generate_all.create_country_sales_chart,
+                                     generate_all.create_product_analysis, generate_all.create_customer_cohort,
+                                     generate_all.create_sales_dashboard,
+                                     generate_all.create_rfm_segments_chart, generate_all.create_basket_chart]),
+        ('dashboard', 'frame', [dashboard.create_monthly_sales_trend, dashboard.create_top_products_chart,
+                                dashboard.create_country_sales_map, dashboard.create_seasonal_analysis,
+                                dashboard.create_customer_analysis]),
+        ('enhanced', 'frame', [enhanced.create_monthly_trends, enhanced.create_top_products,
+                               enhanced.create_country_analysis, enhanced.create_seasonal_analysis,
+                               enhanced.create_customer_analysis]),
+    ]
+    for module, stage, functions in charts:
+        for function in functions:
+            registry.append((f'charts.{module}.{function.__name__}',
+                             lambda d, function=function, stage=stage: partial(function, d.get(stage))))
+    registry.append(('metrics.calculate_key_metrics',
+                     lambda d: partial(dashboard.calculate_key_metrics, d.get('frame'))))
+    registry.append(('metrics.calculate_key_metrics.rollup',
+                     lambda d: partial(dashboard.calculate_key_metrics, d.get('rollup'))))
+    return registry
+
+
+def time_call(run, repeat=3):
+    """Wall-clock seconds of ``repeat`` calls: minimum, median and every sample"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times), 'times': times}
+
+
+def environment():
+    """Interpreter, library and commit details stored with every result file"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_suite(scales, pattern=None, repeat=3, seed=0, data_dir=DATA_DIR):
+    """Run every benchmark matching ``pattern`` at each scale; returns ``{'name@rows': timing}``"""
+    data_dir = os.path.abspath(data_dir)
+    scratch_dir = tempfile.mkdtemp(prefix='retail_bench_')
+    cwd = os.getcwd()
+    os.chdir(scratch_dir)
+    results = {}
+    try:
+        registry = [(name, setup) for name, setup in benchmark_registry()
+                    if pattern is None or re.search(pattern, name)]
+        for rows in scales:
+            dataset = Dataset(rows, data_dir, seed, scratch_dir)
+            for name, setup in registry:
+                key = f'{name}@{rows}'
+                try:
+                    results[key] = time_call(setup(dataset), repeat)
+                    print(f"{key:<60} {results[key]['median']:>10.4f} s")
+                except Exception as e:
+                    results[key] = {'error': str(e)}
+                    print(f"{key:<60} failed: {e}")
+            del dataset
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+    return results
+
+
+def save_results(results, label, results_dir=RESULTS_DIR, **meta):
+    """Write a result file ``<results_dir>/<label>.json``; returns its path"""
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f'{label}.json')
+    document = {'label': label, 'created': datetime.now().isoformat(timespec='seconds'),
+                'environment': environment(), **meta, 'results': results}
+    with open(path, 'w') as fh:
+        json.dump(document, fh, indent=2)
+    return path
+
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """Best-of-repeat time ratios of the benchmarks present in both result sets.
+
+    Returns ``(name, before, after, ratio, flag)`` rows where ``flag`` is
+    '+' for a regression beyond ``threshold``, '-' for an improvement
+    beyond it and '' otherwise.
+    """
+    rows = []
+    for name in sorted(set(baseline) & set(current)):
+        # The minimum is the sample least disturbed by other load on the machine
+        before, after = baseline[name].get('min'), current[name].get('min')
+        if before is None or after is None:
+            continue
+        ratio = after / before if before else float('inf')
+        flag = '+' if ratio > 1 + threshold else '-' if ratio < 1 / (1 + threshold) else ''
+        rows.append((name, before, after, ratio, flag))
+    return rows
+
+
+def load_results(path):
+    with open(path) as fh:
+        return json.load(fh)['results']
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Time the pipeline on synthetic data and compare against a baseline')
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help='Comma-separated row counts, e.g. 100k,1M,10M,100M')
+    parser.add_argument('--filter', help='Only run benchmarks whose name matches this regular expression')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=DATA_DIR, help='Where generated input files are kept between runs')
+    parser.add_argument('--results-dir', default=RESULTS_DIR)
+    parser.add_argument('--label', help='Result file name (default: short commit hash or timestamp)')
+    parser.add_argument('--compare', metavar='BASELINE', help='Result file to compare this run against')
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help='Relative slowdown reported as a regression')
+    args = parser.parse_args()
+
+    scales = [parse_rows(scale) for scale in args.scales.split(',')]
+    results = run_suite(scales, args.filter, args.repeat, args.seed, args.data_dir)
+    commit = environment()['commit']
+    label = args.label or (commit[:10] if commit else datetime.now().strftime('%Y%m%d-%H%M%S'))
+    print(f"\nResults written to {save_results(results, label, args.results_dir, scales=scales, seed=args.seed)}")
+
+    if args.compare:
+        rows = compare(load_results(args.compare), results, args.threshold)
+        print(f"\n{'':1} {'before':>10} {'after':>10} {'ratio':>7}  benchmark")
+        for name, before, after, ratio, flag in rows:
+            print(f"{flag:1} {before:>10.4f} {after:>10.4f} {ratio:>7.2f}  {name}")
+        regressions = [row for row in rows if row[4] == '+']
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+        sys.exit(1 if regressions else 0)
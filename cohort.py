@@ -0,0 +1,124 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+
+def _month_ordinals(months):
+    """Encode months as integer codes plus the monthly ordinal of each distinct value.
+
+    Accepts 'YYYY-MM' labels, Periods, timestamps or integer month keys; only
+    the distinct values are parsed.
+    """
+    codes, uniques = pd.factorize(months, sort=True)
+    if len(uniques) and np.issubdtype(np.asarray(uniques).dtype, np.integer):
+        ordinals = np.asarray(uniques, dtype=np.int64)
+    else:
+        ordinals = pd.PeriodIndex(pd.Index(uniques).astype(str), freq='M').asi8
+    return codes, ordinals
+
+
+def cohort_matrix(customers, months):
+    """Count distinct active customers per (cohort month, months since first purchase).
+
+    ``customers`` and ``months`` are parallel arrays (one entry per transaction
+    or per distinct customer-month pair); missing customers are ignored.
+    Returns ``(counts, cohort_ordinals)`` where ``counts[i, k]`` is the number
+    of customers whose first month is ``cohort_ordinals[i]`` and who bought
+    again ``k`` months later. The inputs are not modified.
+    """
+    customer_codes, _ = pd.factorize(customers)
+    month_codes, ordinals = _month_ordinals(months)
+    valid = (customer_codes >= 0) & (month_codes >= 0)
+    if not valid.any():
+        return np.zeros((0, 0), dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # Dense month index so offsets are calendar months, gaps included
+    base = ordinals.min()
+    n_months = int(ordinals.max() - base + 1)
+    month_index = ordinals[month_codes[valid]] - base
+    pairs = np.unique(customer_codes[valid].astype(np.int64) * n_months + month_index)
+
+    # Pairs are sorted by customer, then month: the first pair of each customer is its cohort
+    customer = pairs // n_months
+    month = pairs - customer * n_months
+    starts = np.flatnonzero(np.r_[True, customer[1:] != customer[:-1]])
+    first_month = np.repeat(month[starts], np.diff(np.r_[starts, len(pairs)]))
+    offset = month - first_month
+
+    counts = np.bincount(first_month * n_months + offset, minlength=n_months * n_months)
+    counts = counts.reshape(n_months, n_months)
+    active = counts[:, 0] > 0
+    return counts[active], np.arange(base, base + n_months)[active]
+
+
+def cohort_tables(customers, months):
+    """Return ``(counts, retention)`` DataFrames indexed by cohort month ('YYYY-MM').
+
+    Columns are months since first purchase; ``retention`` is the percentage
+    of each cohort still active at that offset.
+    """
+    counts, cohort_ordinals = cohort_matrix(customers, months)
+    labels = pd.PeriodIndex.from_ordinals(cohort_ordinals, freq='M').strftime('%Y-%m')
+    counts = pd.DataFrame(counts, index=pd.Index(labels, name='CohortMonth'),
+                          columns=pd.RangeIndex(counts.shape[1], name='MonthsSinceFirstPurchase'))
+    if len(cohort_ordinals):
+        # Offsets beyond the last month of data are unknown, not zero
+        last_month = cohort_ordinals[0] + counts.shape[1] - 1
+        max_offset = last_month - cohort_ordinals
+        counts = counts.where(np.arange(counts.shape[1])[None, :] <= max_offset[:, None])
+    retention = counts.div(counts[0], axis=0) * 100
+    return counts, retention
+
+
+def calendar_counts(counts):
+    """Re-index an offset matrix from :func:`cohort_tables` by calendar purchase month"""
+    long = counts.reset_index().melt(id_vars='CohortMonth', value_name='Customers').dropna()
+    ordinals = (pd.PeriodIndex(long['CohortMonth'], freq='M').asi8
+                + long['MonthsSinceFirstPurchase'].to_numpy(dtype=np.int64))
+    long['Month'] = pd.PeriodIndex.from_ordinals(ordinals, freq='M').strftime('%Y-%m')
+    return long.pivot(index='CohortMonth', columns='Month', values='Customers')
+
+
+def _legacy_cohort_counts(df):
+    """Previous implementation (string months, map + groupby nunique), kept for benchmarks"""
+    df = df.copy()
+    customer_first_purchase = df.groupby('CustomerID')['Month'].min()
+    df['CohortMonth'] = df['CustomerID'].map(customer_first_purchase)
+    cohort_data = df.groupby(['CohortMonth', 'Month'])['CustomerID'].nunique().reset_index()
+    return cohort_data.pivot(index='CohortMonth', columns='Month', values='CustomerID')
+
+
+def benchmark(n_rows=1_000_000, n_customers=100_000, n_months=24, seed=0, legacy=True):
+    """Time the cohort engine against the legacy pandas implementation on random data"""
+    rng = np.random.default_rng(seed)
+    customers = rng.integers(0, n_customers, n_rows)
+    month_keys = rng.integers(0, n_months, n_rows) + pd.Period('2010-01', freq='M').ordinal
+    results = {'rows': n_rows, 'customers': n_customers, 'months': n_months}
+
+    start = time.perf_counter()
+    counts, _ = cohort_matrix(customers, month_keys)
+    results['engine_seconds'] = time.perf_counter() - start
+
+    if legacy:
+        labels = pd.PeriodIndex.from_ordinals(month_keys, freq='M').strftime('%Y-%m')
+        frame = pd.DataFrame({'CustomerID': customers, 'Month': labels})
+        start = time.perf_counter()
+        expected = _legacy_cohort_counts(frame)
+        results['legacy_seconds'] = time.perf_counter() - start
+        engine_counts = calendar_counts(cohort_tables(customers, month_keys)[0])
+        results['matches_legacy'] = bool(
+            np.allclose(engine_counts.reindex_like(expected).fillna(0), expected.fillna(0)))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the cohort retention engine')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--customers', type=int, default=100_000)
+    parser.add_argument('--months', type=int, default=24)
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the engine')
+    args = parser.parse_args()
+    for key, value in benchmark(args.rows, args.customers, args.months, legacy=not args.skip_legacy).items():
+        print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
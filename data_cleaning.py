@@ -0,0 +1,153 @@
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from period_keys import add_period_keys
+from profiling import reset_peak, span
+
+# Canonical dtypes of a cleaned transaction frame
+SCHEMA = {
+    'InvoiceNo': 'category',
+    'StockCode': 'category',
+    'Description': 'category',
+    'Quantity': 'int32',
+    'InvoiceDate': 'datetime64[ns]',
+    'UnitPrice': 'float64',
+    'CustomerID': 'Int32',
+    'Country': 'category',
+    'Sales': 'float64',
+    'DayKey': 'int32',
+    'WeekKey': 'int32',
+    'MonthKey': 'int32',
+    'QuarterKey': 'int32',
+}
+
+
+def is_cancelled(invoices):
+    """Flag cancelled invoices ('C' prefix), checking each distinct invoice once.
+
+    The distinct invoice codes are compared as fixed-width bytes, reading
+    only the first byte of each, so no Python string is made per row.
+    """
+    if not isinstance(invoices.dtype, pd.CategoricalDtype):
+        invoices = invoices.astype(str).astype('category')
+    labels = np.char.encode(np.asarray(invoices.cat.categories.astype(str), dtype=str), 'utf-8')
+    cancelled_categories = labels.view(np.uint8)[::labels.itemsize] == ord('C')
+    codes = invoices.cat.codes.to_numpy()
+    # Code -1 (missing invoice) maps onto the trailing False
+    return np.append(cancelled_categories, False)[codes]
+
+
+def _is_cancelled(df):
+    return is_cancelled(df['InvoiceNo'])
+
+
+# Each rule returns a boolean array marking the rows it drops. Rules are
+# evaluated in order and a row is attributed to the first rule that drops it.
+CLEANING_RULES = [
+    ('missing_quantity_or_price',
+     lambda df: np.isnan(df['Quantity'].to_numpy()) | np.isnan(df['UnitPrice'].to_numpy())),
+    ('cancelled_invoice', _is_cancelled),
+    ('non_positive_quantity', lambda df: ~(df['Quantity'].to_numpy() > 0)),
+    ('non_positive_price', lambda df: ~(df['UnitPrice'].to_numpy() > 0)),
+]
+
+
+def _coerce_numeric(series, dtype='float64'):
+    if series.dtype == dtype:
+        return series
+    return pd.to_numeric(series, errors='coerce').astype(dtype)
+
+
+def apply_schema(df):
+    """Cast the columns of an already filtered frame to the canonical schema"""
+    out = {}
+    for column, dtype in SCHEMA.items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if dtype == 'category':
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.cat.remove_unused_categories()
+            else:
+                series = series.astype('category')
+        elif dtype == 'Int32':
+            series = pd.to_numeric(series, errors='coerce').round().astype('Int32')
+        elif dtype == 'datetime64[ns]':
+            series = pd.to_datetime(series)
+        else:
+            series = series.astype(dtype)
+        out[column] = series
+    for column in df.columns:
+        if column not in out:
+            out[column] = df[column]
+    return pd.DataFrame(out, index=df.index)
+
+
+def clean_transactions(df, rules=None, report=None, track_memory=False):
+    """Apply the canonical cleaning rules as a single mask and enforce the schema.
+
+    ``report``, if given, is filled with the input/output row counts, the rows
+    dropped per rule, the elapsed time and (with ``track_memory``) the peak
+    memory allocated while cleaning. The input frame is not modified.
+    """
+    rules = CLEANING_RULES if rules is None else rules
+    start = time.perf_counter()
+    started_tracing = track_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if track_memory:
+        reset_peak()
+        base_memory = tracemalloc.get_traced_memory()[0]
+
+    with span('clean', rows=len(df)):
+        # Numeric columns are checked as float so unparsable values become NaN
+        view = pd.DataFrame({
+            'Quantity': _coerce_numeric(df['Quantity']),
+            'UnitPrice': _coerce_numeric(df['UnitPrice']),
+            'InvoiceNo': df['InvoiceNo'],
+        })
+
+        keep = np.ones(len(df), dtype=bool)
+        dropped = {}
+        for name, rule in rules:
+            with span(f'rule:{name}'):
+                drop = np.asarray(rule(view), dtype=bool)
+                dropped[name] = int(np.count_nonzero(drop & keep))
+                keep &= ~drop
+        del view
+
+        positions = np.flatnonzero(keep)
+        with span('apply_schema'):
+            cleaned = df.take(positions) if len(positions) < len(df) else df.copy()
+            cleaned = apply_schema(cleaned)
+            cleaned['Sales'] = cleaned['Quantity'].to_numpy(dtype='float64') * cleaned['UnitPrice'].to_numpy()
+        if 'InvoiceDate' in cleaned.columns:
+            # Integer day/week/month/quarter keys; labels are formatted only after aggregation
+            with span('period_keys'):
+                add_period_keys(cleaned)
+
+    if report is not None:
+        report.update(
+            rows_in=len(df),
+            rows_out=len(cleaned),
+            rows_dropped=dropped,
+            seconds=time.perf_counter() - start,
+        )
+        if track_memory:
+            report['peak_memory_mb'] = (tracemalloc.get_traced_memory()[1] - base_memory) / (1024 * 1024)
+    if started_tracing:
+        tracemalloc.stop()
+    return cleaned
+
+
+def format_cleaning_report(report):
+    """Format a cleaning report as ``(label, value)`` pairs for metric output"""
+    lines = [('Rows In', f"{report['rows_in']:,}"), ('Rows Out', f"{report['rows_out']:,}")]
+    for name, count in report['rows_dropped'].items():
+        lines.append((f'Dropped ({name})', f'{count:,}'))
+    if 'peak_memory_mb' in report:
+        lines.append(('Cleaning Peak Memory', f"{report['peak_memory_mb']:.1f} MB"))
+    return lines
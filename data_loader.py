@@ -0,0 +1,181 @@
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+
+from profiling import span
+
+DATA_FILE = 'Online Retail Data Set.xlsx'
+CACHE_DIR_NAME = '.retail_cache'
+
+# Column types stored in the columnar cache. InvoiceNo and StockCode mix
+# numbers and strings in the workbook, so they are normalized to strings.
+RAW_DTYPES = {
+    'InvoiceNo': str,
+    'StockCode': str,
+    'Description': str,
+    'Country': str,
+}
+
+
+def _cache_paths(path, cache_dir):
+    """Return the data and metadata file paths of the cache for ``path``"""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(path)), CACHE_DIR_NAME)
+    stem = os.path.splitext(os.path.basename(path))[0].replace(' ', '_')
+    return (
+        os.path.join(cache_dir, f'{stem}.parquet'),
+        os.path.join(cache_dir, f'{stem}.meta.json'),
+    )
+
+
+def file_fingerprint(path, with_hash=True):
+    """Return size, mtime and (optionally) SHA-256 of a file"""
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as fh:
+            for block in iter(lambda: fh.read(1 << 20), b''):
+                digest.update(block)
+        fingerprint['sha256'] = digest.hexdigest()
+    return fingerprint
+
+
+def _read_meta(meta_path):
+    try:
+        with open(meta_path) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path, meta):
+    tmp_path = meta_path + '.tmp'
+    with open(tmp_path, 'w') as fh:
+        json.dump(meta, fh, indent=2)
+    os.replace(tmp_path, meta_path)
+
+
+def _cache_is_valid(path, data_path, meta_path, meta):
+    """Check the cache against the source file, rehashing only when needed"""
+    if meta is None or not os.path.exists(data_path):
+        return False
+    current = file_fingerprint(path, with_hash=False)
+    if current['size'] == meta['size'] and current['mtime_ns'] == meta['mtime_ns']:
+        return True
+    # Size or mtime changed (copy, touch, checkout): fall back to the content hash
+    if current['size'] != meta['size']:
+        return False
+    current = file_fingerprint(path)
+    if current['sha256'] != meta['sha256']:
+        return False
+    meta.update(mtime_ns=current['mtime_ns'])
+    _write_meta(meta_path, meta)
+    return True
+
+
+def read_source(path, usecols=None):
+    """Parse the source workbook (or CSV export) with the cache column types"""
+    dtype = {col: kind for col, kind in RAW_DTYPES.items() if usecols is None or col in usecols}
+    if path.lower().endswith('.csv'):
+        df = pd.read_csv(path, usecols=usecols, dtype=dtype, parse_dates=['InvoiceDate'])
+    else:
+        df = pd.read_excel(path, usecols=usecols, dtype=dtype)
+    if 'InvoiceDate' in df.columns:
+        df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'])
+    return df
+
+
+def load_raw_data(path=DATA_FILE, usecols=None, rebuild=False, cache_dir=None):
+    """Load the raw transactions through the columnar cache.
+
+    The workbook is parsed once and stored as Parquet next to it; later calls
+    read the Parquet file as long as the source size/mtime (or, failing that,
+    its SHA-256) still match. Returns ``(df, info)`` where ``info`` describes
+    whether the cache was hit and the cold/warm load times.
+    """
+    start = time.perf_counter()
+    data_path, meta_path = _cache_paths(path, cache_dir)
+    meta = _read_meta(meta_path)
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        with span('read_source'):
+            df = read_source(path, usecols)
+        elapsed = time.perf_counter() - start
+        return df, {'source': path, 'cache': 'disabled (pyarrow not installed)',
+                    'cold_load_seconds': elapsed, 'warm_load_seconds': None}
+
+    if not rebuild and _cache_is_valid(path, data_path, meta_path, meta):
+        with span('read_cache'):
+            df = pd.read_parquet(data_path, columns=usecols)
+        elapsed = time.perf_counter() - start
+        return df, {'source': path, 'cache': 'hit', 'cache_file': data_path,
+                    'cold_load_seconds': meta.get('cold_load_seconds'),
+                    'warm_load_seconds': elapsed}
+
+    # Cold path: parse every column once so any later ``usecols`` is served from cache
+    with span('read_source'):
+        df = read_source(path)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    tmp_path = data_path + '.tmp'
+    with span('write_cache'):
+        df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, data_path)
+    elapsed = time.perf_counter() - start
+
+    meta = file_fingerprint(path)
+    meta.update(rows=len(df), cold_load_seconds=elapsed, built_at=time.time())
+    _write_meta(meta_path, meta)
+
+    if usecols is not None:
+        df = df[usecols]
+    return df, {'source': path, 'cache': 'rebuilt' if rebuild else 'miss',
+                'cache_file': data_path, 'cold_load_seconds': elapsed,
+                'warm_load_seconds': None}
+
+
+def read_retail_data(path=DATA_FILE, usecols=None, rebuild=False):
+    """Convenience wrapper returning only the DataFrame"""
+    df, _ = load_raw_data(path, usecols=usecols, rebuild=rebuild)
+    return df
+
+
+class LazyFrame:
+    """A DataFrame built by ``loader()`` on first use and kept afterwards.
+
+    Chart functions take one of these (or a DataFrame) instead of reading a
+    module-level global, so importing a dashboard module loads no data.
+    """
+
+    def __init__(self, loader):
+        self.loader = loader
+        self.frame = None
+
+    def __call__(self):
+        if self.frame is None:
+            self.frame = self.loader()
+        return self.frame
+
+    @property
+    def loaded(self):
+        return self.frame is not None
+
+
+def frame_of(data):
+    """The DataFrame behind ``data``: either the frame itself or a provider such as a :class:`LazyFrame`"""
+    return data() if callable(data) else data
+
+
+def format_load_info(info):
+    """Format cache details as ``(label, value)`` pairs for metric output"""
+    lines = [('Cache', info['cache'])]
+    if info.get('cold_load_seconds') is not None:
+        lines.append(('Cold Load Time', f"{info['cold_load_seconds']:.2f} seconds"))
+    if info.get('warm_load_seconds') is not None:
+        lines.append(('Warm Load Time', f"{info['warm_load_seconds']:.2f} seconds"))
+    return lines
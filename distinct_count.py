@@ -0,0 +1,202 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRECISION = 12
+GROUP_KEYS = ['MonthKey', 'Country']
+
+
+def count_distinct(values):
+    """Exact number of distinct non-missing values.
+
+    Categorical columns are counted from their integer codes with a bitset,
+    so no value is hashed; other columns are factorized once.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        codes, n_codes = values.cat.codes.to_numpy(), len(values.cat.categories)
+    else:
+        codes, uniques = pd.factorize(values)
+        n_codes = len(uniques)
+    seen = np.zeros(n_codes, dtype=bool)
+    seen[codes[codes >= 0]] = True
+    return int(np.count_nonzero(seen))
+
+
+def _popcount(packed):
+    return int(np.unpackbits(packed).sum())
+
+
+def _bit_length(words):
+    """Vectorized ``int.bit_length`` for uint64 arrays"""
+    words = words.copy()
+    length = np.zeros(words.shape, dtype=np.int64)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = words >= np.uint64(1 << shift)
+        length[high] += shift
+        words[high] >>= np.uint64(shift)
+    return length + (words > 0)
+
+
+def hll_registers(hashes, precision=DEFAULT_PRECISION):
+    """Register index and rank of each 64-bit hash for a HyperLogLog with ``2**precision`` registers"""
+    index = (hashes >> np.uint64(64 - precision)).astype(np.int64)
+    rest = hashes & np.uint64((1 << (64 - precision)) - 1)
+    rank = (64 - precision) - _bit_length(rest) + 1
+    return index, rank.astype(np.uint8)
+
+
+def hll_estimate(registers):
+    """Cardinality estimate of one register array (with the small-range correction)"""
+    m = len(registers)
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.ldexp(1.0, -registers.astype(np.int64)))
+    zeros = np.count_nonzero(registers == 0)
+    if estimate <= 2.5 * m and zeros:
+        estimate = m * np.log(m / zeros)
+    return float(estimate)
+
+
+class HyperLogLog:
+    """Mergeable HyperLogLog sketch; relative standard error is ``1.04 / sqrt(2**precision)``"""
+
+    def __init__(self, precision=DEFAULT_PRECISION, registers=None):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8) if registers is None else registers
+
+    def add(self, values):
+        """Add an array-like of values (missing values are skipped)"""
+        hashes = pd.util.hash_pandas_object(pd.Series(values).dropna(), index=False).to_numpy()
+        index, rank = hll_registers(hashes, self.precision)
+        np.maximum.at(self.registers, index, rank)
+        return self
+
+    def merge(self, other):
+        return HyperLogLog(self.precision, np.maximum(self.registers, other.registers))
+
+    def count(self):
+        return hll_estimate(self.registers)
+
+    @property
+    def relative_error(self):
+        return 1.04 / np.sqrt(len(self.registers))
+
+
+class DistinctIndex:
+    """Distinct counts of one column over arbitrary (month range, country set) filters.
+
+    Built from a table with ``MonthKey``, ``Country`` and the counted column
+    (e.g. ``SalesRollup.invoices``). Every (month, country) group keeps a
+    summary: an exact bitset of value codes (``mode='exact'``) or a
+    HyperLogLog sketch (``mode='hll'``). A filter ORs the bitsets, or takes
+    the register-wise maximum of the sketches, of the groups it covers, so
+    no value is rehashed per query.
+    """
+
+    def __init__(self, table, column, mode='exact', precision=DEFAULT_PRECISION):
+        if mode not in ('exact', 'hll'):
+            raise ValueError(f"Unknown mode: {mode}")
+        self.mode = mode
+        self.precision = precision
+        table = table.loc[table[column].notna(), GROUP_KEYS + [column]]
+        # Groups are numbered in order of first appearance, matching drop_duplicates
+        group_codes = table.groupby(GROUP_KEYS, sort=False, dropna=False).ngroup().to_numpy()
+        groups = table[GROUP_KEYS].drop_duplicates()
+        self.months = groups['MonthKey'].to_numpy()
+        self.countries = groups['Country'].to_numpy()
+        if mode == 'exact':
+            value_codes, uniques = pd.factorize(table[column])
+            # Bits are set straight into the packed rows (np.packbits order, most significant
+            # bit first), never through a groups x values boolean matrix eight times larger
+            width = (len(uniques) + 7) // 8
+            packed = np.zeros(len(groups) * width, dtype=np.uint8)
+            np.bitwise_or.at(packed, group_codes * width + (value_codes >> 3),
+                             (0x80 >> (value_codes & 7)).astype(np.uint8))
+            self.summaries = packed.reshape(len(groups), width)
+        else:
+            hashes = pd.util.hash_pandas_object(table[column], index=False).to_numpy()
+            index, rank = hll_registers(hashes, precision)
+            m = 1 << precision
+            registers = np.zeros(len(groups) * m, dtype=np.uint8)
+            np.maximum.at(registers, group_codes * m + index, rank)
+            self.summaries = registers.reshape(len(groups), m)
+
+    def _groups(self, months, countries):
+        selected = np.ones(len(self.months), dtype=bool)
+        if months is not None:
+            start, stop = months
+            selected &= (self.months >= start) & (self.months < stop)
+        if countries is not None:
+            selected &= np.isin(self.countries, [countries] if isinstance(countries, str) else list(countries))
+        return np.flatnonzero(selected)
+
+    def count(self, months=None, countries=None):
+        """``(value, standard_error)`` for months in ``[start, stop)`` and the given countries"""
+        groups = self._groups(months, countries)
+        if not len(groups):
+            return 0, 0.0
+        if self.mode == 'exact':
+            return _popcount(np.bitwise_or.reduce(self.summaries[groups], axis=0)), 0.0
+        estimate = hll_estimate(self.summaries[groups].max(axis=0))
+        return estimate, float(estimate * 1.04 / np.sqrt(self.summaries.shape[1]))
+
+
+def format_count(value, error=0.0):
+    """Format a distinct count with its error bound (±1 standard error) when approximate"""
+    if not error:
+        return f"{value:,}"
+    return f"{value:,.0f} ± {error:,.0f} ({error / value:.1%})"
+
+
+def compare(invoices, column='CustomerID', n_queries=50, precision=DEFAULT_PRECISION, seed=0):
+    """Exact vs HyperLogLog counts and latency on random (month range, countries) filters"""
+    rng = np.random.default_rng(seed)
+    months = np.sort(invoices['MonthKey'].unique())
+    countries = invoices['Country'].dropna().unique()
+    queries = []
+    for _ in range(n_queries):
+        start, stop = np.sort(rng.choice(len(months) + 1, 2, replace=False))
+        picked = rng.choice(countries, size=min(len(countries), rng.integers(1, 6)), replace=False)
+        queries.append(((months[start], months[stop - 1] + 1), list(picked)))
+
+    results = {}
+    start = time.perf_counter()
+    for (lo, hi), picked in queries:
+        subset = invoices[(invoices['MonthKey'] >= lo) & (invoices['MonthKey'] < hi)
+                          & invoices['Country'].isin(picked)]
+        subset[column].nunique()
+    results['nunique_ms'] = (time.perf_counter() - start) / n_queries * 1000
+
+    counts = {}
+    for mode in ('exact', 'hll'):
+        start = time.perf_counter()
+        index = DistinctIndex(invoices, column, mode, precision)
+        results[f'{mode}_build_seconds'] = time.perf_counter() - start
+        start = time.perf_counter()
+        counts[mode] = [index.count(months, picked) for months, picked in queries]
+        results[f'{mode}_ms'] = (time.perf_counter() - start) / n_queries * 1000
+
+    errors = [abs(estimate - exact) / exact
+              for (exact, _), (estimate, _) in zip(counts['exact'], counts['hll']) if exact]
+    results['hll_mean_relative_error'] = float(np.mean(errors)) if errors else 0.0
+    results['hll_expected_relative_error'] = 1.04 / np.sqrt(1 << precision)
+    return results
+
+
+if __name__ == "__main__":
+    from data_cleaning import clean_transactions
+    from data_loader import DATA_FILE, read_retail_data
+    from rollup import SalesRollup
+
+    parser = argparse.ArgumentParser(description='Compare exact and HyperLogLog distinct customer counts')
+    parser.add_argument('--data', default=DATA_FILE, help='Path to the source workbook or CSV export')
+    parser.add_argument('--precision', type=int, default=DEFAULT_PRECISION, help='HyperLogLog uses 2**precision registers')
+    args = parser.parse_args()
+    invoices = SalesRollup.from_frame(clean_transactions(read_retail_data(args.data))).invoices
+
+    exact = DistinctIndex(invoices, 'CustomerID', 'exact')
+    approx = DistinctIndex(invoices, 'CustomerID', 'hll', args.precision)
+    print(f"Distinct customers: {format_count(*exact.count())} exact, {format_count(*approx.count())} approximate")
+    for key, value in compare(invoices, precision=args.precision).items():
+        print(f"{key}: {value:.4f}")
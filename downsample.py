@@ -0,0 +1,103 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+# Points per trace; a few thousand is already more than a chart is wide in pixels
+DEFAULT_MAX_POINTS = 2000
+
+
+def _x_values(index):
+    """Numeric x positions of a series index (timestamps, numbers or category labels)"""
+    if isinstance(index, pd.DatetimeIndex):
+        return index.asi8.astype(np.float64)
+    if pd.api.types.is_numeric_dtype(index):
+        return np.asarray(index, dtype=np.float64)
+    return np.arange(len(index), dtype=np.float64)
+
+
+def minmax_indices(x, y, n_out):
+    """Positions of the first, last, minimum and maximum point of ``n_out // 2`` equal-width x buckets"""
+    n_buckets = max(1, n_out // 2)
+    edges = np.linspace(x[0], x[-1], n_buckets + 1)
+    bucket = np.clip(np.searchsorted(edges, x, side='right') - 1, 0, n_buckets - 1)
+    # Sorted by (bucket, y): each bucket's first entry is its minimum, its last its maximum
+    order = np.lexsort((y, bucket))
+    starts = np.flatnonzero(np.r_[True, bucket[order][1:] != bucket[order][:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    return np.unique(np.r_[0, len(x) - 1, order[starts], order[ends]])
+
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets: keep the point of each bucket spanning the largest triangle"""
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        # The next bucket is represented by its average point
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[stop:next_stop].mean() if next_stop > stop else x[-1]
+        next_y = y[stop:next_stop].mean() if next_stop > stop else y[-1]
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+METHODS = {'minmax': minmax_indices, 'lttb': lttb_indices}
+
+
+def downsample_positions(series, max_points=DEFAULT_MAX_POINTS, method='minmax'):
+    """Positions in ``series`` of the points kept by :func:`downsample`"""
+    y = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    present = np.flatnonzero(~np.isnan(y))
+    if len(present) <= max_points:
+        return present
+    x = _x_values(series.index[present])
+    y = y[present]
+    keep = METHODS[method](x, y, max_points)
+    return present[np.unique(np.r_[keep, np.argmin(y), np.argmax(y)])]
+
+
+def downsample(series, max_points=DEFAULT_MAX_POINTS, method='minmax'):
+    """Reduce a time series to about ``max_points`` points, keeping its extremes.
+
+    ``series`` is indexed by x (timestamps, numbers or ordered labels) and
+    sorted by it. The global minimum and maximum are always kept, so peaks
+    annotated on the full data stay on the line. Missing values are dropped;
+    short series are returned unchanged.
+    """
+    return series.iloc[downsample_positions(series, max_points, method)]
+
+
+def compare(series, max_points=DEFAULT_MAX_POINTS):
+    """Point counts and preserved extremes of each method on ``series``"""
+    results = {'points_in': len(series)}
+    for method in METHODS:
+        reduced = downsample(series, max_points, method)
+        results[f'{method}_points'] = len(reduced)
+        results[f'{method}_keeps_extremes'] = bool(
+            reduced.max() == series.max() and reduced.min() == series.min())
+    return results
+
+
+if __name__ == "__main__":
+    from data_cleaning import clean_transactions
+    from data_loader import DATA_FILE, read_retail_data
+    from rollup import SalesRollup
+
+    parser = argparse.ArgumentParser(description='Compare downsampling methods on the transaction-level sales series')
+    parser.add_argument('--data', default=DATA_FILE, help='Path to the source workbook or CSV export')
+    parser.add_argument('--max-points', type=int, default=DEFAULT_MAX_POINTS)
+    args = parser.parse_args()
+    rollup = SalesRollup.from_frame(clean_transactions(read_retail_data(args.data)))
+    for view in ('invoice_sales', 'hourly_sales', 'daily_sales'):
+        print(f"\n{view}:")
+        for key, value in compare(getattr(rollup, view)(), args.max_points).items():
+            print(f"  {key}: {value}")
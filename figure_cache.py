@@ -0,0 +1,136 @@
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+
+MANIFEST_NAME = 'manifest.json'
+
+
+def data_digest(value):
+    """Content hash of a chart input (Series, DataFrame, array or JSON-able value)"""
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        payload = pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes()
+        if isinstance(value, pd.DataFrame):
+            payload += json.dumps([str(column) for column in value.columns]).encode()
+    elif hasattr(value, 'tobytes'):
+        payload = value.tobytes()
+    else:
+        payload = json.dumps(value, sort_keys=True, default=str).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def code_digest(func):
+    """Hash of a function's source, so editing a figure builder invalidates its charts"""
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = getattr(func, '__qualname__', repr(func))
+    return hashlib.sha256(source.encode()).hexdigest()[:16]
+
+
+class FigureCache:
+    """Content-addressed cache of rendered chart files.
+
+    A chart's key is the hash of its aggregate input plus its figure spec
+    (builder code, template, output options). When the key matches the
+    manifest and the output file is intact, the chart is not rebuilt; a
+    missing or modified output is restored from the stored copy. Entries
+    replaced by a newer key, and entries beyond ``max_entries``, are evicted.
+    """
+
+    def __init__(self, cache_dir, max_entries=64):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.manifest_path = os.path.join(cache_dir, MANIFEST_NAME)
+        self.manifest = self._read_manifest()
+        self.stats = {}
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path) as fh:
+                return json.load(fh)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(self.manifest_path + '.tmp', 'w') as fh:
+            json.dump(self.manifest, fh, indent=2)
+        os.replace(self.manifest_path + '.tmp', self.manifest_path)
+
+    def _blob_path(self, key, output):
+        return os.path.join(self.cache_dir, key + os.path.splitext(output)[1])
+
+    def key(self, data, spec):
+        """Cache key of a chart from its input data and figure spec"""
+        spec_json = json.dumps(spec, sort_keys=True, default=str)
+        return hashlib.sha256((data_digest(data) + spec_json).encode()).hexdigest()
+
+    def lookup(self, name, key, outputs):
+        """Return True (and restore outputs if needed) when ``name`` is cached under ``key``"""
+        entry = self.manifest.get(name)
+        hit = entry is not None and entry['key'] == key
+        if hit:
+            for output, recorded in zip(outputs, entry['outputs']):
+                blob = self._blob_path(key, output)
+                if not os.path.exists(blob):
+                    hit = False
+                    break
+                stat = os.stat(output) if os.path.exists(output) else None
+                if stat is None or [stat.st_size, stat.st_mtime_ns] != recorded:
+                    shutil.copyfile(blob, output)
+        if hit:
+            entry['last_used'] = time.time()
+            self._record_outputs(entry, outputs)
+        self.stats[name] = 'hit' if hit else 'miss'
+        return hit
+
+    def _record_outputs(self, entry, outputs):
+        entry['outputs'] = [[os.stat(path).st_size, os.stat(path).st_mtime_ns] for path in outputs]
+
+    def store(self, name, key, outputs):
+        """Record freshly rendered ``outputs`` of ``name`` under ``key``"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        for output in outputs:
+            shutil.copyfile(output, self._blob_path(key, output))
+        entry = {'key': key, 'last_used': time.time()}
+        self._record_outputs(entry, outputs)
+        self.manifest[name] = entry
+        self.evict()
+
+    def evict(self, keep=None):
+        """Drop entries not named in ``keep`` and the least recently used ones, then orphaned blobs"""
+        if keep is not None:
+            for name in [name for name in self.manifest if name not in keep]:
+                del self.manifest[name]
+        if len(self.manifest) > self.max_entries:
+            by_age = sorted(self.manifest, key=lambda name: self.manifest[name]['last_used'])
+            for name in by_age[:len(self.manifest) - self.max_entries]:
+                del self.manifest[name]
+        live = {entry['key'] for entry in self.manifest.values()}
+        if os.path.isdir(self.cache_dir):
+            for filename in os.listdir(self.cache_dir):
+                if filename != MANIFEST_NAME and os.path.splitext(filename)[0] not in live:
+                    os.remove(os.path.join(self.cache_dir, filename))
+        self._write_manifest()
+
+    def render(self, name, data, spec, draw, outputs):
+        """Call ``draw()`` only when the cached outputs for ``name`` are stale; returns True on a hit"""
+        key = self.key(data, spec)
+        if self.lookup(name, key, outputs):
+            self._write_manifest()
+            return True
+        draw()
+        self.store(name, key, outputs)
+        return False
+
+    def summary(self):
+        """Per-chart hit/miss lines plus totals"""
+        hits = sum(1 for result in self.stats.values() if result == 'hit')
+        lines = [f"  {name}: {result}" for name, result in self.stats.items()]
+        lines.append(f"Figure cache: {hits} hits, {len(self.stats) - hits} misses")
+        return lines
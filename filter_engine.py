@@ -0,0 +1,181 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# Categorical columns that get a row-position index
+INDEXED_COLUMNS = ('Country', 'Description')
+MEASURES = ('Sales', 'Quantity')
+
+
+class FilterEngine:
+    """Slices cleaned transactions by date range, country and product without full-frame masks.
+
+    Rows are sorted by ``InvoiceDate`` once, so a date range is a contiguous
+    block found by binary search. For each indexed column the engine keeps
+    the row positions of every category in ascending order; a compound
+    filter narrows each category's positions to the date block and
+    intersects them. Results are row positions, row views or summed measures
+    (date-only totals sum one contiguous block).
+    """
+
+    def __init__(self, df, columns=INDEXED_COLUMNS):
+        order = np.argsort(df['InvoiceDate'].to_numpy(), kind='stable')
+        self.frame = df.take(order).reset_index(drop=True)
+        self.dates = self.frame['InvoiceDate'].to_numpy().astype('datetime64[ns]').view(np.int64)
+        self.indexes = {}
+        for column in columns:
+            values = self.frame[column]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype('category')
+            codes = values.cat.codes.to_numpy()
+            # Stable sort by code keeps each category's positions in date order
+            positions = np.argsort(codes, kind='stable')
+            offsets = np.searchsorted(codes[positions], np.arange(len(values.cat.categories) + 1))
+            self.indexes[column] = (values.cat.categories, positions, offsets)
+        self.measures = {measure: self.frame[measure].to_numpy(dtype=np.float64)
+                         for measure in MEASURES if measure in self.frame.columns}
+
+    def _date_bounds(self, start, stop):
+        lo = 0 if start is None else int(np.searchsorted(self.dates, pd.Timestamp(start).value, side='left'))
+        hi = len(self.dates) if stop is None else int(np.searchsorted(self.dates, pd.Timestamp(stop).value, side='left'))
+        return lo, max(lo, hi)
+
+    def _category_positions(self, column, values, lo, hi):
+        categories, positions, offsets = self.indexes[column]
+        parts = []
+        # Repeated values would repeat their positions
+        for value in [values] if isinstance(values, str) else dict.fromkeys(values):
+            if value not in categories:
+                continue
+            code = categories.get_loc(value)
+            rows = positions[offsets[code]:offsets[code + 1]]
+            # Positions are ascending, so the date block is another binary search
+            parts.append(rows[np.searchsorted(rows, lo):np.searchsorted(rows, hi)])
+        if len(parts) == 1:
+            return parts[0]
+        return np.sort(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int64)
+
+    def positions(self, start=None, stop=None, **filters):
+        """Sorted row positions matching ``start <= InvoiceDate < stop`` and each ``column=value(s)`` filter.
+
+        Returns a ``slice`` when only the date range is constrained.
+        """
+        lo, hi = self._date_bounds(start, stop)
+        selected = [self._category_positions(column, values, lo, hi)
+                    for column, values in filters.items() if values is not None]
+        if not selected:
+            return slice(lo, hi)
+        selected.sort(key=len)
+        result = selected[0]
+        for other in selected[1:]:
+            result = np.intersect1d(result, other, assume_unique=True)
+        return result
+
+    def rows(self, start=None, stop=None, **filters):
+        """Matching rows of the date-sorted frame"""
+        selection = self.positions(start, stop, **filters)
+        if isinstance(selection, slice):
+            return self.frame.iloc[selection]
+        return self.frame.take(selection)
+
+    def totals(self, start=None, stop=None, **filters):
+        """Summed measures and line count of the matching rows"""
+        selection = self.positions(start, stop, **filters)
+        totals = {measure: float(values[selection].sum()) for measure, values in self.measures.items()}
+        totals['Lines'] = selection.stop - selection.start if isinstance(selection, slice) else len(selection)
+        return totals
+
+
+def naive_mask(df, start=None, stop=None, **filters):
+    """Boolean-mask equivalent of :meth:`FilterEngine.rows`, kept for benchmarks"""
+    mask = np.ones(len(df), dtype=bool)
+    dates = df['InvoiceDate']
+    if start is not None:
+        mask &= (dates >= pd.Timestamp(start)).to_numpy()
+    if stop is not None:
+        mask &= (dates < pd.Timestamp(stop)).to_numpy()
+    for column, value in filters.items():
+        if value is not None:
+            mask &= (df[column] == value).to_numpy()
+    return df[mask]
+
+
+def scale_frame(df, factor):
+    """Repeat the rows of ``df`` ``factor`` times, shifting each copy by a few minutes"""
+    if factor == 1:
+        return df
+    columns = {}
+    for column in ('InvoiceDate', 'Country', 'Description') + MEASURES:
+        values = df[column]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            codes = np.tile(values.cat.codes.to_numpy(), factor)
+            columns[column] = pd.Categorical.from_codes(codes, values.cat.categories)
+        elif column == 'InvoiceDate':
+            shift = np.repeat(np.arange(factor, dtype=np.int64) * 60_000_000_000, len(df))
+            columns[column] = pd.to_datetime(np.tile(values.to_numpy().view(np.int64), factor) + shift)
+        else:
+            columns[column] = np.tile(values.to_numpy(), factor)
+    return pd.DataFrame(columns)
+
+
+def random_queries(df, n_queries, seed=0):
+    """Date-range filters combined with a country and sometimes a product, as a dashboard issues them"""
+    rng = np.random.default_rng(seed)
+    lo, hi = df['InvoiceDate'].min().value, df['InvoiceDate'].max().value
+    countries = df['Country'].value_counts().index[:10]
+    products = df['Description'].value_counts().index[:50]
+    queries = []
+    for _ in range(n_queries):
+        start, stop = np.sort(rng.integers(lo, hi, 2))
+        filters = {'start': pd.Timestamp(start), 'stop': pd.Timestamp(stop),
+                   'Country': countries[rng.integers(len(countries))]}
+        if rng.random() < 0.5:
+            filters['Description'] = products[rng.integers(len(products))]
+        queries.append(filters)
+    return queries
+
+
+def benchmark(df, scales=(1, 10, 100), n_queries=50, seed=0):
+    """Average filter latency of the engine against naive masking at several data sizes"""
+    results = []
+    for factor in scales:
+        frame = scale_frame(df, factor)
+        queries = random_queries(frame, n_queries, seed)
+        start = time.perf_counter()
+        engine = FilterEngine(frame)
+        build = time.perf_counter() - start
+
+        timings = {}
+        for label, run in (('naive', lambda q, frame=frame: naive_mask(frame, **q)),
+                           ('engine', lambda q, engine=engine: engine.rows(**q))):
+            start = time.perf_counter()
+            counts = [len(run(query)) for query in queries]
+            timings[label] = ((time.perf_counter() - start) / n_queries, counts)
+        results.append({
+            'scale': factor,
+            'rows': len(frame),
+            'build_seconds': build,
+            'naive_ms': timings['naive'][0] * 1000,
+            'engine_ms': timings['engine'][0] * 1000,
+            'same_rows': timings['naive'][1] == timings['engine'][1],
+        })
+        # Free this scale before the next one is built
+        del frame, engine, run
+    return results
+
+
+if __name__ == "__main__":
+    from data_cleaning import clean_transactions
+    from data_loader import DATA_FILE, read_retail_data
+
+    parser = argparse.ArgumentParser(description='Benchmark indexed filtering against boolean masks')
+    parser.add_argument('--data', default=DATA_FILE, help='Path to the source workbook or CSV export')
+    parser.add_argument('--scales', default='1,10,100', help='Comma-separated size multipliers')
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+    cleaned = clean_transactions(read_retail_data(args.data))
+    for row in benchmark(cleaned, [int(s) for s in args.scales.split(',')], args.queries):
+        print(f"{row['scale']:>4}x {row['rows']:>12,} rows  build {row['build_seconds']:.2f}s  "
+              f"naive {row['naive_ms']:.2f} ms  engine {row['engine_ms']:.2f} ms  same rows: {row['same_rows']}")
@@ -1,94 +1,160 @@
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import os
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 import time
-from tqdm import tqdm
-import psutil
-import numpy as np
 import warnings
 warnings.filterwarnings('ignore')
 
-# Configure plotly for better performance
-import plotly.io as pio
-pio.templates.default = "plotly_white"
-pio.renderers.default = 'browser'
+from data_loader import DATA_FILE, load_raw_data, format_load_info
+from data_cleaning import clean_transactions, format_cleaning_report
+from rollup import SalesRollup, ensure_rollup
+from cohort import calendar_counts, cohort_tables
+from topk import top_k
+from streaming_ingest import DEFAULT_CHUNKSIZE, stream_rollup
+from figure_cache import FigureCache, code_digest
+from static_export import STATIC_FORMATS, batched, warm_up, write_static
+from html_bundle import write_bundle
+from downsample import DEFAULT_MAX_POINTS, downsample
+import profiling
+from profiling import MB, PROFILERS, span
+import incremental
 
-# Create visualizations directory if it doesn't exist
-os.makedirs('visualizations', exist_ok=True)
+PLOTLY_TEMPLATE = "plotly_white"
+FIGURE_CACHE_DIR = os.path.join('visualizations', '.figure_cache')
 
-def save_plotly_fig(fig, filename):
+def plotly_modules():
+    """``(px, go)``, imported and configured on first use.
+
+    Importing plotly takes about half a second, so it waits until a figure
+    is built: importing this module, loading or aggregating data and runs
+    served entirely from the figure cache never pay for it.
+    """
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import plotly.io as pio
+    if pio.templates.default != PLOTLY_TEMPLATE:
+        # Configure plotly for better performance
+        pio.templates.default = PLOTLY_TEMPLATE
+        pio.renderers.default = 'browser'
+    return px, go
+
+def save_plotly_fig(fig, filename, formats=('html',)):
     """Save plotly figure with optimized settings"""
     try:
-        # Save only HTML version for better performance
+        # HTML by default; PNG/SVG are exported through Kaleido when requested
         config = {
             'responsive': True,
             'displayModeBar': False,
             'staticPlot': False
         }
         
-        fig.write_html(
-            f'visualizations/{filename}.html',
-            include_plotlyjs='cdn',
-            config=config,
-            full_html=False,
-            auto_play=False
-        )
+        # Create visualizations directory if it doesn't exist
+        os.makedirs('visualizations', exist_ok=True)
+        if 'html' in formats:
+            with span('write:html'):
+                fig.write_html(
+                    f'visualizations/{filename}.html',
+                    include_plotlyjs='cdn',
+                    config=config,
+                    full_html=False,
+                    auto_play=False
+                )
+        static_formats = [fmt for fmt in formats if fmt != 'html']
+        if static_formats:
+            with span('write:static', formats=','.join(static_formats)):
+                write_static(fig, f'visualizations/{filename}', static_formats)
         return True
     except Exception as e:
         print(f"Error saving figure {filename}: {str(e)}")
         return False
 
 # Load and prepare data
-def load_data():
+def load_data(path=DATA_FILE, rebuild_cache=False, load_info=None, cleaning_report=None):
     """Load and prepare the retail dataset with optimizations"""
-    # Read only necessary columns
-    usecols = ['InvoiceDate', 'Quantity', 'UnitPrice', 'Country', 'CustomerID', 'Description']
-    df = pd.read_excel('Online Retail Data Set.xlsx', usecols=usecols)
-    
-    # Convert to appropriate types after loading
-    df['Quantity'] = pd.to_numeric(df['Quantity'], errors='coerce')
-    df['UnitPrice'] = pd.to_numeric(df['UnitPrice'], errors='coerce')
-    
-    # Clean data
-    df = df.dropna(subset=['Quantity', 'UnitPrice'])
-    df = df[df['Quantity'] > 0]
-    df = df[df['UnitPrice'] > 0]
-    
-    # Convert to memory-efficient types
-    df['Country'] = df['Country'].astype('category')
-    df['Description'] = df['Description'].astype('category')
-    
-    # Calculate total amount
-    df['TotalAmount'] = df['Quantity'] * df['UnitPrice']
+    # Read only necessary columns (served from the columnar cache after the first run)
+    usecols = ['InvoiceNo', 'InvoiceDate', 'Quantity', 'UnitPrice', 'Country', 'CustomerID', 'Description']
+    df, info = load_raw_data(path, usecols=usecols, rebuild=rebuild_cache)
+    if load_info is not None:
+        load_info.update(info)
     
-    # Process dates
-    df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'])
-    df['Month'] = df['InvoiceDate'].dt.strftime('%Y-%m')
+    # Clean data with the shared pipeline (typed schema, Sales column)
+    report = {} if cleaning_report is None else cleaning_report
+    tracer = profiling.get_tracer()
+    df = clean_transactions(df, report=report, track_memory=tracer is not None and tracer.trace_memory)
     
+    # Dates are carried as integer period keys (MonthKey etc.) by the cleaning pipeline
     return df
 
-def create_monthly_sales_chart(df):
-    """Create monthly sales trend visualization"""
-    monthly_sales = df.groupby('Month')['TotalAmount'].sum().reset_index()
+def build_monthly_sales_figure(monthly_sales):
+    """Build the monthly sales trend figure from per-month totals"""
+    px, go = plotly_modules()
+    monthly_sales = monthly_sales.rename('Sales').rename_axis('Month').reset_index()
     
     fig = px.line(
         monthly_sales,
         x='Month',
-        y='TotalAmount',
+        y='Sales',
         title='Monthly Sales Performance'
     )
     
     fig.update_traces(mode='lines+markers')
     fig.update_layout(height=500)
-    
+    return fig
+
+def create_monthly_sales_chart(data):
+    """Create monthly sales trend visualization"""
+    fig = build_monthly_sales_figure(ensure_rollup(data).monthly_sales())
     save_plotly_fig(fig, 'monthly_sales_performance')
     return fig
 
-def create_country_sales_chart(df):
-    """Create country-wise sales distribution visualization"""
-    country_sales = df.groupby('Country')['TotalAmount'].sum().sort_values(ascending=True).tail(10)
+def build_trend_figure(sales, title, xaxis_title, max_points=DEFAULT_MAX_POINTS):
+    """Build a time-series figure capped at ``max_points`` points, with its peak annotated"""
+    px, go = plotly_modules()
+    peak_time, peak_sales = sales.idxmax(), sales.max()
+    # Min-max bucketing keeps every bucket's extremes, so the peak stays on the line
+    sales = downsample(sales, max_points, method='minmax')
+    
+    fig = go.Figure(go.Scatter(
+        x=sales.index,
+        y=sales.values,
+        mode='lines',
+        name='Sales'
+    ))
+    fig.add_annotation(
+        x=peak_time,
+        y=peak_sales,
+        text=f"Peak: £{peak_sales:,.0f}",
+        showarrow=True,
+        arrowhead=1
+    )
+    
+    fig.update_layout(
+        title=title,
+        xaxis_title=xaxis_title,
+        yaxis_title='Total Sales (£)',
+        template='plotly_white'
+    )
+    return fig
+
+def build_daily_sales_figure(daily_sales):
+    """Build the daily sales trend figure from per-day totals"""
+    return build_trend_figure(daily_sales, 'Daily Sales Trend', 'Date')
+
+def build_hourly_sales_figure(hourly_sales):
+    """Build the hourly sales trend figure from per-hour totals"""
+    return build_trend_figure(hourly_sales, 'Hourly Sales Trend', 'Hour')
+
+def build_transaction_sales_figure(invoice_sales):
+    """Build the per-transaction sales figure from invoice totals"""
+    return build_trend_figure(invoice_sales, 'Sales per Transaction', 'Invoice Date')
+
+def build_country_sales_figure(country_sales, k=10):
+    """Build the top countries figure from per-country totals"""
+    px, go = plotly_modules()
+    # Largest bar at the top of the horizontal chart
+    country_sales = top_k(country_sales, k)[::-1]
     
     fig = go.Figure(go.Bar(
         x=country_sales.values,
@@ -97,18 +163,23 @@ def create_country_sales_chart(df):
     ))
     
     fig.update_layout(
-        title='Top 10 Countries by Sales',
+        title=f'Top {k} Countries by Sales',
         xaxis_title='Total Sales',
         yaxis_title='Country',
         template='plotly_white'
     )
-    
+    return fig
+
+def create_country_sales_chart(data):
+    """Create country-wise sales distribution visualization"""
+    fig = build_country_sales_figure(ensure_rollup(data).country_sales())
     save_plotly_fig(fig, 'country_sales_distribution')
     return fig
 
-def create_product_analysis(df):
-    """Create product analysis visualization"""
-    top_products = df.groupby('Description')['Quantity'].sum().sort_values(ascending=False).head(10)
+def build_product_figure(product_quantity, k=10):
+    """Build the top products figure from per-product quantities"""
+    px, go = plotly_modules()
+    top_products = top_k(product_quantity, k)
     
     fig = go.Figure(go.Bar(
         x=top_products.index,
@@ -118,25 +189,25 @@ def create_product_analysis(df):
     ))
     
     fig.update_layout(
-        title='Top 10 Products by Quantity Sold',
+        title=f'Top {k} Products by Quantity Sold',
         xaxis_title='Product Description',
         yaxis_title='Total Quantity Sold',
         template='plotly_white',
         xaxis_tickangle=45
     )
-    
+    return fig
+
+def create_product_analysis(data):
+    """Create product analysis visualization"""
+    fig = build_product_figure(ensure_rollup(data).product_quantity())
     save_plotly_fig(fig, 'top_products_analysis')
     return fig
 
-def create_customer_cohort(df):
-    """Create customer cohort analysis visualization"""
-    # Get first purchase month for each customer
-    customer_first_purchase = df.groupby('CustomerID')['Month'].min()
-    df['CohortMonth'] = df['CustomerID'].map(customer_first_purchase)
-    
-    # Calculate cohort metrics
-    cohort_data = df.groupby(['CohortMonth', 'Month'])['CustomerID'].nunique().reset_index()
-    cohort_data = cohort_data.pivot(index='CohortMonth', columns='Month', values='CustomerID')
+def build_cohort_figure(customer_months):
+    """Build the cohort heatmap from distinct (CustomerID, MonthKey) pairs"""
+    px, go = plotly_modules()
+    counts, _ = cohort_tables(customer_months['CustomerID'], customer_months['MonthKey'])
+    cohort_data = calendar_counts(counts)
     
     fig = go.Figure(data=go.Heatmap(
         z=cohort_data.values,
@@ -151,29 +222,35 @@ def create_customer_cohort(df):
         yaxis_title='Cohort Month',
         template='plotly_white'
     )
-    
+    return fig
+
+def create_customer_cohort(data):
+    """Create customer cohort analysis visualization"""
+    fig = build_cohort_figure(ensure_rollup(data).customer_months())
     save_plotly_fig(fig, 'customer_cohort_analysis')
     return fig
 
-def create_sales_dashboard(df):
-    """Create comprehensive sales dashboard"""
-    # Create subplots
+def build_dashboard_figure(monthly_sales):
+    """Build the executive dashboard figure from per-month totals"""
+    px, go = plotly_modules()
     fig = go.Figure()
     
-    # Monthly trend
-    monthly_sales = df.groupby('Month')['TotalAmount'].sum().reset_index()
+    # Monthly trend (downsampling only kicks in beyond the point budget and keeps the peak)
+    monthly_sales = monthly_sales.rename('Sales').rename_axis('Month')
+    trend = downsample(monthly_sales)
     fig.add_trace(go.Scatter(
-        x=monthly_sales['Month'],
-        y=monthly_sales['TotalAmount'],
+        x=trend.index,
+        y=trend.values,
         name='Monthly Sales'
     ))
     
     # Add annotations for peak sales
-    peak_month = monthly_sales.loc[monthly_sales['TotalAmount'].idxmax()]
+    monthly_sales = monthly_sales.reset_index()
+    peak_month = monthly_sales.loc[monthly_sales['Sales'].idxmax()]
     fig.add_annotation(
         x=peak_month['Month'],
-        y=peak_month['TotalAmount'],
-        text=f"Peak Sales: £{peak_month['TotalAmount']:,.0f}",
+        y=peak_month['Sales'],
+        text=f"Peak Sales: £{peak_month['Sales']:,.0f}",
         showarrow=True,
         arrowhead=1
     )
@@ -185,61 +262,334 @@ def create_sales_dashboard(df):
         template='plotly_white',
         showlegend=True
     )
-    
+    return fig
+
+def create_sales_dashboard(data):
+    """Create comprehensive sales dashboard"""
+    fig = build_dashboard_figure(ensure_rollup(data).monthly_sales())
     save_plotly_fig(fig, 'executive_dashboard')
     return fig
 
-def get_system_metrics():
-    """Get current system metrics"""
-    cpu_percent = psutil.cpu_percent()
-    memory = psutil.virtual_memory()
+def build_rfm_figure(segments):
+    """Build the RFM segment chart: share of customers next to share of revenue per segment"""
+    px, go = plotly_modules()
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        y=segments.index,
+        x=segments['CustomerShare'],
+        orientation='h',
+        name='Share of Customers',
+        customdata=segments['Customers'],
+        hovertemplate='%{y}: %{customdata:,} customers (%{x:.1%})<extra></extra>'
+    ))
+    fig.add_trace(go.Bar(
+        y=segments.index,
+        x=segments['RevenueShare'],
+        orientation='h',
+        name='Share of Revenue',
+        customdata=segments['Revenue'],
+        hovertemplate='%{y}: £%{customdata:,.0f} (%{x:.1%})<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title='RFM Customer Segments',
+        xaxis_title='Share',
+        xaxis_tickformat='.0%',
+        yaxis={'autorange': 'reversed'},
+        barmode='group',
+        height=600,
+        template='plotly_white'
+    )
+    return fig
+
+def create_rfm_segments_chart(data):
+    """Create RFM customer segments visualization"""
+    fig = build_rfm_figure(ensure_rollup(data).rfm_segments())
+    save_plotly_fig(fig, 'rfm_segments')
+    return fig
+
+def basket_pairs(df, min_support=None, memory_limit_mb=None):
+    """Strongest product pairs by lift for the frequently-bought-together chart (needs the cleaned lines)"""
+    # scipy is only imported when baskets are actually computed
+    import market_basket
+    options = {'min_support': min_support, 'memory_limit_mb': memory_limit_mb}
+    return market_basket.association_pairs(
+        df, top=BASKET_PAIRS, **{name: value for name, value in options.items() if value is not None})
+
+def build_basket_figure(pairs, max_items=15):
+    """Build the frequently-bought-together heatmap: lift between the products of the top pairs"""
+    px, go = plotly_modules()
+    items = pd.unique(pairs[['ItemA', 'ItemB']].to_numpy().ravel())[:max_items]
+    # Each pair appears on both sides of the diagonal
+    both = pd.concat([pairs, pairs.rename(columns={'ItemA': 'ItemB', 'ItemB': 'ItemA'})], ignore_index=True)
+    lift = both.pivot(index='ItemA', columns='ItemB', values='Lift').reindex(index=items, columns=items)
+    support = both.pivot(index='ItemA', columns='ItemB', values='Support').reindex(index=items, columns=items)
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=lift.values,
+        x=items,
+        y=items,
+        customdata=support.values,
+        colorscale='Blues',
+        colorbar={'title': 'Lift'},
+        hovertemplate='%{y} + %{x}<br>Lift: %{z:.2f}<br>Support: %{customdata:.2%}<extra></extra>'
+    ))
+    
+    fig.update_layout(
+        title='Frequently Bought Together (Lift of the Strongest Product Pairs)',
+        height=700,
+        xaxis_tickangle=45,
+        template='plotly_white'
+    )
+    return fig
+
+def create_basket_chart(df):
+    """Create frequently-bought-together visualization from cleaned transaction lines"""
+    fig = build_basket_figure(basket_pairs(df))
+    save_plotly_fig(fig, 'frequently_bought_together')
+    return fig
+
+# (name, output file, rollup view, figure builder) for every chart
+VISUALIZATIONS = [
+    ("Monthly Sales Chart", 'monthly_sales_performance', 'monthly_sales', build_monthly_sales_figure),
+    ("Country Sales Distribution", 'country_sales_distribution', 'country_sales', build_country_sales_figure),
+    ("Product Analysis", 'top_products_analysis', 'product_quantity', build_product_figure),
+    ("Customer Cohort Analysis", 'customer_cohort_analysis', 'customer_months', build_cohort_figure),
+    ("Executive Dashboard", 'executive_dashboard', 'monthly_sales', build_dashboard_figure),
+    ("Daily Sales Trend", 'daily_sales_trend', 'daily_sales', build_daily_sales_figure),
+    ("Hourly Sales Trend", 'hourly_sales_trend', 'hourly_sales', build_hourly_sales_figure),
+    ("Transaction Sales", 'transaction_sales', 'invoice_sales', build_transaction_sales_figure),
+    ("RFM Segments", 'rfm_segments', 'rfm_segments', build_rfm_figure),
+]
+# Charts that need the cleaned transaction lines, not just the rollup; skipped by --stream and --incremental
+LINE_VISUALIZATIONS = [
+    ("Frequently Bought Together", 'frequently_bought_together', 'basket_pairs', build_basket_figure),
+]
+BASKET_PAIRS = 30
+
+def figure_spec(build_figure, formats=('html',)):
+    """Everything besides the input data that shapes a chart's output files"""
     return {
-        'cpu_usage': cpu_percent,
-        'memory_used': memory.percent,
-        'memory_available': memory.available / (1024 * 1024 * 1024)  # Convert to GB
+        'formats': list(formats),
+        'builder': build_figure.__name__,
+        # Titles and layout live in the builder, so its source is part of the key
+        'builder_code': code_digest(build_figure),
+        'save_code': code_digest(save_plotly_fig),
+        'template': PLOTLY_TEMPLATE,
     }
 
-def print_metrics(start_time, operation):
-    """Print processing metrics"""
-    metrics = get_system_metrics()
-    elapsed_time = time.time() - start_time
+def render_chart(filename, build_figure, chart_input, formats=('html',)):
+    """Build and save one chart from its aggregate input (runs in a worker process when parallel)"""
+    start_time = time.time()
+    with span(f'figure:{filename}'):
+        with span('build'):
+            fig = build_figure(chart_input)
+        saved = save_plotly_fig(fig, filename, formats)
+    return saved, time.time() - start_time
+
+def render_batch(batch, formats=('html',)):
+    """Render a batch of tasks in one worker; returns one result tuple per chart"""
+    results = []
+    for name, filename, build_figure, chart_input in batch:
+        try:
+            saved, seconds = render_chart(filename, build_figure, chart_input, formats)
+            results.append((name, filename, saved, seconds, None))
+        except Exception as e:
+            results.append((name, filename, False, 0.0, e))
+    return results
+
+def render_charts(tasks, workers=1, formats=('html',)):
+    """Render ``(name, filename, build_figure, chart_input)`` tasks.
+
+    Yields ``(name, filename, saved, seconds, error)`` per chart as it finishes.
+    With ``workers > 1`` the charts are built and written in a process pool;
+    only the small aggregate inputs are sent to the workers. When static
+    formats are requested each worker starts Kaleido once up front and
+    receives its charts in batches, so the renderer stays warm.
+    """
+    from tqdm import tqdm
+    if workers <= 1:
+        for task in tqdm(tasks, desc="Creating Plots"):
+            yield from render_batch([task], formats)
+        return
+    
+    static = any(fmt in STATIC_FORMATS for fmt in formats)
+    batch_size = max(1, -(-len(tasks) // workers)) if static else 1
+    with ProcessPoolExecutor(max_workers=workers, initializer=warm_up if static else None) as pool:
+        futures = [pool.submit(render_batch, batch, formats) for batch in batched(tasks, batch_size)]
+        with tqdm(total=len(tasks), desc="Creating Plots") as progress:
+            for future in as_completed(futures):
+                for result in future.result():
+                    progress.update()
+                    yield result
+
+def print_stage(record, operation, extra=None):
+    """Print the time and memory of a finished stage span"""
     print(f"\n{operation} Metrics:")
-    print(f"Time Elapsed: {elapsed_time:.2f} seconds")
-    print(f"CPU Usage: {metrics['cpu_usage']}%")
-    print(f"Memory Usage: {metrics['memory_used']}%")
-    print(f"Available Memory: {metrics['memory_available']:.2f} GB")
+    print(f"Time Elapsed: {record['seconds']:.2f} seconds")
+    if 'alloc_peak' in record:
+        print(f"Allocated (peak): {record['alloc_peak'] / MB:,.1f} MB")
+    print(f"RSS Change: {record['rss_delta'] / MB:+,.1f} MB (process peak {record['rss_peak'] / MB:,.1f} MB)")
+    for label, value in extra or []:
+        print(f"{label}: {value}")
+
+def parse_args(argv=None):
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description='Generate all retail sales visualizations')
+    parser.add_argument('--data', default=DATA_FILE, help='Path to the source workbook or CSV export')
+    parser.add_argument('--rebuild-cache', action='store_true',
+                        help='Re-parse the source file and rebuild the columnar cache')
+    parser.add_argument('--stream', action='store_true',
+                        help='Read the source in bounded chunks instead of loading it whole')
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE,
+                        help='Rows per chunk in streaming mode')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only ingest rows after the stored watermark and re-render changed charts')
+    parser.add_argument('--state-dir', default=incremental.STATE_DIR,
+                        help='Directory holding the incremental watermark and aggregates')
+    parser.add_argument('--formats', default='html',
+                        help='Comma-separated output formats: html, png, svg')
+    parser.add_argument('--bundle', metavar='PATH',
+                        help='Also write every chart into one offline HTML page (plus .gz/.br copies)')
+    parser.add_argument('--no-figure-cache', action='store_true',
+                        help='Re-render every chart even if its data and spec are unchanged')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker processes used to render charts in parallel')
+    parser.add_argument('--agg-workers', type=int, default=1,
+                        help='Worker processes used to aggregate the cleaned data (partitioned map-reduce)')
+    parser.add_argument('--basket-support', type=float, default=None,
+                        help='Minimum share of invoices a product needs to enter the frequently-bought-together chart')
+    parser.add_argument('--basket-memory-mb', type=float, default=None,
+                        help='Memory ceiling for one block of the product co-occurrence matrix')
+    parser.add_argument('--compare-parallel', action='store_true',
+                        help='Render all charts serially and in parallel and compare wall-clock time')
+    parser.add_argument('--trace', metavar='PATH',
+                        help='Write the per-stage spans as a Chrome trace-event JSON file')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Also track tracemalloc allocations per stage (slower; timings and RSS only by default)')
+    parser.add_argument('--profile-stage', action='append', default=[], metavar='NAME',
+                        help="Run the named stage (e.g. 'clean', 'figure:executive_dashboard') under a profiler")
+    parser.add_argument('--profiler', choices=PROFILERS, default='cprofile',
+                        help='Profiler used for --profile-stage')
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
     """Main function with optimized visualization generation"""
+    args = parse_args(argv)
     total_start = time.time()
+    # Charts rendered in worker processes are timed there and not traced
+    tracer = profiling.enable(trace_memory=args.trace_memory, profile_stages=args.profile_stage,
+                              profiler=args.profiler, profile_dir='profiles')
     
     print("\n1. Loading and Preparing Data...")
-    start_time = time.time()
-    df = load_data()
-    print_metrics(start_time, "Data Loading")
-    
-    # List of visualizations to create
-    visualizations = [
-        ("Monthly Sales Chart", create_monthly_sales_chart),
-        ("Country Sales Distribution", create_country_sales_chart),
-        ("Product Analysis", create_product_analysis),
-        ("Customer Cohort Analysis", create_customer_cohort),
-        ("Executive Dashboard", create_sales_dashboard)
-    ]
+    cleaning_report = {}
+    # Chart inputs computed from the cleaned lines, when a run has them
+    line_views = {}
+    if args.stream:
+        # Fold bounded chunks straight into the rollup
+        with span('ingest', mode='stream') as stage:
+            rollup = stream_rollup(args.data, chunksize=args.chunksize, report=cleaning_report)
+        print_stage(stage, "Streaming Ingest",
+                    extra=[('Chunks', cleaning_report['chunks'])] + format_cleaning_report(cleaning_report))
+    elif args.incremental:
+        # Merge only the rows beyond the last watermark into the stored rollup
+        with span('ingest', mode='incremental') as stage:
+            raw, load_info = load_raw_data(args.data, rebuild=args.rebuild_cache)
+            rollup, state = incremental.incremental_update(raw, args.state_dir, report=cleaning_report)
+        print_stage(stage, "Incremental Ingest",
+                    extra=format_load_info(load_info) + format_cleaning_report(cleaning_report)
+                    + [('Watermark', f"{state['watermark']['invoice_date']} / {state['watermark']['invoice_no']}")])
+    else:
+        load_info = {}
+        with span('ingest', mode='full') as stage:
+            df = load_data(args.data, rebuild_cache=args.rebuild_cache, load_info=load_info,
+                           cleaning_report=cleaning_report)
+        print_stage(stage, "Data Loading",
+                    extra=format_load_info(load_info) + format_cleaning_report(cleaning_report))
+        
+        # One aggregation pass shared by every chart
+        with span('aggregate') as stage:
+            rollup = SalesRollup.from_frame(df, workers=args.agg_workers)
+        print_stage(stage, "Aggregation",
+                    extra=[('Cube Cells', f'{len(rollup.cube):,}'), ('Invoices', f'{len(rollup.invoices):,}')])
+        line_views['basket_pairs'] = lambda: basket_pairs(df, args.basket_support, args.basket_memory_mb)
+    
+    chart_inputs = {}
+    def chart_input_of(key):
+        if key not in chart_inputs:
+            chart_inputs[key] = line_views[key]() if key in line_views else getattr(rollup, key)()
+        return chart_inputs[key]
+    charts = VISUALIZATIONS + [chart for chart in LINE_VISUALIZATIONS if chart[2] in line_views]
     
     print("\n2. Generating Visualizations...")
-    for name, func in tqdm(visualizations, desc="Creating Plots"):
+    formats = tuple(args.formats.split(','))
+    # Charts whose data and spec hash to the cached key are not rebuilt
+    cache = FigureCache(FIGURE_CACHE_DIR)
+    chart_keys = {}
+    tasks = []
+    generated = 0
+    for name, filename, key, build_figure in charts:
         try:
-            start_time = time.time()
-            func(df)
-            print(f"\n✓ {name} completed in {time.time() - start_time:.2f} seconds")
+            with span(f'aggregate:{key}'):
+                chart_input = chart_input_of(key)
+            chart_key = cache.key(chart_input, figure_spec(build_figure, formats))
         except Exception as e:
             print(f"\n✗ Error generating {name}: {str(e)}")
+            continue
+        outputs = [f'visualizations/{filename}.{fmt}' for fmt in formats]
+        if not args.no_figure_cache and cache.lookup(filename, chart_key, outputs):
+            generated += 1
+            print(f"\n- {name} unchanged, served from figure cache")
+            continue
+        cache.stats[filename] = 'miss'
+        chart_keys[filename] = chart_key
+        tasks.append((name, filename, build_figure, chart_input))
+    
+    if args.compare_parallel:
+        workers = max(args.workers, 2)
+        for label, n_workers in (("Serial", 1), (f"Parallel ({workers} workers)", workers)):
+            start_time = time.time()
+            list(render_charts(tasks, n_workers, formats))
+            print(f"\n{label} rendering: {time.time() - start_time:.2f} seconds")
+    
+    with span('render', charts=len(tasks), workers=args.workers):
+        for name, filename, saved, seconds, error in render_charts(tasks, args.workers, formats):
+            if error is not None:
+                print(f"\n✗ Error generating {name}: {str(error)}")
+                continue
+            if saved:
+                # Only successfully written charts enter the cache, so failures are retried
+                cache.store(filename, chart_keys[filename], [f'visualizations/{filename}.{fmt}' for fmt in formats])
+            generated += saved
+            print(f"\n✓ {name} completed in {seconds:.2f} seconds")
+    # Charts no longer produced, and blobs of superseded keys, are evicted
+    cache.evict(keep={filename for _, filename, _, _ in VISUALIZATIONS + LINE_VISUALIZATIONS})
+    
+    if args.bundle:
+        # plotly.js is inlined once and shared by all charts, so the page works offline
+        with span('bundle'):
+            figures = [(name, build_figure(chart_input_of(key))) for name, _, key, build_figure in charts]
+            sizes = write_bundle(figures, args.bundle, compress=('gz', 'br'))
+        for path, size in sizes.items():
+            print(f"Bundle written: {path} ({size:,} bytes)")
+    
+    if args.incremental:
+        with span('save_state'):
+            incremental.save_state(rollup, state['watermark'], args.state_dir)
     
     # Final summary
     total_time = time.time() - total_start
     print(f"\nTotal Processing Time: {total_time:.2f} seconds")
-    print(f"Visualizations Generated: {len(visualizations)}")
+    print(f"Visualizations Generated: {generated} of {len(charts)}")
+    print("\n".join(cache.summary()))
+    print("\nStage Profile:")
+    print("\n".join(tracer.summary()))
+    for record in tracer.spans:
+        if 'profile' in record['args']:
+            print(f"Profile of {record['name']} written to {record['args']['profile']}")
+    if args.trace:
+        print(f"Trace written to {tracer.write_trace(args.trace)} (open in chrome://tracing or Perfetto)")
+    profiling.disable()
     print("\nAll visualizations have been saved in the 'visualizations' folder!")
 
 if __name__ == "__main__":
@@ -111,6 +111,14 @@ def add_paragraph_with_style(doc, text, style='Normal'):
     font.size = Pt(11)
     return p
 
+def chart_image(plotly_name, matplotlib_name):
+    """Prefer the PNG exported from the Plotly figure; fall back to the matplotlib PNG"""
+    for path in (os.path.join('visualizations', f'{plotly_name}.png'),
+                 os.path.join('workingcode', f'{matplotlib_name}.png')):
+        if os.path.exists(path):
+            return path
+    return None
+
 # Create a new document
 doc = Document()
 
@@ -202,8 +210,9 @@ add_paragraph_with_style(doc, 'The following charts were created to address this
 
 # Monthly Sales Trends (Invoice Date vs. Sales)
 add_heading_with_style(doc, 'Monthly Sales Trends (Invoice Date vs. Sales)', 2)
-if os.path.exists(os.path.join('workingcode', 'monthly_sales_trends.png')):
-    doc.add_picture(os.path.join('workingcode', 'monthly_sales_trends.png'), width=Inches(6))
+image = chart_image('monthly_sales_performance', 'monthly_sales_trends')
+if image:
+    doc.add_picture(image, width=Inches(6))
     add_paragraph_with_style(doc, (
         'A line chart was chosen to represent monthly sales trends because it clearly illustrates changes in sales over time, making it easy to spot patterns and trends. '
         'The line chart is particularly effective for time-series data, enabling non-technical stakeholders to quickly understand seasonal peaks and troughs.\n'
@@ -218,8 +227,9 @@ else:
 
 # Country-wise Sales Distribution (Country vs. Sales)
 add_heading_with_style(doc, 'Country-wise Sales Distribution (Country vs. Sales)', 2)
-if os.path.exists(os.path.join('workingcode', 'sales_by_country.png')):
-    doc.add_picture(os.path.join('workingcode', 'sales_by_country.png'), width=Inches(6))
+image = chart_image('country_sales_distribution', 'sales_by_country')
+if image:
+    doc.add_picture(image, width=Inches(6))
     add_paragraph_with_style(doc, (
         'A bar chart was chosen for country-wise sales distribution because it is ideal for comparing sales across discrete categories (countries). '
         'Bar charts are intuitive and familiar, making them accessible to non-technical audiences.\n'
@@ -243,8 +253,9 @@ add_paragraph_with_style(doc, 'The dashboard includes the following visualizatio
 
 # Dashboard: Monthly Sales Trends
 add_heading_with_style(doc, 'Dashboard: Monthly Sales Trends', 2)
-if os.path.exists(os.path.join('workingcode', 'monthly_sales_trends.png')):
-    doc.add_picture(os.path.join('workingcode', 'monthly_sales_trends.png'), width=Inches(6))
+image = chart_image('monthly_sales_performance', 'monthly_sales_trends')
+if image:
+    doc.add_picture(image, width=Inches(6))
     add_paragraph_with_style(doc, (
         'This dashboard component allows management to monitor monthly sales trends at a glance. The interactive (original) version enables filtering and closer inspection of peak periods, supporting timely business decisions. The chart is clear and concise, with a focus on actionable insights.'
     ))
@@ -253,8 +264,9 @@ else:
 
 # Dashboard: Best-selling Products
 add_heading_with_style(doc, 'Dashboard: Best-selling Products', 2)
-if os.path.exists(os.path.join('workingcode', 'top_products.png')):
-    doc.add_picture(os.path.join('workingcode', 'top_products.png'), width=Inches(6))
+image = chart_image('top_products_analysis', 'top_products')
+if image:
+    doc.add_picture(image, width=Inches(6))
     add_paragraph_with_style(doc, (
         'This bar chart displays the best-selling products, helping management identify which items drive the most revenue. The clean layout and color-coding make it easy to compare product performance. Such insights are critical for inventory planning and targeted marketing.'
     ))
@@ -263,8 +275,9 @@ else:
 
 # Dashboard: Sales by Country
 add_heading_with_style(doc, 'Dashboard: Sales by Country', 2)
-if os.path.exists(os.path.join('workingcode', 'sales_by_country.png')):
-    doc.add_picture(os.path.join('workingcode', 'sales_by_country.png'), width=Inches(6))
+image = chart_image('country_sales_distribution', 'sales_by_country')
+if image:
+    doc.add_picture(image, width=Inches(6))
     add_paragraph_with_style(doc, (
         'This dashboard chart provides a breakdown of sales by country, reaffirming the UK’s leading position and highlighting other key markets. The functional design enables quick comparison and supports strategic planning for market expansion.'
     ))
@@ -272,9 +285,10 @@ else:
     add_paragraph_with_style(doc, '[Visualization not available: Sales by Country]', style='Normal')
 
 # (Optional) Add any additional dashboard charts
-if os.path.exists(os.path.join('workingcode', 'customer_analysis.png')):
+image = chart_image('customer_cohort_analysis', 'customer_analysis')
+if image:
     add_heading_with_style(doc, 'Dashboard: Customer Cohort Analysis', 2)
-    doc.add_picture(os.path.join('workingcode', 'customer_analysis.png'), width=Inches(6))
+    doc.add_picture(image, width=Inches(6))
     add_paragraph_with_style(doc, 'This visualization explores customer retention and cohort behavior, helping to understand loyalty and repeat purchase patterns.')
 if os.path.exists(os.path.join('workingcode', 'seasonal_analysis.png')):
     add_heading_with_style(doc, 'Dashboard: Seasonal Analysis', 2)
@@ -0,0 +1,205 @@
+import argparse
+import base64
+import glob
+import gzip
+import html
+import json
+import os
+
+import numpy as np
+
+try:
+    import brotli
+except ImportError:  # optional: .br output is skipped without it
+    brotli = None
+
+# Numeric arrays shorter than this stay plain JSON lists
+MIN_TYPED_LENGTH = 8
+DEFAULT_CONFIG = {'responsive': True, 'displayModeBar': False, 'staticPlot': False}
+
+# Turns {"__typed__": dtype, "data": base64, "shape": [rows, cols]} back into typed arrays
+DECODER_JS = """
+function decodeTyped(value) {
+  if (Array.isArray(value)) { return value.map(decodeTyped); }
+  if (value === null || typeof value !== 'object') { return value; }
+  if (value.__typed__) {
+    var raw = atob(value.data), bytes = new Uint8Array(raw.length);
+    for (var i = 0; i < raw.length; i++) { bytes[i] = raw.charCodeAt(i); }
+    var Ctor = {f8: Float64Array, f4: Float32Array, i4: Int32Array, i2: Int16Array, i1: Int8Array}[value.__typed__];
+    var array = new Ctor(bytes.buffer);
+    if (!value.shape) { return array; }
+    var rows = [];
+    for (var r = 0; r < value.shape[0]; r++) {
+      rows.push(array.subarray(r * value.shape[1], (r + 1) * value.shape[1]));
+    }
+    return rows;
+  }
+  var out = {};
+  for (var key in value) { out[key] = decodeTyped(value[key]); }
+  return out;
+}
+"""
+
+
+def _is_number(value):
+    return value is None or (isinstance(value, (int, float)) and not isinstance(value, bool))
+
+
+def _typed(values, shape=None):
+    """Encode a numeric array with the narrowest lossless dtype as base64"""
+    array = np.asarray(values, dtype=np.float64)
+    if not np.isnan(array).any() and np.array_equal(array, np.round(array)):
+        for code, dtype in (('i1', np.int8), ('i2', np.int16), ('i4', np.int32)):
+            info = np.iinfo(dtype)
+            if array.size == 0 or (array.min() >= info.min and array.max() <= info.max):
+                array = array.astype(dtype)
+                break
+        else:
+            code = 'f8'
+    elif np.array_equal(array.astype(np.float32).astype(np.float64), array, equal_nan=True):
+        code, array = 'f4', array.astype(np.float32)
+    else:
+        code = 'f8'
+    encoded = {'__typed__': code, 'data': base64.b64encode(array.tobytes()).decode('ascii')}
+    if shape is not None:
+        encoded['shape'] = list(shape)
+    return encoded
+
+
+def encode_arrays(value):
+    """Replace numeric lists (1-D, or rectangular 2-D such as heatmap z) with typed-array encodings"""
+    if isinstance(value, dict):
+        return {key: encode_arrays(item) for key, item in value.items()}
+    if not isinstance(value, list):
+        return value
+    if len(value) >= MIN_TYPED_LENGTH and all(_is_number(item) for item in value):
+        return _typed([np.nan if item is None else item for item in value])
+    if (value and all(isinstance(row, list) for row in value)
+            and len({len(row) for row in value}) == 1
+            and len(value) * len(value[0]) >= MIN_TYPED_LENGTH
+            and all(_is_number(item) for row in value for item in row)):
+        flat = [np.nan if item is None else item for row in value for item in row]
+        return _typed(flat, shape=(len(value), len(value[0])))
+    return [encode_arrays(item) for item in value]
+
+
+def figure_payload(fig):
+    """Plain ``{'data', 'layout'}`` dict of a plotly figure (or an already extracted payload)"""
+    if isinstance(fig, dict):
+        return fig
+    return json.loads(fig.to_json())
+
+
+def figures_from_html(path):
+    """Extract the ``Plotly.newPlot`` payloads embedded in a plotly-written HTML file"""
+    with open(path, encoding='utf-8') as fh:
+        text = fh.read()
+    decoder = json.JSONDecoder()
+    payloads = []
+    start = text.find('Plotly.newPlot(')
+    while start != -1:
+        position = start + len('Plotly.newPlot(')
+        args = []
+        try:
+            for _ in range(3):
+                while text[position] in ' \t\r\n,':
+                    position += 1
+                arg, position = decoder.raw_decode(text, position)
+                args.append(arg)
+        except (ValueError, IndexError):
+            # Not a JSON call (e.g. inside the inlined plotly.js source)
+            args = []
+        if len(args) == 3:
+            payloads.append({'data': args[1], 'layout': args[2]})
+        start = text.find('Plotly.newPlot(', position)
+    return payloads
+
+
+def build_bundle(figures, title='Sales Dashboard', config=None):
+    """Render ``(heading, figure)`` pairs into one self-contained HTML page"""
+    from plotly.offline import get_plotlyjs
+
+    config = DEFAULT_CONFIG if config is None else config
+    sections, calls = [], []
+    for index, (heading, fig) in enumerate(figures):
+        payload = figure_payload(fig)
+        spec = {'data': encode_arrays(payload.get('data', [])), 'layout': payload.get('layout', {})}
+        sections.append(f'<section><h2>{html.escape(heading)}</h2><div id="chart-{index}"></div></section>')
+        # '</' inside JSON strings would end the script element early
+        spec_json = json.dumps(spec, separators=(',', ':')).replace('</', '<\\/')
+        calls.append(f'draw("chart-{index}", {spec_json});')
+    return '\n'.join([
+        '<!DOCTYPE html>',
+        '<html><head><meta charset="utf-8">',
+        f'<title>{html.escape(title)}</title>',
+        f'<script type="text/javascript">{get_plotlyjs()}</script>',
+        '</head><body>',
+        f'<h1>{html.escape(title)}</h1>',
+        *sections,
+        '<script type="text/javascript">',
+        DECODER_JS,
+        f'var CONFIG = {json.dumps(config)};',
+        'function draw(id, spec) { Plotly.newPlot(id, decodeTyped(spec.data), spec.layout, CONFIG); }',
+        *calls,
+        '</script>',
+        '</body></html>',
+    ])
+
+
+def write_bundle(figures, path, title='Sales Dashboard', compress=('gz',)):
+    """Write the bundle and optional ``.gz``/``.br`` precompressed copies; returns ``{path: bytes}``"""
+    content = build_bundle(figures, title).encode('utf-8')
+    with open(path, 'wb') as fh:
+        fh.write(content)
+    sizes = {path: len(content)}
+    for method in compress:
+        if method == 'gz':
+            data = gzip.compress(content, compresslevel=9)
+        elif method == 'br':
+            if brotli is None:
+                print("brotli is not installed; skipping .br output")
+                continue
+            data = brotli.compress(content, quality=11)
+        else:
+            raise ValueError(f"Unknown compression: {method}")
+        with open(f'{path}.{method}', 'wb') as fh:
+            fh.write(data)
+        sizes[f'{path}.{method}'] = len(data)
+    return sizes
+
+
+def compare_sizes(html_paths, sizes):
+    """Compare the existing per-chart HTML files with the bundle outputs as ``(label, value)`` pairs"""
+    from plotly.offline import get_plotlyjs
+
+    plotlyjs = len(get_plotlyjs())
+    fragments = sum(os.path.getsize(path) for path in html_paths)
+    # Files written with include_plotlyjs='cdn' are far smaller than plotly.js and fetch it on load
+    needs_cdn = any(os.path.getsize(path) < plotlyjs for path in html_paths)
+    rows = [
+        ('Chart files', len(html_paths)),
+        ('Chart files total', f'{fragments:,} bytes'),
+        ('Chart files + CDN plotly.js', f'{fragments + plotlyjs * needs_cdn:,} bytes'),
+    ]
+    for path, size in sizes.items():
+        rows.append((os.path.basename(path), f'{size:,} bytes'))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Bundle the chart HTML files into one offline dashboard')
+    parser.add_argument('--source', default='visualizations', help='Directory of plotly-written HTML files')
+    parser.add_argument('--output', default='sales_dashboard_bundle.html')
+    parser.add_argument('--title', default='Sales Dashboard')
+    parser.add_argument('--compress', default='gz,br', help="Comma-separated list of 'gz', 'br' or ''")
+    args = parser.parse_args()
+
+    html_paths = sorted(path for path in glob.glob(os.path.join(args.source, '*.html'))
+                        if os.path.abspath(path) != os.path.abspath(args.output))
+    figures = []
+    for path in html_paths:
+        heading = os.path.splitext(os.path.basename(path))[0].replace('_', ' ').title()
+        figures.extend((heading, payload) for payload in figures_from_html(path))
+    sizes = write_bundle(figures, args.output, args.title, [m for m in args.compress.split(',') if m])
+    for label, value in compare_sizes(html_paths, sizes):
+        print(f"{label}: {value}")
@@ -0,0 +1,113 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_cleaning import clean_transactions
+from rfm import RFM_FILE, CustomerRFM
+from rollup import SalesRollup
+
+STATE_DIR = '.retail_state'
+
+
+def invoice_order(invoice_nos):
+    """``(number, prefix)`` of invoice numbers such as '581587' or 'C581490', the order they are issued in"""
+    parts = pd.Series(invoice_nos, dtype=object).astype(str).str.extract(r'^(\D*)(\d*)')
+    return pd.to_numeric(parts[1], errors='coerce').fillna(-1).to_numpy(), parts[0].to_numpy(dtype=str)
+
+
+def compute_watermark(df, previous=None):
+    """Return the last InvoiceDate seen in the raw rows and every invoice at that timestamp.
+
+    ``previous`` (the watermark the rows were selected with) is carried
+    over when the timestamp did not advance, so invoices ingested by
+    earlier runs at that timestamp stay listed.
+    """
+    last_date = df['InvoiceDate'].max()
+    invoice_nos = set(df.loc[df['InvoiceDate'] == last_date, 'InvoiceNo'].astype(str))
+    if previous is not None and pd.Timestamp(previous['invoice_date']) == last_date:
+        invoice_nos.update(previous.get('invoice_nos', [previous['invoice_no']]))
+    invoice_nos = sorted(invoice_nos)
+    numbers, prefixes = invoice_order(invoice_nos)
+    ordered = [invoice_nos[i] for i in np.lexsort((prefixes, numbers))]
+    return {'invoice_date': last_date.isoformat(), 'invoice_no': ordered[-1], 'invoice_nos': ordered}
+
+
+def rows_after(df, watermark):
+    """Raw rows not yet ingested: later than the watermark timestamp, or at it and not listed in it"""
+    if watermark is None:
+        return df
+    last_date = pd.Timestamp(watermark['invoice_date'])
+    dates = df['InvoiceDate']
+    newer = (dates > last_date).to_numpy()
+    same_date = (dates == last_date).to_numpy()
+    if same_date.any():
+        # InvoiceNo is only compared on the few rows sharing the watermark timestamp
+        invoice_nos = df['InvoiceNo'].to_numpy()[same_date].astype(str)
+        if 'invoice_nos' in watermark:
+            # Late arrivals at that timestamp are kept whatever their number
+            newer[same_date] = ~np.isin(invoice_nos, watermark['invoice_nos'])
+        else:
+            # Watermarks saved before the invoice list: order ties the way invoices are issued
+            numbers, prefixes = invoice_order(invoice_nos)
+            (last_number,), (last_prefix,) = invoice_order([watermark['invoice_no']])
+            newer[same_date] = (numbers > last_number) | ((numbers == last_number) & (prefixes > last_prefix))
+    return df[newer]
+
+
+def load_state(state_dir=STATE_DIR):
+    """Return ``(rollup, state)`` from a previous run, or ``(None, None)``"""
+    state_path = os.path.join(state_dir, 'state.json')
+    if not os.path.exists(state_path):
+        return None, None
+    with open(state_path) as fh:
+        state = json.load(fh)
+    return SalesRollup.load(state_dir), state
+
+
+def load_rfm(state_dir, rollup):
+    """Stored RFM customer state, or one rebuilt from ``rollup`` for states saved without it"""
+    if os.path.exists(os.path.join(state_dir, RFM_FILE)):
+        return CustomerRFM.load(state_dir)
+    return rollup.customer_rfm() if rollup is not None else None
+
+
+def save_state(rollup, watermark, state_dir=STATE_DIR):
+    """Persist the merged rollup, its RFM customer state and the watermark"""
+    rollup.save(state_dir)
+    rollup.customer_rfm().save(state_dir)
+    state_path = os.path.join(state_dir, 'state.json')
+    with open(state_path + '.tmp', 'w') as fh:
+        json.dump({'watermark': watermark}, fh, indent=2)
+    os.replace(state_path + '.tmp', state_path)
+
+
+def incremental_update(raw, state_dir=STATE_DIR, report=None):
+    """Fold only the raw rows beyond the stored watermark into the stored rollup.
+
+    Returns ``(rollup, state)`` where ``state`` holds the new watermark.
+    Distinct customers and cohort months stay exact because the rollup keeps
+    one row per (invoice, customer) and merges them by key. The RFM customer
+    state is refreshed the same way, from the new rows only.
+    """
+    stored, state = load_state(state_dir)
+    watermark = state['watermark'] if state else None
+    new_rows = rows_after(raw, watermark)
+
+    rollup = stored
+    rfm = load_rfm(state_dir, stored)
+    if len(new_rows):
+        cleaned = clean_transactions(new_rows, report=report)
+        if len(cleaned):
+            delta = SalesRollup.from_frame(cleaned)
+            rollup = delta if stored is None else stored.merge(delta)
+            delta_rfm = CustomerRFM.from_frame(cleaned)
+            rfm = delta_rfm if rfm is None else rfm.merge(delta_rfm)
+        watermark = compute_watermark(new_rows, watermark)
+    elif report is not None:
+        report.update(rows_in=0, rows_out=0, rows_dropped={})
+    if rollup is None:
+        raise ValueError('No rows to aggregate')
+    rollup.use_customer_rfm(rfm)
+    return rollup, {'watermark': watermark}
@@ -0,0 +1,170 @@
+import argparse
+import math
+import time
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from profiling import MB, span
+
+DEFAULT_MIN_SUPPORT = 0.01
+DEFAULT_MEMORY_MB = 256
+SORT_KEYS = ('lift', 'support', 'confidence')
+# Bytes one candidate pair costs while a block of the co-occurrence product is
+# formed (index and count, plus scipy's scratch copies during the product)
+BYTES_PER_PAIR = 24
+
+
+def incidence_matrix(df, item='Description'):
+    """Binary invoice x item matrix (CSR) of the cleaned lines, plus the item label of each column"""
+    invoice_codes, _ = pd.factorize(df['InvoiceNo'])
+    item_codes, labels = pd.factorize(df[item])
+    valid = (invoice_codes >= 0) & (item_codes >= 0)
+    rows, columns = invoice_codes[valid], item_codes[valid]
+    matrix = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, columns)),
+                               shape=(int(invoice_codes.max(initial=-1)) + 1, len(labels)))
+    # A product listed twice on one invoice still counts once
+    matrix.sum_duplicates()
+    matrix.data[:] = 1
+    return matrix, np.asarray(labels, dtype=object)
+
+
+def column_blocks(matrix, memory_limit_mb=DEFAULT_MEMORY_MB):
+    """Split the columns into ranges whose share of ``matrix.T @ matrix`` fits the memory ceiling.
+
+    Column j of the product touches every item of every basket holding
+    item j, so its candidate pairs number at most the sum of those basket
+    sizes. Ranges are cut where that running total would pass the budget;
+    a single column is never split, so one very common item may exceed it.
+    """
+    basket_sizes = np.diff(matrix.indptr).astype(np.int64)
+    work = np.asarray(matrix.T @ basket_sizes).ravel()
+    budget = max(1, int(memory_limit_mb * MB // BYTES_PER_PAIR))
+    blocks, start, total = [], 0, 0
+    for column, cost in enumerate(work):
+        if total and total + cost > budget:
+            blocks.append((start, column))
+            start, total = column, 0
+        total += cost
+    if start < len(work):
+        blocks.append((start, len(work)))
+    return blocks, int(work.sum())
+
+
+def pair_counts(matrix, min_count=1, memory_limit_mb=DEFAULT_MEMORY_MB, report=None):
+    """Invoices holding both items, for every item pair (a < b) seen on at least ``min_count`` invoices.
+
+    The co-occurrence matrix ``matrix.T @ matrix`` is formed one column
+    block at a time (see :func:`column_blocks`) and pruned to the upper
+    triangle at or above ``min_count`` before the next block, so peak
+    memory follows ``memory_limit_mb`` rather than the full product.
+    """
+    blocks, candidates = column_blocks(matrix, memory_limit_mb)
+    transposed = matrix.T.tocsr()
+    by_column = matrix.tocsc()
+    firsts, seconds, counts = [], [], []
+    for start, stop in blocks:
+        with span('basket:block', columns=stop - start):
+            block = (transposed @ by_column[:, start:stop]).tocoo()
+            second = block.col + start
+            keep = (block.row < second) & (block.data >= min_count)
+            firsts.append(block.row[keep])
+            seconds.append(second[keep])
+            counts.append(block.data[keep])
+            del block
+    if report is not None:
+        report.update(blocks=len(blocks), candidate_pairs=candidates,
+                      candidate_mb=candidates * BYTES_PER_PAIR / MB)
+    if not blocks:
+        return (np.zeros(0, dtype=np.int32),) * 3
+    return np.concatenate(firsts), np.concatenate(seconds), np.concatenate(counts)
+
+
+def association_pairs(df, item='Description', min_support=DEFAULT_MIN_SUPPORT, top=50, sort_by='lift',
+                      memory_limit_mb=DEFAULT_MEMORY_MB, report=None):
+    """Most strongly associated product pairs with their support, confidence and lift.
+
+    Support is the share of invoices holding both items, confidence A->B
+    the share of invoices with A that also hold B, and lift the ratio of
+    the pair's support to what independent items would give. Items below
+    ``min_support`` are dropped before any pair is counted (a pair is
+    never more frequent than either of its items). ``report`` receives the
+    basket, item and pair counts and the memory the naive self-join of
+    invoice lines would have needed.
+    """
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key: {sort_by}")
+    with span('basket:incidence', rows=len(df)):
+        matrix, labels = incidence_matrix(df, item)
+        basket_sizes = np.diff(matrix.indptr).astype(np.int64)
+        n_baskets = int(np.count_nonzero(basket_sizes))
+        item_counts = np.asarray(matrix.sum(axis=0)).ravel()
+        min_count = max(1, math.ceil(min_support * n_baskets))
+        frequent = np.flatnonzero(item_counts >= min_count)
+        matrix = matrix.tocsc()[:, frequent].tocsr()
+    stats = {}
+    with span('basket:pairs', items=len(frequent)):
+        first, second, count = pair_counts(matrix, min_count, memory_limit_mb, stats)
+
+    count_a, count_b = item_counts[frequent][first], item_counts[frequent][second]
+    count = count.astype(np.float64)
+    pairs = pd.DataFrame({
+        'ItemA': labels[frequent][first],
+        'ItemB': labels[frequent][second],
+        'Invoices': count.astype(np.int64),
+        'Support': count / max(n_baskets, 1),
+        'ConfidenceAB': count / count_a,
+        'ConfidenceBA': count / count_b,
+        'Lift': count * n_baskets / (count_a.astype(np.float64) * count_b),
+    })
+    if sort_by == 'confidence':
+        order = np.maximum(pairs['ConfidenceAB'], pairs['ConfidenceBA'])
+    else:
+        order = pairs['Lift' if sort_by == 'lift' else 'Support']
+    pairs = pairs.iloc[np.argsort(-order.to_numpy(), kind='stable')[:top]].reset_index(drop=True)
+
+    if report is not None:
+        report.update(stats)
+        report.update(
+            baskets=n_baskets,
+            items=len(labels),
+            frequent_items=len(frequent),
+            min_count=min_count,
+            pairs=len(first),
+            # Rows of a line-level self-join on InvoiceNo: every ordered pair within each basket
+            self_join_rows=int((basket_sizes ** 2).sum()),
+        )
+    return pairs
+
+
+if __name__ == "__main__":
+    from data_cleaning import clean_transactions
+    from data_loader import DATA_FILE, read_retail_data
+    from synthetic_data import generate_transactions, parse_rows
+
+    parser = argparse.ArgumentParser(description='Frequently bought together: product pairs by support, confidence and lift')
+    parser.add_argument('--data', default=DATA_FILE, help='Source workbook or CSV')
+    parser.add_argument('--rows', help='Use this many synthetic rows instead of --data, e.g. 1M')
+    parser.add_argument('--item', choices=('Description', 'StockCode'), default='Description')
+    parser.add_argument('--min-support', type=float, default=DEFAULT_MIN_SUPPORT)
+    parser.add_argument('--memory-mb', type=float, default=DEFAULT_MEMORY_MB,
+                        help='Memory ceiling for one block of the co-occurrence product')
+    parser.add_argument('--sort', choices=SORT_KEYS, default='lift')
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    raw = generate_transactions(parse_rows(args.rows)) if args.rows else read_retail_data(args.data)
+    cleaned = clean_transactions(raw)
+    report = {}
+    start = time.perf_counter()
+    pairs = association_pairs(cleaned, args.item, args.min_support, args.top, args.sort, args.memory_mb, report)
+    print(f"{report['baskets']:,} baskets, {report['frequent_items']:,} of {report['items']:,} items at "
+          f"support >= {args.min_support:g} ({report['min_count']:,} invoices)")
+    print(f"{report['pairs']:,} frequent pairs from {report['candidate_pairs']:,} candidates in "
+          f"{report['blocks']} block(s) under {args.memory_mb:g} MB, {time.perf_counter() - start:.2f}s")
+    print(f"A line-level self-join would have produced {report['self_join_rows']:,} rows")
+    pd.set_option('display.width', 160)
+    pd.set_option('display.max_colwidth', 40)
+    print()
+    print(pairs.round(4).to_string())
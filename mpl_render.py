@@ -0,0 +1,105 @@
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+from matplotlib.figure import Figure
+
+LAYOUTS = ('tight', 'fixed')
+REPORT_DPIS = (150, 300)
+
+# Template figures of this process, created once and cleared between charts
+_templates = {}
+
+
+def template_axes(name, template):
+    """The reusable ``(figure, axes)`` of a template, cleared for the next chart.
+
+    ``template`` holds the ``figsize`` and the subplot ``margins`` used by
+    the fixed layout. Figures are built with the style active in this
+    process when they are first requested, and never go through pyplot,
+    so no figure manager or GUI backend is involved.
+    """
+    if name not in _templates:
+        figure = Figure(figsize=template['figsize'])
+        axes = figure.add_subplot()
+        figure.subplots_adjust(**template['margins'])
+        _templates[name] = (figure, axes)
+    figure, axes = _templates[name]
+    axes.clear()
+    return figure, axes
+
+
+def render_png(job):
+    """Draw one chart job on its template and save it; returns its path, render seconds and size.
+
+    A job is a dict with ``plot`` (called as ``plot(ax, data)``), ``data``,
+    ``path``, ``template`` (name and spec), ``dpi`` and ``layout``. The
+    ``tight`` layout crops to the drawn extent with ``bbox_inches='tight'``,
+    which costs an extra draw pass; ``fixed`` keeps the template margins
+    and draws once.
+    """
+    if job['layout'] not in LAYOUTS:
+        raise ValueError(f"Unknown layout: {job['layout']}")
+    start = time.perf_counter()
+    name, template = job['template']
+    figure, axes = template_axes(name, template)
+    job['plot'](axes, job['data'])
+    figure.savefig(job['path'], dpi=job['dpi'], bbox_inches='tight' if job['layout'] == 'tight' else None)
+    return {'path': job['path'], 'seconds': time.perf_counter() - start, 'bytes': os.path.getsize(job['path'])}
+
+
+def _init_worker(setup):
+    matplotlib.use('Agg')
+    if setup is not None:
+        setup()
+
+
+def render_pngs(jobs, workers=1, setup=None):
+    """Render chart jobs in order, over a pool of Agg worker processes when ``workers`` > 1.
+
+    ``setup`` (a picklable function, e.g. one applying the plot style) runs
+    once per worker before any template is built, or once in this process
+    for a serial run. Results come back in job order.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        if setup is not None:
+            setup()
+        return [render_png(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), initializer=_init_worker,
+                             initargs=(setup,)) as pool:
+        return list(pool.map(render_png, jobs))
+
+
+def render_report(jobs, dpis=REPORT_DPIS, layouts=LAYOUTS, setup=None, output_dir=None):
+    """Render time and PNG size of every job at each dpi and layout.
+
+    Each job is drawn once untimed first so the template figures exist;
+    files go to a temporary directory unless ``output_dir`` is given.
+    """
+    if setup is not None:
+        setup()
+    output_dir = output_dir or tempfile.mkdtemp(prefix='mpl_render_')
+    os.makedirs(output_dir, exist_ok=True)
+    rows = []
+    for job in jobs:
+        render_png(dict(job, path=os.path.join(output_dir, 'warmup.png'), dpi=min(dpis), layout='fixed'))
+    for dpi in dpis:
+        for layout in layouts:
+            for job in jobs:
+                path = os.path.join(output_dir, f'{dpi}_{layout}_{os.path.basename(job["path"])}')
+                result = render_png(dict(job, path=path, dpi=dpi, layout=layout))
+                rows.append({'chart': os.path.basename(job['path']), 'dpi': dpi, 'layout': layout,
+                             'seconds': result['seconds'], 'bytes': result['bytes']})
+    return rows
+
+
+def report_lines(rows):
+    """Report rows as table lines"""
+    lines = [f"{'Chart':<28} {'DPI':>4} {'Layout':>6} {'Render s':>9} {'Size KB':>9}"]
+    for row in rows:
+        lines.append(f"{row['chart']:<28} {row['dpi']:>4} {row['layout']:>6} "
+                     f"{row['seconds']:>9.3f} {row['bytes'] / 1024:>9.1f}")
+    return lines
+
@@ -0,0 +1,195 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from period_keys import period_keys
+from profiling import span
+from rollup import SalesRollup
+from shared_frame import SharedFrame, attach_frame
+
+PARTITIONINGS = ('range', 'hash')
+ROLLUP_COLUMNS = ('InvoiceNo', 'CustomerID', 'Country', 'Description', 'InvoiceDate', 'Sales', 'Quantity')
+
+
+def rollup_columns(df):
+    """The columns the rollup reads, with ``MonthKey`` derived when missing"""
+    columns = {column: df[column] for column in ROLLUP_COLUMNS if column in df.columns}
+    if 'MonthKey' in df.columns:
+        columns['MonthKey'] = df['MonthKey']
+    else:
+        columns['MonthKey'] = np.asarray(period_keys(df['InvoiceDate'])['MonthKey'], dtype=np.int32)
+    return pd.DataFrame(columns, index=df.index, copy=False)
+
+
+def partial_rollup(spec, part, n_parts, partitioning='range'):
+    """Cube cells and (invoice, customer) rows of one partition, keyed by integer codes.
+
+    ``spec`` describes a :class:`shared_frame.SharedFrame` of
+    :func:`rollup_columns`; categorical columns are read as their codes.
+    ``Row`` holds the first row position of every group so the merged
+    tables can be put back in first-appearance order.
+    """
+    frame = attach_frame(spec, categories=False)
+    n_rows = len(frame)
+    if partitioning == 'range':
+        lo, hi = n_rows * part // n_parts, n_rows * (part + 1) // n_parts
+        rows = np.arange(lo, hi)
+        frame = frame.iloc[lo:hi]
+    else:
+        # Every row of an invoice lands in the same partition, so invoices need no merge
+        rows = np.flatnonzero(frame['InvoiceNo'].to_numpy() % n_parts == part)
+        frame = frame.take(rows)
+    columns = {name: frame[name].to_numpy() for name in frame.columns if name != 'CustomerID'}
+    customers = frame['CustomerID'].to_numpy(dtype=np.int64, na_value=-1)
+
+    measures = pd.DataFrame({'Sales': columns['Sales'], 'Quantity': columns['Quantity'], 'Row': rows}, copy=False)
+    cube = (
+        measures.groupby([columns['MonthKey'], columns['Country'], columns['Description']], sort=False)
+        .agg(Sales=('Sales', 'sum'), Quantity=('Quantity', 'sum'), Lines=('Sales', 'size'), Row=('Row', 'min'))
+    )
+    attributes = {'MonthKey': columns['MonthKey'], 'Country': columns['Country'], 'Sales': columns['Sales'], 'Row': rows}
+    aggregations = {'MonthKey': ('MonthKey', 'first'), 'Country': ('Country', 'first')}
+    if 'InvoiceDate' in columns:
+        attributes['InvoiceDate'] = columns['InvoiceDate'].view(np.int64)
+        aggregations['InvoiceDate'] = ('InvoiceDate', 'min')
+    aggregations.update(Sales=('Sales', 'sum'), Row=('Row', 'min'))
+    invoices = (
+        pd.DataFrame(attributes, copy=False)
+        .groupby([columns['InvoiceNo'], customers], sort=False)
+        .agg(**aggregations)
+    )
+    return cube, invoices
+
+
+def _labels(codes, categories):
+    labels = np.asarray(categories, dtype=object).take(codes, mode='clip')
+    labels[codes < 0] = np.nan
+    return labels
+
+
+def merge_partials(partials, labels, quantity_dtype='int32', partitioning='range'):
+    """Reduce partition results into a :class:`SalesRollup` laid out like ``SalesRollup.from_frame``"""
+    cube = pd.concat([cube for cube, _ in partials])
+    cube = (
+        cube.groupby(level=[0, 1, 2], sort=False)
+        .agg(Sales=('Sales', 'sum'), Quantity=('Quantity', 'sum'), Lines=('Lines', 'sum'), Row=('Row', 'min'))
+        .sort_values('Row', kind='stable')
+    )
+    invoices = pd.concat([invoices for _, invoices in partials])
+    if partitioning == 'range':
+        # An invoice cut by a partition boundary keeps the attributes of its earliest part
+        invoices = invoices.sort_values('Row', kind='stable')
+        aggregations = {'MonthKey': ('MonthKey', 'first'), 'Country': ('Country', 'first')}
+        if 'InvoiceDate' in invoices.columns:
+            aggregations['InvoiceDate'] = ('InvoiceDate', 'min')
+        aggregations.update(Sales=('Sales', 'sum'), Row=('Row', 'min'))
+        invoices = invoices.groupby(level=[0, 1], sort=False).agg(**aggregations)
+    invoices = invoices.sort_values('Row', kind='stable')
+
+    month, country, description = (cube.index.get_level_values(level).to_numpy() for level in range(3))
+    cube_table = pd.DataFrame({
+        'MonthKey': month.astype(np.int32),
+        'Country': _labels(country, labels['Country']),
+        'Description': _labels(description, labels['Description']),
+        'Sales': cube['Sales'].to_numpy(),
+        'Quantity': cube['Quantity'].to_numpy().astype(quantity_dtype),
+        'Lines': cube['Lines'].to_numpy(dtype=np.int64),
+    })
+    invoice_no, customer = (invoices.index.get_level_values(level).to_numpy() for level in range(2))
+    invoice_table = {
+        'InvoiceNo': _labels(invoice_no, labels['InvoiceNo']),
+        'CustomerID': pd.array(np.where(customer < 0, None, customer), dtype='Int32'),
+        'MonthKey': invoices['MonthKey'].to_numpy(dtype=np.int32),
+        'Country': _labels(invoices['Country'].to_numpy(), labels['Country']),
+    }
+    if 'InvoiceDate' in invoices.columns:
+        invoice_table['InvoiceDate'] = invoices['InvoiceDate'].to_numpy().view('datetime64[ns]')
+    invoice_table['Sales'] = invoices['Sales'].to_numpy()
+    return SalesRollup(cube_table, pd.DataFrame(invoice_table))
+
+
+def parallel_rollup(df, workers=None, partitioning='range', partitions=None, executor=None):
+    """Build a :class:`SalesRollup` with a partitioned map-reduce over a process pool.
+
+    The columns are copied once into shared memory (a
+    :class:`shared_frame.SharedFrame`); each worker attaches read-only
+    views and aggregates its partition (a row range, or
+    a hash of the invoice code) into partial sums, counts and distinct
+    (invoice, customer) rows. Only those small partials travel back to be
+    merged. The result matches ``SalesRollup.from_frame(df)`` up to
+    floating-point summation order.
+    """
+    if partitioning not in PARTITIONINGS:
+        raise ValueError(f"Unknown partitioning: {partitioning}")
+    workers = workers or os.cpu_count()
+    partitions = partitions or workers
+    with span('aggregate:parallel', workers=workers, partitioning=partitioning):
+        with span('share'):
+            shared = SharedFrame(rollup_columns(df))
+        with shared:
+            pool = executor or ProcessPoolExecutor(max_workers=workers)
+            try:
+                with span('map'):
+                    futures = [pool.submit(partial_rollup, shared.spec, part, partitions, partitioning)
+                               for part in range(partitions)]
+                    partials = [future.result() for future in futures]
+            finally:
+                if executor is None:
+                    pool.shutdown()
+        with span('reduce'):
+            return merge_partials(partials, shared.categories, df['Quantity'].dtype, partitioning)
+
+
+def same_rollup(left, right, rtol=1e-9):
+    """True when two rollups hold the same tables (sums compared with ``rtol``)"""
+    try:
+        pd.testing.assert_frame_equal(left.cube, right.cube, check_exact=False, rtol=rtol)
+        pd.testing.assert_frame_equal(left.invoices, right.invoices, check_exact=False, rtol=rtol)
+    except AssertionError:
+        return False
+    return True
+
+
+def benchmark(df, worker_counts=(1, 2, 4, 8, 16), partitioning='range', repeat=3):
+    """Rollup build time of pandas and of the engine per worker count, with speedups.
+
+    Each pool is started and warmed before timing, so the figures cover
+    sharing, map and reduce but not process start-up.
+    """
+    start = time.perf_counter()
+    for _ in range(repeat):
+        expected = SalesRollup.from_frame(df)
+    baseline = (time.perf_counter() - start) / repeat
+    results = [{'workers': 'pandas', 'seconds': baseline, 'speedup': 1.0, 'same': True}]
+    for workers in worker_counts:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(abs, range(workers)))
+            start = time.perf_counter()
+            for _ in range(repeat):
+                rollup = parallel_rollup(df, workers, partitioning, executor=pool)
+            seconds = (time.perf_counter() - start) / repeat
+        results.append({'workers': workers, 'seconds': seconds, 'speedup': baseline / seconds,
+                        'same': same_rollup(expected, rollup)})
+    return results
+
+
+if __name__ == "__main__":
+    from data_cleaning import clean_transactions
+    from synthetic_data import generate_transactions, parse_rows
+
+    parser = argparse.ArgumentParser(description='Compare the parallel rollup engine with the pandas groupbys')
+    parser.add_argument('--rows', default='1M', help='Synthetic row count, e.g. 1M or 50M')
+    parser.add_argument('--workers', default='1,2,4,8,16', help='Comma-separated worker counts')
+    parser.add_argument('--partitioning', choices=PARTITIONINGS, default='range')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    cleaned = clean_transactions(generate_transactions(parse_rows(args.rows)))
+    print(f"{len(cleaned):,} cleaned rows on {os.cpu_count()} CPUs")
+    for row in benchmark(cleaned, [int(n) for n in args.workers.split(',')], args.partitioning, args.repeat):
+        print(f"{str(row['workers']):>7} workers  {row['seconds']:.3f}s  speedup {row['speedup']:.2f}x  "
+              f"same result: {row['same']}")
@@ -0,0 +1,86 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+# Integer period keys carried by cleaned frames, counted from the Unix epoch.
+# MonthKey equals the ordinal of a monthly pandas Period.
+PERIOD_KEYS = ['DayKey', 'WeekKey', 'MonthKey', 'QuarterKey']
+
+
+def period_keys(dates):
+    """Compute day/week/month/quarter keys from a datetime column with integer arithmetic"""
+    values = np.asarray(dates, dtype='datetime64[ns]')
+    days = values.astype('datetime64[D]').astype(np.int64)
+    months = values.astype('datetime64[M]').astype(np.int64)
+    return {
+        'DayKey': days.astype(np.int32),
+        # 1970-01-01 was a Thursday; shifting by 3 days makes weeks start on Monday
+        'WeekKey': ((days + 3) // 7).astype(np.int32),
+        'MonthKey': months.astype(np.int32),
+        'QuarterKey': (months // 3).astype(np.int32),
+    }
+
+
+def add_period_keys(df, column='InvoiceDate'):
+    """Add the integer period key columns to ``df`` in place"""
+    for name, keys in period_keys(df[column]).items():
+        df[name] = keys
+    return df
+
+
+def month_labels(month_keys):
+    """Format month keys as 'YYYY-MM' (meant for aggregated rows only)"""
+    return pd.PeriodIndex.from_ordinals(np.asarray(month_keys, dtype=np.int64), freq='M').strftime('%Y-%m')
+
+
+def day_labels(day_keys):
+    """Format day keys as 'YYYY-MM-DD'"""
+    return pd.to_datetime(np.asarray(day_keys, dtype=np.int64), unit='D').strftime('%Y-%m-%d')
+
+
+def week_labels(week_keys):
+    """Format week keys as the date of the Monday starting the week"""
+    return day_labels(np.asarray(week_keys, dtype=np.int64) * 7 - 3)
+
+
+def quarter_labels(quarter_keys):
+    """Format quarter keys as 'YYYYQn'"""
+    return pd.PeriodIndex.from_ordinals(np.asarray(quarter_keys, dtype=np.int64), freq='Q').astype(str)
+
+
+def calendar_month(month_keys):
+    """Calendar month number (1-12) of month keys"""
+    return np.asarray(month_keys) % 12 + 1
+
+
+def compare_month_columns(df, repeat=5):
+    """Compare memory and groupby time of strftime month labels against MonthKey"""
+    results = {}
+    start = time.perf_counter()
+    labels = df['InvoiceDate'].dt.strftime('%Y-%m')
+    results['label_build_seconds'] = time.perf_counter() - start
+    start = time.perf_counter()
+    keys = pd.Series(period_keys(df['InvoiceDate'])['MonthKey'], index=df.index)
+    results['key_build_seconds'] = time.perf_counter() - start
+    results['label_memory_mb'] = labels.memory_usage(deep=True, index=False) / (1024 * 1024)
+    results['key_memory_mb'] = keys.memory_usage(deep=True, index=False) / (1024 * 1024)
+    for name, column in (('label', labels), ('key', keys)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            df['Sales'].groupby(column).sum()
+        results[f'{name}_groupby_seconds'] = (time.perf_counter() - start) / repeat
+    return results
+
+
+if __name__ == "__main__":
+    from data_cleaning import clean_transactions
+    from data_loader import DATA_FILE, read_retail_data
+
+    parser = argparse.ArgumentParser(description='Measure string month labels against integer month keys')
+    parser.add_argument('--data', default=DATA_FILE, help='Path to the source workbook or CSV export')
+    args = parser.parse_args()
+    cleaned = clean_transactions(read_retail_data(args.data))
+    for key, value in compare_month_columns(cleaned).items():
+        print(f"{key}: {value:.4f}")
@@ -0,0 +1,305 @@
+import argparse
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+import psutil
+
+try:
+    import resource
+except ImportError:  # not available on Windows; peak RSS falls back to psutil
+    resource = None
+
+MB = 1024 * 1024
+PROFILERS = ('cprofile', 'pyinstrument')
+
+
+def peak_rss():
+    """High-water mark of the process resident set size in bytes"""
+    if resource is not None:
+        # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if os.uname().sysname == 'Darwin' else maxrss * 1024
+    memory = psutil.Process().memory_info()
+    return getattr(memory, 'peak_wset', memory.rss)
+
+
+def _start_profiler(profiler):
+    if profiler == 'pyinstrument':
+        from pyinstrument import Profiler
+        instance = Profiler()
+        instance.start()
+        return instance
+    if profiler != 'cprofile':
+        raise ValueError(f"Unknown profiler: {profiler}")
+    instance = cProfile.Profile()
+    instance.enable()
+    return instance
+
+
+def _stop_profiler(instance, profiler, path_base):
+    """Stop a profiler and write its report; returns the report path"""
+    if profiler == 'pyinstrument':
+        instance.stop()
+        path = f'{path_base}.html'
+        with open(path, 'w', encoding='utf-8') as fh:
+            fh.write(instance.output_html())
+        return path
+    instance.disable()
+    path = f'{path_base}.prof'
+    instance.dump_stats(path)
+    return path
+
+
+@contextlib.contextmanager
+def profile_stage(name, profiler='cprofile', output_dir='.', top=20):
+    """Run a block under cProfile (or pyinstrument) and write ``<output_dir>/<name>.prof|.html``.
+
+    With cProfile the ``top`` entries by cumulative time are also printed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    path_base = os.path.join(output_dir, name.replace(':', '_').replace('/', '_'))
+    instance = _start_profiler(profiler)
+    try:
+        yield
+    finally:
+        path = _stop_profiler(instance, profiler, path_base)
+        print(f"Profile of {name} written to {path}")
+        if profiler == 'cprofile' and top:
+            pstats.Stats(path).sort_stats('cumulative').print_stats(top)
+
+
+class Tracer:
+    """Records nested timed spans with memory figures for each pipeline stage.
+
+    Every span keeps its wall time and the process RSS (change, plus the
+    process high-water mark when the span ended). With ``trace_memory`` it
+    also keeps the bytes allocated through tracemalloc (net change and
+    peak above the starting level). Spans nest per thread. Stages listed
+    in ``profile_stages`` additionally run under a profiler. Results are
+    exported as Chrome trace events (chrome://tracing, Perfetto) or as a
+    summary table.
+    """
+
+    def __init__(self, trace_memory=False, profile_stages=(), profiler='cprofile', profile_dir='.'):
+        self.trace_memory = trace_memory
+        self.profile_stages = set(profile_stages)
+        self.profiler = profiler
+        self.profile_dir = profile_dir
+        self.spans = []
+        self.origin = time.perf_counter()
+        self.process = psutil.Process()
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.started_tracing = False
+
+    def start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+        return self
+
+    def stop(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    def _stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def _traced(self):
+        """Current traced bytes, after folding the traced peak into every open span"""
+        current, peak = tracemalloc.get_traced_memory()
+        for record in self._stack():
+            # Spans opened while tracemalloc was off have no allocation figures
+            if '_peak' in record:
+                record['_peak'] = max(record['_peak'], peak)
+        return current
+
+    def reset_peak(self):
+        """Reset the tracemalloc peak without losing it for the open spans"""
+        if tracemalloc.is_tracing():
+            self._traced()
+            tracemalloc.reset_peak()
+
+    @contextlib.contextmanager
+    def span(self, name, **args):
+        """Time the enclosed block as a span named ``name``; yields its record"""
+        stack = self._stack()
+        tracing = tracemalloc.is_tracing()
+        record = {
+            'name': name,
+            'args': args,
+            'depth': len(stack),
+            'parent': stack[-1]['name'] if stack else None,
+            'path': stack[-1]['path'] + (name,) if stack else (name,),
+            'tid': threading.get_ident(),
+            'rss_start': self.process.memory_info().rss,
+            '_child_seconds': 0.0,
+        }
+        if tracing:
+            record['_alloc_start'] = record['_peak'] = self._traced()
+            tracemalloc.reset_peak()
+        profiler = None
+        if name in self.profile_stages:
+            profiler = _start_profiler(self.profiler)
+        stack.append(record)
+        record['start'] = time.perf_counter()
+        try:
+            yield record
+        finally:
+            end = time.perf_counter()
+            if profiler is not None:
+                os.makedirs(self.profile_dir, exist_ok=True)
+                path_base = os.path.join(self.profile_dir, name.replace(':', '_').replace('/', '_'))
+                record['args']['profile'] = _stop_profiler(profiler, self.profiler, path_base)
+            if tracing and tracemalloc.is_tracing():
+                current = self._traced()
+                record['alloc_delta'] = current - record['_alloc_start']
+                record['alloc_peak'] = record['_peak'] - record['_alloc_start']
+            stack.pop()
+            record['seconds'] = end - record['start']
+            record['self_seconds'] = record['seconds'] - record['_child_seconds']
+            if stack:
+                stack[-1]['_child_seconds'] += record['seconds']
+            rss = self.process.memory_info().rss
+            record['rss_delta'] = rss - record['rss_start']
+            record['rss_peak'] = peak_rss()
+            for key in ('_alloc_start', '_peak', '_child_seconds'):
+                record.pop(key, None)
+            with self.lock:
+                self.spans.append(record)
+
+    def last(self, name):
+        """Most recently finished span called ``name``"""
+        for record in reversed(self.spans):
+            if record['name'] == name:
+                return record
+        raise KeyError(name)
+
+    def chrome_trace(self):
+        """Spans as a Chrome trace-event document (complete events plus an RSS counter)"""
+        pid = os.getpid()
+        events = []
+        for record in sorted(self.spans, key=lambda r: r['start']):
+            ts = (record['start'] - self.origin) * 1e6
+            args = dict(record['args'], depth=record['depth'], path=list(record['path']))
+            for key in ('alloc_delta', 'alloc_peak', 'rss_delta', 'rss_peak'):
+                if key in record:
+                    args[f'{key}_mb'] = round(record[key] / MB, 3)
+            events.append({
+                'name': record['name'], 'cat': 'stage', 'ph': 'X', 'pid': pid, 'tid': record['tid'],
+                'ts': ts, 'dur': record['seconds'] * 1e6, 'args': args,
+            })
+            events.append({
+                'name': 'RSS', 'ph': 'C', 'pid': pid, 'tid': record['tid'], 'ts': ts + record['seconds'] * 1e6,
+                'args': {'rss_mb': round((record['rss_start'] + record['rss_delta']) / MB, 1)},
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write_trace(self, path):
+        with open(path, 'w') as fh:
+            json.dump(self.chrome_trace(), fh, default=str)
+        return path
+
+    def summary(self):
+        """Per-stage totals as table lines, stages in first-start order and indented by depth"""
+        return summary_table(self.spans)
+
+
+def summary_table(spans):
+    """Aggregate span records (or Chrome ``X`` events) by span path into table lines.
+
+    Spans of the same name under different parents (the ``build`` step of
+    each figure) get a row each, below their own parent.
+    """
+    stages = {}
+    for record in sorted(spans, key=lambda r: r.get('start', r.get('ts', 0))):
+        if 'ph' in record:
+            if record['ph'] != 'X':
+                continue
+            args = record.get('args', {})
+            record = {'name': record['name'], 'depth': args.get('depth', 0), 'seconds': record['dur'] / 1e6,
+                      'path': tuple(args.get('path', ())),
+                      **{key[:-3]: value * MB for key, value in args.items() if key.endswith('_mb')}}
+        # Traces written before spans carried their path are grouped by name
+        path = tuple(record.get('path') or (record['name'],))
+        stage = stages.setdefault(path, {
+            'name': record['name'],
+            'depth': record['depth'], 'calls': 0, 'seconds': 0.0, 'self_seconds': 0.0,
+            'alloc_delta': None, 'alloc_peak': None, 'rss_delta': 0, 'rss_peak': 0,
+        })
+        stage['calls'] += 1
+        stage['seconds'] += record['seconds']
+        stage['self_seconds'] += record.get('self_seconds', record['seconds'])
+        if 'alloc_delta' in record:
+            stage['alloc_delta'] = (stage['alloc_delta'] or 0) + record['alloc_delta']
+            stage['alloc_peak'] = max(stage['alloc_peak'] or 0, record['alloc_peak'])
+        stage['rss_delta'] += record.get('rss_delta', 0)
+        stage['rss_peak'] = max(stage['rss_peak'], record.get('rss_peak', 0))
+
+    def mb(value):
+        return '-' if value is None else f'{value / MB:,.1f}'
+
+    lines = [f"{'Stage':<40} {'Calls':>6} {'Total s':>9} {'Self s':>9} {'Alloc MB':>9} "
+             f"{'Peak MB':>9} {'RSS +MB':>9} {'Max RSS MB':>10}"]
+    for stage in stages.values():
+        label = ('  ' * stage['depth'] + stage['name'])[:40]
+        lines.append(f"{label:<40} {stage['calls']:>6} {stage['seconds']:>9.3f} {stage['self_seconds']:>9.3f} "
+                     f"{mb(stage['alloc_delta']):>9} {mb(stage['alloc_peak']):>9} "
+                     f"{mb(stage['rss_delta']):>9} {mb(stage['rss_peak']):>10}")
+    return lines
+
+
+# Process-wide tracer used by the pipeline modules; spans are no-ops until enabled
+_tracer = None
+
+
+def enable(**kwargs):
+    """Install and start a process-wide :class:`Tracer`"""
+    global _tracer
+    disable()
+    _tracer = Tracer(**kwargs).start()
+    return _tracer
+
+
+def disable():
+    global _tracer
+    if _tracer is not None:
+        _tracer.stop()
+        _tracer = None
+
+
+def get_tracer():
+    return _tracer
+
+
+def span(name, **args):
+    """Span on the process-wide tracer, or a no-op context when tracing is off"""
+    if _tracer is None:
+        return contextlib.nullcontext()
+    return _tracer.span(name, **args)
+
+
+def reset_peak():
+    """``tracemalloc.reset_peak`` that keeps the peaks of open spans intact"""
+    if _tracer is not None:
+        _tracer.reset_peak()
+    elif tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Print the per-stage summary of a saved Chrome trace')
+    parser.add_argument('trace', help='Trace JSON written by generate_all_visualizations.py --trace')
+    args = parser.parse_args()
+    with open(args.trace) as fh:
+        document = json.load(fh)
+    print('\n'.join(summary_table(document['traceEvents'])))
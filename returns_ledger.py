@@ -0,0 +1,211 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_cleaning import apply_schema, is_cancelled
+from period_keys import month_labels, period_keys
+from profiling import span
+
+# Row kinds assigned by classify_rows
+SALE, RETURN, INVALID = 0, 1, 2
+# Month a matched return is booked in: the month of the sale it reverses, or its own
+ATTRIBUTIONS = ('sale', 'return')
+LEDGER_DIMENSIONS = ['MonthKey', 'Country', 'Description']
+LEDGER_MEASURES = ['GrossSales', 'ReturnedSales', 'NetSales', 'GrossQuantity', 'ReturnedQuantity']
+
+
+def classify_rows(df):
+    """Kind of every raw row: SALE, RETURN (cancelled invoice line with negative quantity) or INVALID.
+
+    Sales are exactly the rows ``clean_transactions`` keeps. Rows with a
+    missing quantity or price, a non-positive price, or a quantity sign
+    that does not fit the invoice type (stock adjustments) are invalid.
+    """
+    quantity = pd.to_numeric(df['Quantity'], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    price = pd.to_numeric(df['UnitPrice'], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    cancelled = is_cancelled(df['InvoiceNo'])
+    # NaN compares False, so missing prices and quantities never pass
+    valid = price > 0
+    kinds = np.full(len(df), INVALID, dtype=np.int8)
+    kinds[valid & ~cancelled & (quantity > 0)] = SALE
+    kinds[valid & cancelled & (quantity < 0)] = RETURN
+    return kinds
+
+
+def match_returns(lines, kinds):
+    """Position of the sale line each return reverses, or -1 when it has none in the data.
+
+    A return is matched by (CustomerID, StockCode) to the latest sale of
+    that product to that customer at or before the cancellation. Only the
+    sales whose key occurs among the returns take part in the as-of join.
+    Returns without a customer cannot be matched.
+    """
+    customer = lines['CustomerID'].to_numpy(dtype=np.int64, na_value=-1)
+    stock = lines['StockCode'].cat.codes.to_numpy().astype(np.int64)
+    key = customer * (int(stock.max(initial=0)) + 1) + stock
+    dates = lines['InvoiceDate'].to_numpy()
+    usable = (customer >= 0) & (stock >= 0) & ~np.isnat(dates)
+    returns = np.flatnonzero(usable & (kinds == RETURN))
+    sales = np.flatnonzero(usable & (kinds == SALE) & np.isin(key, key[returns]))
+
+    matched = np.full(len(lines), -1, dtype=np.int64)
+    if len(returns) and len(sales):
+        left = pd.DataFrame({'Date': dates[returns], 'Key': key[returns], 'Return': returns}).sort_values('Date')
+        right = pd.DataFrame({'Date': dates[sales], 'Key': key[sales], 'Sale': sales}).sort_values('Date')
+        pairs = pd.merge_asof(left, right, on='Date', by='Key', direction='backward')
+        matched[pairs['Return'].to_numpy()] = pairs['Sale'].fillna(-1).to_numpy(dtype=np.int64)
+    return matched
+
+
+class ReturnsLedger:
+    """Gross, returned and net sales per (month, country, product), with every return traced to its sale.
+
+    ``cube`` holds one row per cell with gross sales and quantity, the
+    value and quantity returned against it and the net sales. ``returns``
+    holds one row per return line with the invoice it was matched to
+    (``OriginalInvoiceNo``), the month of that sale and the month the
+    return is booked in. Rows are classified once, the kept rows are
+    typed once, and the cube is a single groupby over signed measures.
+    """
+
+    def __init__(self, cube, returns):
+        self.cube = cube
+        self.returns = returns
+        self._views = {}
+
+    @classmethod
+    def from_frame(cls, df, attribution='sale'):
+        """Build the ledger from a raw (uncleaned) transaction frame.
+
+        With ``attribution='sale'`` a matched return reduces the net sales
+        of the month it was sold in; unmatched returns, and all returns
+        with ``attribution='return'``, count in the month of cancellation.
+        """
+        if attribution not in ATTRIBUTIONS:
+            raise ValueError(f"Unknown attribution: {attribution}")
+        with span('returns:classify', rows=len(df)):
+            kinds = classify_rows(df)
+            positions = np.flatnonzero(kinds != INVALID)
+            kinds = kinds[positions]
+        with span('returns:apply_schema'):
+            lines = apply_schema(df.take(positions))
+            quantity = lines['Quantity'].to_numpy(dtype='float64')
+            sales = quantity * lines['UnitPrice'].to_numpy()
+            month = period_keys(lines['InvoiceDate'])['MonthKey']
+        with span('returns:match'):
+            original = match_returns(lines, kinds)
+
+        is_sale = kinds == SALE
+        is_return = ~is_sale
+        matched = is_return & (original >= 0)
+        sale_month = np.where(matched, month[np.maximum(original, 0)], -1).astype(np.int32)
+        booked = month.copy()
+        if attribution == 'sale':
+            booked[matched] = sale_month[matched]
+
+        with span('returns:aggregate'):
+            # Returns carry negative quantities, so one sum per measure gives both sides
+            measures = pd.DataFrame({
+                'GrossSales': np.where(is_sale, sales, 0.0),
+                'ReturnedSales': np.where(is_return, -sales, 0.0),
+                'GrossQuantity': np.where(is_sale, quantity, 0.0).astype(np.int64),
+                'ReturnedQuantity': np.where(is_return, -quantity, 0.0).astype(np.int64),
+            }, index=lines.index)
+            cube = (
+                measures.groupby([pd.Series(booked, index=lines.index, name='MonthKey'),
+                                  lines['Country'], lines['Description']],
+                                 observed=True, sort=False, dropna=False)
+                .sum()
+                .reset_index()
+            )
+            cube.insert(5, 'NetSales', cube['GrossSales'] - cube['ReturnedSales'])
+
+        rows = np.flatnonzero(is_return)
+        invoice_codes = lines['InvoiceNo'].cat.codes.to_numpy()
+        original_codes = np.where(matched, invoice_codes[np.maximum(original, 0)], -1)[rows]
+        returns = pd.DataFrame({
+            'InvoiceNo': lines['InvoiceNo'].to_numpy()[rows],
+            'CustomerID': lines['CustomerID'].array[rows],
+            'StockCode': lines['StockCode'].to_numpy()[rows],
+            'Description': lines['Description'].to_numpy()[rows],
+            'Country': lines['Country'].to_numpy()[rows],
+            'InvoiceDate': lines['InvoiceDate'].to_numpy()[rows],
+            'Quantity': (-quantity[rows]).astype(np.int64),
+            'ReturnedSales': -sales[rows],
+            'OriginalInvoiceNo': pd.Categorical.from_codes(
+                original_codes, dtype=lines['InvoiceNo'].dtype).astype(object),
+            'SaleMonthKey': sale_month[rows],
+            'BookedMonthKey': booked[rows],
+        })
+        return cls(cube, returns)
+
+    def _view(self, name, compute):
+        if name not in self._views:
+            self._views[name] = compute()
+        return self._views[name]
+
+    def _by(self, dimension):
+        return self._view(f'by_{dimension}', lambda: (
+            self.cube.groupby(dimension, observed=True, sort=True)[LEDGER_MEASURES].sum()
+            .assign(ReturnRate=lambda t: t['ReturnedSales'] / t['GrossSales'].where(t['GrossSales'] != 0))
+        ))
+
+    def monthly(self):
+        """Gross, returned and net sales and return rate per month, labelled 'YYYY-MM'"""
+        def compute():
+            table = self._by('MonthKey')
+            return table.set_axis(month_labels(table.index).rename('Month'))
+        return self._view('monthly', compute)
+
+    def by_country(self):
+        """Ledger measures per country, by net sales descending"""
+        return self._by('Country').sort_values('NetSales', ascending=False)
+
+    def by_product(self, k=10, measure='ReturnedSales'):
+        """The ``k`` products with the largest ``measure``"""
+        return self._by('Description').nlargest(k, measure)
+
+    def summary(self):
+        """Totals of the ledger and how many returns were traced to a sale"""
+        gross, returned = self.cube['GrossSales'].sum(), self.cube['ReturnedSales'].sum()
+        matched = self.returns['SaleMonthKey'] >= 0
+        return {
+            'gross_sales': gross,
+            'returned_sales': returned,
+            'net_sales': gross - returned,
+            'return_rate': returned / gross if gross else float('nan'),
+            'return_lines': len(self.returns),
+            'matched_share': matched.mean() if len(self.returns) else float('nan'),
+            'unmatched_returned_sales': self.returns.loc[~matched, 'ReturnedSales'].sum(),
+        }
+
+
+if __name__ == "__main__":
+    from data_loader import DATA_FILE, read_retail_data
+    from synthetic_data import generate_transactions, parse_rows
+
+    parser = argparse.ArgumentParser(description='Gross, returned and net sales with cancellations matched to sales')
+    parser.add_argument('--data', default=DATA_FILE, help='Source workbook or CSV')
+    parser.add_argument('--rows', help='Use this many synthetic rows instead of --data, e.g. 1M')
+    parser.add_argument('--attribution', choices=ATTRIBUTIONS, default='sale',
+                        help='Book matched returns in the month of the sale or of the cancellation')
+    parser.add_argument('--top', type=int, default=10, help='Most returned products to list')
+    args = parser.parse_args()
+
+    raw = generate_transactions(parse_rows(args.rows)) if args.rows else read_retail_data(args.data)
+    start = time.perf_counter()
+    ledger = ReturnsLedger.from_frame(raw, args.attribution)
+    print(f"Ledger of {len(raw):,} rows built in {time.perf_counter() - start:.2f}s")
+    summary = ledger.summary()
+    print(f"Gross Sales: £{summary['gross_sales']:,.2f}")
+    print(f"Returned Sales: £{summary['returned_sales']:,.2f} ({summary['return_rate']:.2%})")
+    print(f"Net Sales: £{summary['net_sales']:,.2f}")
+    print(f"Return lines: {summary['return_lines']:,}, {summary['matched_share']:.1%} matched to a sale; "
+          f"£{summary['unmatched_returned_sales']:,.2f} unmatched")
+    pd.set_option('display.width', 120)
+    print("\nBy month:")
+    print(ledger.monthly().round(2).to_string())
+    print(f"\nTop {args.top} returned products:")
+    print(ledger.by_product(args.top).round(2).to_string())
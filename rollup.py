@@ -0,0 +1,249 @@
+import os
+
+import pandas as pd
+
+from period_keys import calendar_month, month_labels, period_keys
+from topk import top_k, top_k_per_group
+from distinct_count import DistinctIndex, count_distinct
+from profiling import span
+
+# Dimensions and additive measures of the sales cube
+CUBE_DIMENSIONS = ['MonthKey', 'Country', 'Description']
+CUBE_MEASURES = ['Sales', 'Quantity', 'Lines']
+INVOICE_KEYS = ['InvoiceNo', 'CustomerID']
+
+
+def _invoice_aggregations(columns):
+    # Invoice attributes keep their first value (the timestamp its earliest); totals add up
+    aggregations = {'MonthKey': ('MonthKey', 'first'), 'Country': ('Country', 'first')}
+    if 'InvoiceDate' in columns:
+        aggregations['InvoiceDate'] = ('InvoiceDate', 'min')
+    aggregations['Sales'] = ('Sales', 'sum')
+    return aggregations
+
+
+class SalesRollup:
+    """Pre-aggregated view of the cleaned transactions shared by all chart builders.
+
+    ``cube`` holds one row per (month, country, product) cell with the additive
+    measures (sales, quantity, line count). ``invoices`` holds one row per
+    (invoice, customer) with its month, country, timestamp and total, which
+    keeps invoice counts and distinct customers exact and gives the daily,
+    hourly and per-transaction series. Chart inputs are derived from these
+    two small tables and memoized, so each grouping is computed at most once.
+    """
+
+    def __init__(self, cube, invoices):
+        self.cube = cube
+        self.invoices = invoices
+        self._views = {}
+
+    @classmethod
+    def from_frame(cls, df, workers=1):
+        """Build the rollup from a cleaned transaction frame in one pass per table.
+
+        With ``workers > 1`` row partitions are aggregated in a process pool
+        and merged (see ``parallel_agg.parallel_rollup``).
+        """
+        if workers > 1:
+            from parallel_agg import parallel_rollup
+            return parallel_rollup(df, workers)
+        if 'MonthKey' in df.columns:
+            month_key = df['MonthKey']
+        else:
+            month_key = pd.Series(period_keys(df['InvoiceDate'])['MonthKey'], index=df.index, name='MonthKey')
+        with span('aggregate:cube'):
+            cube = (
+                df.groupby([month_key, df['Country'], df['Description']], observed=True, sort=False, dropna=False)
+                .agg(Sales=('Sales', 'sum'), Quantity=('Quantity', 'sum'), Lines=('Sales', 'size'))
+                .reset_index()
+            )
+        with span('aggregate:invoices'):
+            invoices = (
+                df.assign(MonthKey=month_key)
+                .groupby(INVOICE_KEYS, observed=True, sort=False, dropna=False)
+                .agg(**_invoice_aggregations(df.columns))
+                .reset_index()
+            )
+        return cls(_plain_columns(cube), _plain_columns(invoices))
+
+    def merge(self, other):
+        """Combine two rollups (e.g. from consecutive chunks or daily deltas)"""
+        with span('aggregate:merge'):
+            cube = (
+                pd.concat([self.cube, other.cube], ignore_index=True)
+                .groupby(CUBE_DIMENSIONS, sort=False, dropna=False)[CUBE_MEASURES].sum()
+                .reset_index()
+            )
+            # An invoice split across two inputs keeps its attributes and adds its totals
+            invoices = pd.concat([self.invoices, other.invoices], ignore_index=True)
+            invoices = (
+                invoices.groupby(INVOICE_KEYS, sort=False, dropna=False)
+                .agg(**_invoice_aggregations(invoices.columns))
+                .reset_index()
+            )
+        return SalesRollup(cube, invoices)
+
+    def save(self, directory):
+        """Persist the rollup tables as Parquet files in ``directory``"""
+        os.makedirs(directory, exist_ok=True)
+        for name, table in (('cube', self.cube), ('invoices', self.invoices)):
+            tmp_path = os.path.join(directory, f'{name}.parquet.tmp')
+            table.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, os.path.join(directory, f'{name}.parquet'))
+
+    @classmethod
+    def load(cls, directory):
+        """Load a rollup saved with :meth:`save`"""
+        tables = []
+        for name in ('cube', 'invoices'):
+            tables.append(pd.read_parquet(os.path.join(directory, f'{name}.parquet')))
+        return cls(*tables)
+
+    def _view(self, name, compute):
+        if name not in self._views:
+            self._views[name] = compute()
+        return self._views[name]
+
+    def _by(self, dimension, measure):
+        by_dimension = self._view(
+            f'by_{dimension}', lambda: self.cube.groupby(dimension, sort=True)[CUBE_MEASURES].sum())
+        return by_dimension[measure]
+
+    def monthly_sales(self):
+        """Total sales per month, labelled 'YYYY-MM'"""
+        def compute():
+            sales = self._by('MonthKey', 'Sales')
+            return pd.Series(sales.values, index=month_labels(sales.index).rename('Month'), name='Sales')
+        return self._view('monthly_sales', compute)
+
+    def invoice_sales(self):
+        """Sales per transaction (invoice) indexed by invoice timestamp, in time order"""
+        def compute():
+            invoices = self.invoices.sort_values('InvoiceDate', kind='stable')
+            return pd.Series(invoices['Sales'].to_numpy(),
+                             index=pd.DatetimeIndex(invoices['InvoiceDate'], name='InvoiceDate'), name='Sales')
+        return self._view('invoice_sales', compute)
+
+    def hourly_sales(self):
+        """Total sales per hour of ``InvoiceDate``"""
+        def compute():
+            sales = self.invoice_sales()
+            return sales.groupby(sales.index.floor('h')).sum()
+        return self._view('hourly_sales', compute)
+
+    def daily_sales(self):
+        """Total sales per day of ``InvoiceDate``"""
+        def compute():
+            sales = self.hourly_sales()
+            return sales.groupby(sales.index.floor('D')).sum()
+        return self._view('daily_sales', compute)
+
+    def country_sales(self):
+        """Total sales per country"""
+        return self._by('Country', 'Sales')
+
+    def product_sales(self):
+        """Total sales per product description"""
+        return self._by('Description', 'Sales')
+
+    def product_quantity(self):
+        """Total quantity sold per product description"""
+        return self._by('Description', 'Quantity')
+
+    def top_products(self, k=10, by='Sales', per=None):
+        """Top ``k`` products by ``by`` ('Sales' or 'Quantity'), optionally per 'Country' or 'MonthKey'"""
+        if per is None:
+            return top_k(self._by('Description', by), k)
+        by_group = self._view(
+            f'by_{per}_Description',
+            lambda: self.cube.groupby([per, 'Description'], sort=False)[CUBE_MEASURES].sum())
+        return top_k_per_group(by_group[by], k, level=per)
+
+    def top_countries(self, k=10, by='Sales', per=None):
+        """Top ``k`` countries by ``by``, optionally per 'MonthKey'"""
+        if per is None:
+            return top_k(self._by('Country', by), k)
+        by_group = self._view(
+            f'by_{per}_Country',
+            lambda: self.cube.groupby([per, 'Country'], sort=False)[CUBE_MEASURES].sum())
+        return top_k_per_group(by_group[by], k, level=per)
+
+    def calendar_month_average(self):
+        """Average line value per calendar month (1-12) across all years"""
+        def compute():
+            self._by('MonthKey', 'Sales')
+            by_key = self._views['by_MonthKey']
+            by_month = by_key.groupby(calendar_month(by_key.index))[['Sales', 'Lines']].sum()
+            return (by_month['Sales'] / by_month['Lines']).rename_axis('Month').rename('Sales')
+        return self._view('calendar_month_average', compute)
+
+    def customer_months(self):
+        """Distinct (CustomerID, MonthKey) pairs, the input of the cohort analysis"""
+        def compute():
+            pairs = self.invoices.loc[self.invoices['CustomerID'].notna(), ['CustomerID', 'MonthKey']]
+            return pairs.drop_duplicates(ignore_index=True)
+        return self._view('customer_months', compute)
+
+    def orders_per_customer(self):
+        """Number of distinct invoices per customer"""
+        return self._view('orders_per_customer',
+                          lambda: self.invoices.groupby('CustomerID')['InvoiceNo'].nunique())
+
+    def customer_rfm(self):
+        """Recency, frequency and monetary state per customer (an ``rfm.CustomerRFM``)"""
+        def compute():
+            from rfm import CustomerRFM
+            return CustomerRFM.from_invoices(self.invoices)
+        return self._view('customer_rfm', compute)
+
+    def use_customer_rfm(self, rfm):
+        """Serve :meth:`customer_rfm` from a state maintained elsewhere (e.g. refreshed from deltas)"""
+        self._views['customer_rfm'] = rfm
+        self._views.pop('rfm_segments', None)
+
+    def rfm_segments(self):
+        """Customers and revenue per RFM segment"""
+        return self._view('rfm_segments', lambda: self.customer_rfm().segments())
+
+    def distinct_customers(self, months=None, countries=None, approximate=False):
+        """Distinct customers for months in ``[start, stop)`` and countries, as ``(value, standard_error)``.
+
+        Per (month, country) bitsets answer exactly; ``approximate`` uses
+        mergeable HyperLogLog sketches instead.
+        """
+        mode = 'hll' if approximate else 'exact'
+        index = self._view(f'distinct_customers_{mode}',
+                           lambda: DistinctIndex(self.invoices, 'CustomerID', mode))
+        return index.count(months, countries)
+
+    def key_metrics(self):
+        """Headline business metrics"""
+        def compute():
+            total_orders = count_distinct(self.invoices['InvoiceNo'])
+            return {
+                'total_sales': self.cube['Sales'].sum(),
+                'total_orders': total_orders,
+                'total_customers': count_distinct(self.invoices['CustomerID']),
+                'total_products': count_distinct(self.cube['Description']),
+                'avg_order_value': self.invoices['Sales'].sum() / total_orders,
+                'top_country': self.top_countries(1).index[0],
+                'top_product': self.top_products(1).index[0],
+            }
+        return self._view('key_metrics', compute)
+
+
+def _plain_columns(table):
+    # Categorical labels from different inputs cannot be concatenated, plain labels can
+    for column in ('InvoiceNo', 'Country', 'Description'):
+        if column in table.columns and isinstance(table[column].dtype, pd.CategoricalDtype):
+            table[column] = table[column].astype(object)
+    return table
+
+
+def ensure_rollup(data, workers=1):
+    """Return ``data`` if it already is a rollup, otherwise build one from the frame"""
+    if isinstance(data, SalesRollup):
+        return data
+    return SalesRollup.from_frame(data, workers)
+
@@ -0,0 +1,262 @@
+import argparse
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+import pandas as pd
+import psutil
+
+MB = 1024 * 1024
+# Masked-array class per kind of the numpy dtype behind a nullable column
+_MASKED_ARRAYS = {'i': pd.arrays.IntegerArray, 'u': pd.arrays.IntegerArray,
+                  'f': pd.arrays.FloatingArray, 'b': pd.arrays.BooleanArray}
+
+
+def _open_block(name):
+    """Attach to an existing block without handing it to this process's resource tracker"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    # Before Python 3.13 every attach is registered, and a worker's tracker would
+    # unlink the block when the worker exits; only the creating process unlinks it
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedFrame:
+    """The columns of a DataFrame placed once in shared memory for zero-copy handoff to workers.
+
+    ``spec`` is a small picklable description of the blocks; any process
+    turns it back into a read-only frame with :func:`attach_frame`.
+    Numeric and datetime columns are shared as they are, nullable columns
+    as values plus mask, and categorical (or string) columns as integer
+    codes plus a dictionary of UTF-8 bytes and offsets. The creating
+    process owns the blocks: use it as a context manager or call ``close``.
+    """
+
+    def __init__(self, df):
+        self.blocks = []
+        self.categories = {}
+        columns = [(name,) + self._share_column(name, df[name]) for name in df.columns]
+        self.spec = {'columns': columns, 'length': len(df)}
+        self.nbytes = sum(block.size for block in self.blocks)
+
+    def _share(self, array):
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, array.dtype, buffer=block.buf)[:] = array
+        self.blocks.append(block)
+        return block.name, array.dtype.str, len(array)
+
+    def _share_labels(self, categories):
+        if categories.dtype != object:
+            return ('numpy', self._share(categories.to_numpy()))
+        encoded = [str(label).encode('utf-8') for label in categories]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(label) for label in encoded], out=offsets[1:])
+        return ('utf8', self._share(offsets), self._share(np.frombuffer(b''.join(encoded), dtype=np.uint8)))
+
+    def _share_column(self, name, series):
+        dtype = series.dtype
+        if not isinstance(dtype, pd.CategoricalDtype) and (dtype == object or pd.api.types.is_string_dtype(dtype)):
+            # Strings travel dictionary-encoded and come back as a categorical
+            series = series.astype('category')
+            dtype = series.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            self.categories[name] = dtype.categories
+            return ('category', self._share(series.cat.codes.to_numpy()),
+                    self._share_labels(dtype.categories), dtype.ordered)
+        if isinstance(dtype, pd.api.extensions.ExtensionDtype) and getattr(dtype, 'numpy_dtype', None) is not None:
+            values = series.to_numpy(dtype=dtype.numpy_dtype, na_value=0)
+            return ('masked', self._share(values), self._share(series.isna().to_numpy()), str(dtype))
+        if pd.api.types.is_datetime64_dtype(dtype):
+            return ('datetime', self._share(series.to_numpy().view(np.int64)), str(dtype))
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biufcm':
+            return ('numpy', self._share(series.to_numpy()))
+        raise TypeError(f"Column {name!r} of dtype {dtype} cannot be shared")
+
+    def close(self):
+        """Release and remove the blocks (workers must be done with their views)"""
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Blocks and decoded dictionaries attached by this process, kept while their frame is in use
+_attached = {}
+_decoded = {}
+
+
+def _view(description):
+    block_name, dtype, length = description
+    if block_name not in _attached:
+        _attached[block_name] = _open_block(block_name)
+    array = np.ndarray((length,), dtype, buffer=_attached[block_name].buf)
+    array.flags.writeable = False
+    return array
+
+
+def _blocks(spec):
+    for _, kind, *parts in spec['columns']:
+        if kind == 'category':
+            yield parts[0][0]
+            yield from (description[0] for description in parts[1][1:])
+        elif kind == 'masked':
+            yield parts[0][0]
+            yield parts[1][0]
+        else:
+            yield parts[0][0]
+
+
+def _labels(labels):
+    kind, *descriptions = labels
+    key = descriptions[0][0]
+    if key not in _decoded:
+        if kind == 'numpy':
+            _decoded[key] = pd.Index(_view(descriptions[0]).copy())
+        else:
+            offsets, data = _view(descriptions[0]), _view(descriptions[1]).tobytes()
+            _decoded[key] = pd.Index([data[start:stop].decode('utf-8')
+                                      for start, stop in zip(offsets[:-1], offsets[1:])], dtype=object)
+    return _decoded[key]
+
+
+def release(keep=()):
+    """Close the blocks this process attached, except those named in ``keep``"""
+    for block_name in list(_attached):
+        if block_name not in keep:
+            try:
+                _attached.pop(block_name).close()
+            except BufferError:
+                # A frame built on this block is still referenced; it is closed on exit
+                pass
+    for key in list(_decoded):
+        if key not in keep:
+            del _decoded[key]
+
+
+def attach_frame(spec, columns=None, categories=True):
+    """Read-only DataFrame over the shared blocks of ``spec``; no column data is copied.
+
+    With ``categories=False`` categorical columns are returned as their
+    integer codes, so their dictionaries are never decoded. Blocks of
+    frames attached earlier by this process are released first.
+    """
+    release(keep=set(_blocks(spec)))
+    data = {}
+    for name, kind, *parts in spec['columns']:
+        if columns is not None and name not in columns:
+            continue
+        if kind == 'numpy':
+            data[name] = _view(parts[0])
+        elif kind == 'datetime':
+            data[name] = _view(parts[0]).view(parts[1])
+        elif kind == 'masked':
+            values, mask = _view(parts[0]), _view(parts[1])
+            data[name] = _MASKED_ARRAYS[values.dtype.kind](values, mask)
+        elif categories:
+            codes, labels, ordered = parts
+            data[name] = pd.Categorical.from_codes(
+                _view(codes), dtype=pd.CategoricalDtype(_labels(labels), ordered=ordered))
+        else:
+            data[name] = _view(parts[0])
+    return pd.DataFrame(data, copy=False)
+
+
+_barrier = None
+
+
+def _init_worker(barrier):
+    global _barrier
+    _barrier = barrier
+
+
+def _footprint(df):
+    """Touch every column, wait until each worker has its frame, then report this process's memory"""
+    for column in df.columns:
+        values = df[column]
+        values.cat.codes.sum() if isinstance(values.dtype, pd.CategoricalDtype) else values.isna().sum()
+    # One task per worker: nobody returns until every worker holds a frame
+    _barrier.wait(timeout=300)
+    memory = psutil.Process().memory_full_info()
+    return {'pid': os.getpid(), 'rss': memory.rss, 'uss': memory.uss}
+
+
+def _receive_pickled(df):
+    return _footprint(df)
+
+
+def _receive_shared(spec):
+    return _footprint(attach_frame(spec))
+
+
+def handoff_report(df, worker_counts=(1, 2, 4, 8), start_method=None):
+    """Start-up time and worker memory of handing ``df`` to N workers, by pickle and by shared memory.
+
+    Each run starts a fresh pool and gives every worker the frame once.
+    ``ready_seconds`` runs from pool creation until all workers hold the
+    frame; ``uss`` is memory private to the workers (what the handoff
+    really costs), ``rss`` also counts mapped shared pages.
+    """
+    context = multiprocessing.get_context(start_method)
+    results = []
+    pickled_bytes = len(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+    for workers in worker_counts:
+        for method in ('pickle', 'shared'):
+            barrier = context.Barrier(workers)
+            start = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                     initializer=_init_worker, initargs=(barrier,)) as pool:
+                if method == 'pickle':
+                    footprints = list(pool.map(_receive_pickled, [df] * workers))
+                    payload = pickled_bytes
+                else:
+                    with SharedFrame(df) as shared:
+                        footprints = list(pool.map(_receive_shared, [shared.spec] * workers))
+                        payload = shared.nbytes
+                ready = time.perf_counter() - start
+            results.append({
+                'workers': workers,
+                'method': method,
+                'ready_seconds': ready,
+                'payload_mb': payload / MB,
+                'worker_uss_mb': sum(f['uss'] for f in footprints) / MB,
+                'worker_rss_mb': sum(f['rss'] for f in footprints) / MB,
+            })
+    return results
+
+
+if __name__ == "__main__":
+    from data_cleaning import clean_transactions
+    from synthetic_data import generate_transactions, parse_rows
+
+    parser = argparse.ArgumentParser(description='Compare shared-memory and pickled DataFrame handoff to workers')
+    parser.add_argument('--rows', default='1M', help='Synthetic row count, e.g. 1M or 10M')
+    parser.add_argument('--workers', default='1,2,4,8', help='Comma-separated worker counts')
+    parser.add_argument('--start-method', choices=multiprocessing.get_all_start_methods(),
+                        help='Process start method (default: the platform default)')
+    args = parser.parse_args()
+
+    cleaned = clean_transactions(generate_transactions(parse_rows(args.rows)))
+    print(f"{len(cleaned):,} cleaned rows, start method "
+          f"{args.start_method or multiprocessing.get_start_method()}")
+    print(f"{'workers':>7} {'method':>7} {'ready s':>8} {'payload MB':>11} {'worker USS MB':>14} {'worker RSS MB':>14}")
+    for row in handoff_report(cleaned, [int(n) for n in args.workers.split(',')], args.start_method):
+        print(f"{row['workers']:>7} {row['method']:>7} {row['ready_seconds']:>8.2f} {row['payload_mb']:>11.1f} "
+              f"{row['worker_uss_mb']:>14.1f} {row['worker_rss_mb']:>14.1f}")
@@ -0,0 +1,84 @@
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Modules that must stay cheap to import, as paths relative to the project root
+MODULES = (
+    'generate_all_visualizations',
+    'workingcode/dashboard_script',
+    'workingcode/Sales_Dashboard',
+    'workingcode/Sales_Performance_Dashboard',
+)
+# Import time above this many seconds is reported as a failure
+IMPORT_BUDGET = 1.0
+
+
+def parse_importtime(output):
+    """``(name, self_us, cumulative_us, depth)`` rows of a ``-X importtime`` report, in report order"""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def import_profile(module, python=sys.executable):
+    """Import ``module`` in a fresh interpreter under ``-X importtime``.
+
+    Returns the module's cumulative import seconds and the imports it
+    pulled in directly, heaviest first. ``module`` may carry a directory
+    prefix (``workingcode/Sales_Dashboard``); the interpreter then runs
+    from that directory, as the scripts there expect.
+    """
+    directory, name = os.path.split(module)
+    result = subprocess.run([python, '-X', 'importtime', '-c', f'import {name}'],
+                            cwd=os.path.join(ROOT, directory), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {name} failed:\n{result.stderr[-2000:]}")
+    rows = parse_importtime(result.stderr)
+    end = max(i for i, row in enumerate(rows) if row[0] == name and row[3] == 0)
+    start = end
+    # Children are reported before their parent, back to the previous top-level import
+    while start > 0 and rows[start - 1][3] > 0:
+        start -= 1
+    direct = sorted((row for row in rows[start:end] if row[3] == 1), key=lambda row: -row[2])
+    return {
+        'module': module,
+        'seconds': rows[end][2] / 1e6,
+        'imports': [(row[0], row[2] / 1e6) for row in direct],
+    }
+
+
+def startup_report(modules=MODULES, repeat=3):
+    """Best-of-``repeat`` import profile of each module (a first untimed run compiles the bytecode)"""
+    report = []
+    for module in modules:
+        import_profile(module)
+        report.append(min((import_profile(module) for _ in range(repeat)), key=lambda p: p['seconds']))
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measure module import time with python -X importtime')
+    parser.add_argument('modules', nargs='*', default=MODULES,
+                        help='Modules relative to the project root, e.g. workingcode/Sales_Dashboard')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=5, help='Direct imports listed per module')
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET, help='Seconds allowed per module')
+    args = parser.parse_args()
+
+    over = []
+    for profile in startup_report(args.modules, args.repeat):
+        flag = 'OVER' if profile['seconds'] > args.budget else 'ok'
+        print(f"{profile['module']:<45} {profile['seconds']:>7.3f} s  {flag}")
+        for name, seconds in profile['imports'][:args.top]:
+            print(f"    {name:<41} {seconds:>7.3f} s")
+        if profile['seconds'] > args.budget:
+            over.append(profile['module'])
+    print(f"\n{len(over)} module(s) over the {args.budget:.2f} s import budget")
+    sys.exit(1 if over else 0)
@@ -0,0 +1,122 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+STATIC_FORMATS = ('png', 'svg')
+DEFAULT_SCALE = 2
+DEFAULT_BATCH_SIZE = 4
+
+
+def warm_up():
+    """Pool initializer: start the Kaleido renderer once so later exports skip its startup"""
+    import plotly.graph_objects as go
+    go.Figure().to_image(format='png', width=10, height=10)
+
+
+def write_static(fig, path_base, formats, scale=DEFAULT_SCALE):
+    """Write ``fig`` as ``<path_base>.<format>`` for each static format; returns the paths"""
+    paths = []
+    for fmt in formats:
+        if fmt not in STATIC_FORMATS:
+            raise ValueError(f"Unsupported static format: {fmt}")
+        path = f'{path_base}.{fmt}'
+        fig.write_image(path, format=fmt, scale=scale)
+        paths.append(path)
+    return paths
+
+
+def export_batch(jobs, formats, scale=DEFAULT_SCALE):
+    """Export ``(fig, path_base)`` jobs in the current process; returns ``(path_base, seconds)`` pairs"""
+    results = []
+    for fig, path_base in jobs:
+        start = time.perf_counter()
+        write_static(fig, path_base, formats, scale)
+        results.append((path_base, time.perf_counter() - start))
+    return results
+
+
+def batched(items, size):
+    """Split ``items`` into lists of at most ``size`` entries"""
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+class StaticExportPool:
+    """Warm pool of export processes that write figures as PNG/SVG in parallel.
+
+    Each worker starts Kaleido once in its initializer, so only the first
+    export per process pays the renderer startup. Figures are sent in batches
+    of ``batch_size`` to cut per-task overhead.
+    """
+
+    def __init__(self, workers=2, batch_size=DEFAULT_BATCH_SIZE, scale=DEFAULT_SCALE):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.scale = scale
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=warm_up)
+
+    def warm(self):
+        """Block until every worker has started its renderer"""
+        list(self.pool.map(time.sleep, [0.05] * self.workers))
+
+    def export(self, jobs, formats=('png',)):
+        """Export ``(fig, path_base)`` jobs; returns ``{path_base: seconds}``"""
+        futures = [self.pool.submit(export_batch, batch, formats, self.scale)
+                   for batch in batched(jobs, self.batch_size)]
+        seconds = {}
+        for future in futures:
+            seconds.update(future.result())
+        return seconds
+
+    def close(self):
+        self.pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def benchmark(jobs, formats=('png',), workers=2, batch_size=DEFAULT_BATCH_SIZE):
+    """Compare per-figure latency of cold ``fig.write_image`` against a warm export pool"""
+    results = {'figures': len(jobs), 'formats': ','.join(formats), 'workers': workers}
+
+    # Cold: a fresh process per figure, as a one-off script calling fig.write_image would be
+    start = time.perf_counter()
+    for job in jobs:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            pool.submit(export_batch, [job], formats).result()
+    results['cold_seconds_per_figure'] = (time.perf_counter() - start) / len(jobs)
+
+    with StaticExportPool(workers, batch_size) as pool:
+        pool.warm()
+        start = time.perf_counter()
+        per_figure = pool.export(jobs, formats)
+        results['warm_wall_seconds_per_figure'] = (time.perf_counter() - start) / len(jobs)
+        results['warm_export_seconds_per_figure'] = sum(per_figure.values()) / len(per_figure)
+    return results
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    from data_cleaning import clean_transactions
+    from data_loader import DATA_FILE, read_retail_data
+    from rollup import SalesRollup
+    from generate_all_visualizations import VISUALIZATIONS
+
+    parser = argparse.ArgumentParser(description='Benchmark warm-pool static export against cold write_image')
+    parser.add_argument('--data', default=DATA_FILE, help='Path to the source workbook or CSV export')
+    parser.add_argument('--formats', default='png', help='Comma-separated static formats (png, svg)')
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    rollup = SalesRollup.from_frame(clean_transactions(read_retail_data(args.data)))
+    out_dir = tempfile.mkdtemp(prefix='static_export_')
+    jobs = [(build_figure(getattr(rollup, view)()), os.path.join(out_dir, filename))
+            for _, filename, view, build_figure in VISUALIZATIONS]
+    for key, value in benchmark(jobs, tuple(args.formats.split(',')), args.workers, args.batch_size).items():
+        print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
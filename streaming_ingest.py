@@ -0,0 +1,104 @@
+import time
+
+import pandas as pd
+
+from data_cleaning import clean_transactions
+from data_loader import RAW_DTYPES
+from profiling import span
+from rollup import SalesRollup
+
+DEFAULT_CHUNKSIZE = 100_000
+
+
+def _normalize_chunk(chunk):
+    """Give a chunk the same column types as the columnar cache"""
+    for column in RAW_DTYPES:
+        if column in chunk.columns:
+            values = chunk[column]
+            chunk[column] = values.where(values.isna(), values.astype(str))
+    if 'InvoiceDate' in chunk.columns:
+        chunk['InvoiceDate'] = pd.to_datetime(chunk['InvoiceDate'])
+    return chunk
+
+
+def iter_xlsx_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrames of at most ``chunksize`` rows from the first sheet of a workbook"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(name) for name in next(rows)]
+        buffer = []
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunksize:
+                yield _normalize_chunk(pd.DataFrame.from_records(buffer, columns=header))
+                buffer = []
+        if buffer:
+            yield _normalize_chunk(pd.DataFrame.from_records(buffer, columns=header))
+    finally:
+        workbook.close()
+
+
+def iter_csv_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrames of at most ``chunksize`` rows from a CSV export"""
+    reader = pd.read_csv(path, chunksize=chunksize, dtype=RAW_DTYPES,
+                         parse_dates=['InvoiceDate'], encoding_errors='replace')
+    yield from reader
+
+
+def iter_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield raw chunks from a workbook or CSV export depending on the extension"""
+    if path.lower().endswith('.csv'):
+        return iter_csv_chunks(path, chunksize)
+    return iter_xlsx_chunks(path, chunksize)
+
+
+def stream_rollup(path, chunksize=DEFAULT_CHUNKSIZE, report=None):
+    """Clean the source chunk by chunk and combine the chunk rollups into one sales rollup.
+
+    Chunk rollups are merged pairwise like a binary counter: two partials
+    covering the same number of chunks are merged as soon as both exist.
+    Every row is therefore regrouped about log2(chunks) times rather than
+    once per later chunk, and memory holds one raw chunk plus at most
+    log2(chunks) partial rollups. The rollup tables themselves still grow
+    with the number of invoices. ``report``, if given, receives the
+    combined cleaning statistics and the number of chunks read.
+    """
+    start = time.perf_counter()
+    # (chunks covered, rollup), sizes strictly decreasing from bottom to top
+    partials = []
+    totals = {'rows_in': 0, 'rows_out': 0, 'rows_dropped': {}, 'chunks': 0}
+    chunks = iter_chunks(path, chunksize)
+    while True:
+        # Reading is its own span so parse time is separated from cleaning and aggregation
+        with span('read_chunk'):
+            chunk = next(chunks, None)
+        if chunk is None:
+            break
+        with span('chunk', index=totals['chunks'], rows=len(chunk)):
+            chunk_report = {}
+            cleaned = clean_transactions(chunk, report=chunk_report)
+            del chunk
+            size, rollup = 1, SalesRollup.from_frame(cleaned)
+            while partials and partials[-1][0] == size:
+                earlier_size, earlier = partials.pop()
+                size, rollup = earlier_size + size, earlier.merge(rollup)
+            partials.append((size, rollup))
+
+        totals['chunks'] += 1
+        totals['rows_in'] += chunk_report['rows_in']
+        totals['rows_out'] += chunk_report['rows_out']
+        for rule, count in chunk_report['rows_dropped'].items():
+            totals['rows_dropped'][rule] = totals['rows_dropped'].get(rule, 0) + count
+
+    if not partials:
+        raise ValueError(f'No rows found in {path}')
+    # Fold the remaining partials from the newest (smallest) up, keeping input order
+    rollup = partials.pop()[1]
+    while partials:
+        rollup = partials.pop()[1].merge(rollup)
+    if report is not None:
+        report.update(totals, seconds=time.perf_counter() - start)
+    return rollup
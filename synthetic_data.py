@@ -0,0 +1,216 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+# Share of transactions per country, shaped after the real export (UK dominant, long tail)
+COUNTRY_WEIGHTS = {
+    'United Kingdom': 0.890, 'Germany': 0.0175, 'France': 0.0160, 'EIRE': 0.0150, 'Spain': 0.0047,
+    'Netherlands': 0.0044, 'Belgium': 0.0038, 'Switzerland': 0.0037, 'Portugal': 0.0028,
+    'Australia': 0.0023, 'Norway': 0.0020, 'Italy': 0.0015, 'Channel Islands': 0.0014, 'Finland': 0.0013,
+    'Cyprus': 0.0011, 'Sweden': 0.0008, 'Unspecified': 0.0008, 'Austria': 0.0007, 'Denmark': 0.0007,
+    'Japan': 0.0007, 'Poland': 0.0006, 'Israel': 0.0005, 'USA': 0.0005, 'Hong Kong': 0.0005,
+    'Singapore': 0.0004, 'Iceland': 0.0003, 'Canada': 0.0003, 'Greece': 0.0003, 'Malta': 0.0002,
+    'United Arab Emirates': 0.0001, 'European Community': 0.0001, 'RSA': 0.0001, 'Lebanon': 0.0001,
+    'Lithuania': 0.0001, 'Brazil': 0.0001, 'Czech Republic': 0.0001, 'Bahrain': 0.0001, 'Saudi Arabia': 0.0001,
+}
+
+# Relative order volume per calendar month, rising through the autumn to a December peak
+MONTH_FACTORS = np.array([0.75, 0.70, 0.90, 0.80, 0.95, 0.90, 0.90, 0.90, 1.25, 1.40, 1.70, 1.85])
+# Monday..Sunday; the shop takes no orders on Saturdays
+WEEKDAY_FACTORS = np.array([1.0, 1.05, 1.1, 1.15, 0.9, 0.0, 0.65])
+HOUR_FACTORS = {7: 0.02, 8: 0.4, 9: 0.8, 10: 1.1, 11: 1.3, 12: 1.5, 13: 1.3, 14: 1.1, 15: 1.0,
+                16: 0.6, 17: 0.3, 18: 0.1, 19: 0.1, 20: 0.05}
+QUANTITIES = np.array([1, 2, 3, 4, 6, 8, 10, 12, 24, 36, 48, 96, 144])
+QUANTITY_WEIGHTS = np.array([0.24, 0.14, 0.07, 0.07, 0.1, 0.04, 0.05, 0.15, 0.07, 0.02, 0.02, 0.02, 0.01])
+
+MEAN_INVOICE_LINES = 21
+CANCELLED_SHARE = 0.15      # of invoices; cancellations are short, so ~1.5% of lines
+GUEST_SHARE = 0.12          # invoices without a CustomerID (larger baskets, ~25% of lines)
+FIRST_INVOICE = 536365
+START_DATE = '2010-12-01'
+END_DATE = '2011-12-10'
+# Invoices expanded per block; each block has its own random stream, so output depends only on (rows, seed)
+BLOCK_INVOICES = 50_000
+COLUMNS = ['InvoiceNo', 'StockCode', 'Description', 'Quantity', 'InvoiceDate', 'UnitPrice', 'CustomerID', 'Country']
+
+_COLOURS = ['WHITE', 'RED', 'PINK', 'BLUE', 'GREEN', 'IVORY', 'BLACK', 'SILVER', 'GOLD', 'VINTAGE', 'RETRO']
+_STYLES = ['HANGING', 'REGENCY', 'JUMBO', 'SPOTTY', 'FLORAL', 'HEART', 'STAR', 'PAISLEY', 'CHRISTMAS', 'GLASS', 'WOODEN']
+_ITEMS = ['T-LIGHT HOLDER', 'LANTERN', 'BAG', 'CAKESTAND', 'MUG', 'TEACUP AND SAUCER', 'BUNTING', 'CUSHION COVER',
+          'NAPKINS', 'PHOTO FRAME', 'DOORSTOP', 'LUNCH BOX', 'CANDLE', 'WALL CLOCK', 'GIFT WRAP', 'COAT HANGER']
+
+
+def parse_rows(text):
+    """Parse a row count such as ``250000``, ``100k`` or ``1.5M``"""
+    text = str(text).strip().lower().replace('_', '').replace(',', '')
+    for suffix, factor in (('k', 1_000), ('m', 1_000_000), ('b', 1_000_000_000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+
+def _zipf_weights(n, exponent):
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def product_catalog(n_products, rng):
+    """Stock codes, descriptions, list prices and Zipf popularity of a synthetic catalog"""
+    codes = (10000 + rng.permutation(90000)[:n_products]).astype(str).astype(object)
+    variants = rng.random(n_products) < 0.1
+    codes[variants] = codes[variants] + rng.choice(list('ABCDEF'), variants.sum())
+    names = np.char.add(np.char.add(rng.choice(_COLOURS, n_products), ' '), rng.choice(_STYLES, n_products))
+    names = np.char.add(np.char.add(names, ' '), rng.choice(_ITEMS, n_products))
+    # Names repeat across codes in the real data too; the code keeps them apart
+    prices = np.round(np.clip(rng.lognormal(np.log(2.1), 0.8, n_products), 0.06, 650.0), 2)
+    return {
+        'StockCode': codes,
+        'Description': names.astype(object),
+        'UnitPrice': prices,
+        'popularity': _zipf_weights(n_products, 0.8)[rng.permutation(n_products)],
+    }
+
+
+def invoice_table(n_rows, rng, n_customers, start=START_DATE, end=END_DATE):
+    """One row per invoice: date (sorted), customer, country, cancellation flag and line count"""
+    sizes = rng.geometric(1 / MEAN_INVOICE_LINES, int(n_rows / MEAN_INVOICE_LINES * 1.2) + 16)
+    cancelled = rng.random(len(sizes)) < CANCELLED_SHARE
+    guest = ~cancelled & (rng.random(len(sizes)) < GUEST_SHARE)
+    sizes = np.where(cancelled, rng.geometric(0.6, len(sizes)), np.where(guest, sizes * 2, sizes))
+    while sizes.sum() < n_rows:
+        sizes = np.concatenate([sizes, rng.geometric(1 / MEAN_INVOICE_LINES, len(sizes))])
+        cancelled = np.concatenate([cancelled, np.zeros(len(sizes) - len(cancelled), dtype=bool)])
+        guest = np.concatenate([guest, np.zeros(len(sizes) - len(guest), dtype=bool)])
+    n_invoices = int(np.searchsorted(np.cumsum(sizes), n_rows)) + 1
+    sizes, cancelled, guest = sizes[:n_invoices].copy(), cancelled[:n_invoices], guest[:n_invoices]
+    sizes[-1] -= sizes.sum() - n_rows
+
+    days = pd.date_range(start, end, freq='D', inclusive='left')
+    day_weights = MONTH_FACTORS[days.month - 1] * WEEKDAY_FACTORS[days.weekday]
+    hours = np.array(list(HOUR_FACTORS))
+    hour_weights = np.array(list(HOUR_FACTORS.values()))
+    offsets = (rng.choice(len(days), n_invoices, p=day_weights / day_weights.sum()).astype(np.int64) * 86400
+               + rng.choice(hours, n_invoices, p=hour_weights / hour_weights.sum()) * 3600
+               + rng.integers(0, 60, n_invoices) * 60)
+    dates = days[0].to_datetime64() + np.sort(offsets).astype('timedelta64[s]')
+
+    countries = np.array(list(COUNTRY_WEIGHTS), dtype=object)
+    country_p = np.array(list(COUNTRY_WEIGHTS.values()))
+    country_p /= country_p.sum()
+    customer_country = rng.choice(countries, n_customers, p=country_p)
+    customers = rng.choice(n_customers, n_invoices, p=_zipf_weights(n_customers, 0.7))
+    invoice_no = (FIRST_INVOICE + np.arange(n_invoices)).astype(str).astype(object)
+    invoice_no[cancelled] = 'C' + invoice_no[cancelled]
+    return {
+        'InvoiceNo': invoice_no,
+        'InvoiceDate': dates.astype('datetime64[ns]'),
+        'CustomerID': np.where(guest, np.nan, 12346.0 + customers),
+        'Country': np.where(guest, rng.choice(countries, n_invoices, p=country_p), customer_country[customers]),
+        'cancelled': cancelled,
+        'lines': sizes,
+    }
+
+
+def _expand_block(invoices, catalog, lo, hi, rng):
+    sizes = invoices['lines'][lo:hi]
+    n = int(sizes.sum())
+    owner = np.repeat(np.arange(lo, hi), sizes)
+    product = rng.choice(len(catalog['UnitPrice']), n, p=catalog['popularity'])
+    quantity = rng.choice(QUANTITIES, n, p=QUANTITY_WEIGHTS / QUANTITY_WEIGHTS.sum())
+    # Bulk lines get the wholesale discount
+    price = np.round(catalog['UnitPrice'][product] * np.where(quantity >= 12, 0.85, 1.0), 2)
+    description = catalog['Description'][product].copy()
+    # A few adjustment lines with no price, some of them without a description
+    free = rng.random(n) < 0.003
+    price[free] = 0.0
+    description[free & (rng.random(n) < 0.5)] = np.nan
+    cancelled = invoices['cancelled'][owner]
+    quantity = np.where(cancelled, -quantity, quantity)
+    return pd.DataFrame({
+        'InvoiceNo': invoices['InvoiceNo'][owner],
+        'StockCode': catalog['StockCode'][product],
+        'Description': description,
+        'Quantity': quantity,
+        'InvoiceDate': invoices['InvoiceDate'][owner],
+        'UnitPrice': price,
+        'CustomerID': invoices['CustomerID'][owner],
+        'Country': invoices['Country'][owner],
+    }, columns=COLUMNS)
+
+
+def iter_transactions(n_rows, seed=0, n_products=None, n_customers=None):
+    """Yield synthetic raw transactions in date order, about one million rows per frame.
+
+    The columns and dtypes match the source workbook. Product popularity is
+    Zipf-distributed, about 89% of lines come from the United Kingdom,
+    ~15% of invoices are cancellations ('C' prefix, negative quantities)
+    and order volume peaks in December. The catalog defaults to 4,000
+    products and customers grow with the row count, as in the real export.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(3)
+    n_products = n_products or min(4000, max(50, n_rows // 10))
+    n_customers = n_customers or max(100, int(4400 * n_rows / 540_000))
+    catalog = product_catalog(n_products, np.random.default_rng(seeds[0]))
+    invoices = invoice_table(n_rows, np.random.default_rng(seeds[1]), n_customers)
+    n_invoices = len(invoices['lines'])
+    block_seeds = seeds[2].spawn(-(-n_invoices // BLOCK_INVOICES))
+    for block, lo in enumerate(range(0, n_invoices, BLOCK_INVOICES)):
+        yield _expand_block(invoices, catalog, lo, min(lo + BLOCK_INVOICES, n_invoices),
+                            np.random.default_rng(block_seeds[block]))
+
+
+def generate_transactions(n_rows, seed=0, **kwargs):
+    """Synthetic raw transactions as one DataFrame (see :func:`iter_transactions`)"""
+    return pd.concat(iter_transactions(n_rows, seed, **kwargs), ignore_index=True)
+
+
+def write_transactions(path, n_rows, seed=0, **kwargs):
+    """Write synthetic transactions to ``.csv`` (streamed, any size) or ``.xlsx`` (up to Excel's row limit)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    if path.lower().endswith('.xlsx'):
+        if n_rows >= 1_048_576:
+            raise ValueError('Excel sheets hold at most 1,048,575 data rows; write a .csv instead')
+        generate_transactions(n_rows, seed, **kwargs).to_excel(path, index=False)
+        return path
+    if not path.lower().endswith('.csv'):
+        raise ValueError(f"Unsupported output format: {path}")
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', newline='') as fh:
+        for index, frame in enumerate(iter_transactions(n_rows, seed, **kwargs)):
+            frame.to_csv(fh, index=False, header=index == 0, date_format='%Y-%m-%d %H:%M:%S')
+    os.replace(tmp_path, path)
+    return path
+
+
+def describe(df):
+    """Distribution checks of a raw transaction frame as ``(label, value)`` pairs"""
+    invoice = df['InvoiceNo'].astype(str)
+    months = pd.to_datetime(df['InvoiceDate']).dt.month
+    sales = df['Quantity'] * df['UnitPrice']
+    product_lines = df['StockCode'].value_counts(normalize=True)
+    return [
+        ('Rows', f'{len(df):,}'),
+        ('Invoices', f'{invoice.nunique():,}'),
+        ('Products', f'{df["StockCode"].nunique():,}'),
+        ('Customers', f'{df["CustomerID"].nunique():,}'),
+        ('Cancelled lines', f'{invoice.str.startswith("C").mean():.1%}'),
+        ('Missing CustomerID', f'{df["CustomerID"].isna().mean():.1%}'),
+        ('United Kingdom lines', f'{(df["Country"] == "United Kingdom").mean():.1%}'),
+        ('Top 10% products, share of lines', f'{product_lines.iloc[:max(1, len(product_lines) // 10)].sum():.1%}'),
+        ('Busiest calendar month', f'{sales.groupby(months).sum().idxmax()}'),
+    ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate a synthetic retail transactions file')
+    parser.add_argument('--rows', default='540k', help='Row count, e.g. 100k, 1M or 100M')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='synthetic_retail.csv', help='.csv, or .xlsx below 1M rows')
+    args = parser.parse_args()
+    n_rows = parse_rows(args.rows)
+    write_transactions(args.output, n_rows, args.seed)
+    print(f"Wrote {n_rows:,} rows to {args.output}")
+    if n_rows <= 5_000_000:
+        for label, value in describe(pd.read_csv(args.output, dtype={'InvoiceNo': str, 'StockCode': str})):
+            print(f"{label}: {value}")
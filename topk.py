@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+
+
+def top_k(series, k=10, largest=True):
+    """Return the ``k`` largest (or smallest) entries of ``series``, best first.
+
+    Candidates are found with ``np.partition`` instead of a full sort; only
+    the candidates (``k`` plus any ties at the boundary) are ordered. Ties
+    are broken by the index label so the selection is stable between runs.
+    Missing values are ignored.
+    """
+    values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    present = ~np.isnan(values)
+    if not present.all():
+        series, values = series[present], values[present]
+    key = -values if largest else values
+    if k <= 0:
+        return series.iloc[:0]
+    if k < len(key):
+        kth = np.partition(key, k - 1)[k - 1]
+        candidates = np.flatnonzero(key <= kth)
+    else:
+        candidates = np.arange(len(key))
+    labels = np.asarray(series.index[candidates].map(str), dtype=object)
+    order = np.lexsort((labels, key[candidates]))[:k]
+    return series.iloc[candidates[order]]
+
+
+def top_k_per_group(series, k=10, largest=True, level=0):
+    """Apply :func:`top_k` within each group of a MultiIndexed series.
+
+    ``level`` names the grouping level (e.g. ``'Country'`` or ``'MonthKey'``);
+    groups are returned in sorted order.
+    """
+    parts = []
+    for _, group in series.groupby(level=level, sort=True, observed=True):
+        parts.append(top_k(group, k, largest))
+    if not parts:
+        return series.iloc[:0]
+    return pd.concat(parts)
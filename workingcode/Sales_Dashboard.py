@@ -1,31 +1,47 @@
 # Import required libraries
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import numpy as np
+import os
+import sys
 
-def create_visualizations():
-    # Set style for better visualizations
-    plt.style.use('bmh')
-    sns.set_palette('husl')
-    
+# Shared loaders live in the project root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from data_loader import frame_of, read_retail_data
+from data_cleaning import clean_transactions
+from topk import top_k
+from period_keys import month_labels
+
+def load_and_clean_data():
+    """Read and clean the retail dataset"""
     # Read and prepare the data
     print("Loading data...")
-    df = pd.read_excel('Online Retail Data Set.xlsx')
+    df = read_retail_data()
     print(f"Initial data shape: {df.shape}")
     
     # Data preprocessing
     print("\nCleaning data...")
-    df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'])
-    df['Sales'] = df['Quantity'] * df['UnitPrice']
-    df = df[~df['InvoiceNo'].astype(str).str.startswith('C')]
-    df = df[(df['Quantity'] > 0) & (df['UnitPrice'] > 0)]
+    df = clean_transactions(df)  # Remove cancelled orders, non-positive quantities and prices
     print(f"Data shape after cleaning: {df.shape}")
+    return df
+
+def create_visualizations(data=load_and_clean_data):
+    """Create and save the three dashboard charts.
+
+    ``data`` is a cleaned DataFrame or a provider returning one (by default
+    the dataset is read and cleaned here). pyplot and seaborn are imported
+    only now, so importing this module stays cheap.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    # Set style for better visualizations
+    plt.style.use('bmh')
+    sns.set_palette('husl')
+    
+    df = frame_of(data)
     
     # 1. Monthly Sales Trends
     plt.figure(figsize=(12, 6))
-    monthly_sales = df.groupby(df['InvoiceDate'].dt.to_period('M'))['Sales'].sum().reset_index()
-    monthly_sales['InvoiceDate'] = monthly_sales['InvoiceDate'].astype(str)
+    monthly_sales = df.groupby('MonthKey')['Sales'].sum().reset_index()
+    monthly_sales['InvoiceDate'] = month_labels(monthly_sales['MonthKey'])
     
     plt.plot(monthly_sales['InvoiceDate'], monthly_sales['Sales'], 
              marker='o', linewidth=2, markersize=8)
@@ -40,7 +56,7 @@ def create_visualizations():
     
     # 2. Best-selling Products
     plt.figure(figsize=(12, 6))
-    top_products = df.groupby('Description')['Sales'].sum().sort_values(ascending=True).tail(10)
+    top_products = top_k(df.groupby('Description', observed=True)['Sales'].sum(), 10)[::-1]
     
     plt.barh(y=range(len(top_products)), width=top_products.values,
             color=sns.color_palette('husl', 10))
@@ -55,7 +71,7 @@ def create_visualizations():
     
     # 3. Sales by Country
     plt.figure(figsize=(12, 6))
-    country_sales = df.groupby('Country')['Sales'].sum().sort_values(ascending=True)
+    country_sales = df.groupby('Country', observed=True)['Sales'].sum().sort_values(ascending=True)
     
     plt.barh(y=range(len(country_sales)), width=country_sales.values,
             color=sns.color_palette('husl', len(country_sales)))
@@ -1,31 +1,51 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
-import numpy as np
+import os
+import sys
 
-# Read and prepare the data
-print("Loading data...")
-df = pd.read_excel('Online Retail Data Set.xlsx')
-print(f"Initial data shape: {df.shape}")
+# Shared loaders live in the project root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from data_loader import LazyFrame, frame_of, read_retail_data
+from data_cleaning import clean_transactions
+from topk import top_k
+from period_keys import month_labels
 
-# Data preprocessing
-print("\nCleaning data...")
-df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'])
-df['Sales'] = df['Quantity'] * df['UnitPrice']
-df = df[~df['InvoiceNo'].astype(str).str.startswith('C')]  # Remove cancelled orders
-df = df[(df['Quantity'] > 0) & (df['UnitPrice'] > 0)]  # Remove negative quantities and prices
-print(f"Data shape after cleaning: {df.shape}")
+def load_and_clean_data():
+    """Read and clean the retail dataset"""
+    # Read and prepare the data
+    print("Loading data...")
+    df = read_retail_data()
+    print(f"Initial data shape: {df.shape}")
+    
+    # Data preprocessing
+    print("\nCleaning data...")
+    df = clean_transactions(df)  # Remove cancelled orders, non-positive quantities and prices
+    print(f"Data shape after cleaning: {df.shape}")
+    return df
+
+# Loaded on first use by a chart, so importing this module reads nothing
+sales_data = LazyFrame(load_and_clean_data)
 
-# Set style for better visualizations
-plt.style.use('bmh')
-sns.set_palette('husl')
+def pyplot():
+    """matplotlib.pyplot and seaborn with the dashboard style applied.
+
+    Both are imported on first use: seaborn (with scipy) and pyplot take
+    over a second to import, which callers that only want the data or the
+    aggregates should not pay.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    # Set style for better visualizations
+    plt.style.use('bmh')
+    sns.set_palette('husl')
+    return plt, sns
 
-def create_monthly_sales_trend():
+def create_monthly_sales_trend(data=sales_data):
     """Create and save monthly sales trends visualization"""
+    df = frame_of(data)
+    plt, sns = pyplot()
     plt.figure(figsize=(12, 6))
-    monthly_sales = df.groupby(df['InvoiceDate'].dt.to_period('M'))['Sales'].sum().reset_index()
-    monthly_sales['InvoiceDate'] = monthly_sales['InvoiceDate'].astype(str)
+    monthly_sales = df.groupby('MonthKey')['Sales'].sum().reset_index()
+    monthly_sales['InvoiceDate'] = month_labels(monthly_sales['MonthKey'])
     
     plt.plot(monthly_sales['InvoiceDate'], monthly_sales['Sales'], 
              marker='o', linewidth=2, markersize=8)
@@ -39,10 +59,12 @@ def create_monthly_sales_trend():
     plt.close()
     return monthly_sales
 
-def create_top_products():
+def create_top_products(data=sales_data):
     """Create and save top products visualization"""
+    df = frame_of(data)
+    plt, sns = pyplot()
     plt.figure(figsize=(12, 6))
-    top_products = df.groupby('Description')['Sales'].sum().sort_values(ascending=True).tail(10)
+    top_products = top_k(df.groupby('Description', observed=True)['Sales'].sum(), 10)[::-1]
     
     plt.barh(y=range(len(top_products)), width=top_products.values,
             color=sns.color_palette('husl', 10))
@@ -56,10 +78,12 @@ def create_top_products():
     plt.close()
     return top_products
 
-def create_country_sales():
+def create_country_sales(data=sales_data):
     """Create and save sales by country visualization"""
+    df = frame_of(data)
+    plt, sns = pyplot()
     plt.figure(figsize=(12, 6))
-    country_sales = df.groupby('Country')['Sales'].sum().sort_values(ascending=True)
+    country_sales = df.groupby('Country', observed=True)['Sales'].sum().sort_values(ascending=True)
     
     plt.barh(y=range(len(country_sales)), width=country_sales.values,
             color=sns.color_palette('husl', len(country_sales)))
@@ -19,84 +19,116 @@
 
 # %%
 # Import required libraries
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime
-import numpy as np
-
-# Set style for better visualizations
-plt.style.use('bmh')
-sns.set_palette('husl')
+import os
+import sys
+
+# Shared loaders live in the project root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from data_loader import LazyFrame, frame_of, read_retail_data
+from data_cleaning import clean_transactions
+from topk import top_k
+from period_keys import month_labels
+
+def pyplot():
+    """matplotlib.pyplot and seaborn with the dashboard style, imported on first use"""
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    # Set style for better visualizations
+    plt.style.use('bmh')
+    sns.set_palette('husl')
+    return plt, sns
 
 # %% [markdown]
 # ## Data Loading and Preprocessing
 
 # %%
-# Read and prepare the data
-print("Loading data...")
-df = pd.read_excel('Online Retail Data Set.xlsx')
-print(f"Initial data shape: {df.shape}")
-
-# Data preprocessing
-print("\nCleaning data...")
-df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'])
-df['Sales'] = df['Quantity'] * df['UnitPrice']
-df = df[~df['InvoiceNo'].astype(str).str.startswith('C')]  # Remove cancelled orders
-df = df[(df['Quantity'] > 0) & (df['UnitPrice'] > 0)]  # Remove negative quantities and prices
-print(f"Data shape after cleaning: {df.shape}")
+def load_and_clean_data():
+    """Read and clean the retail dataset"""
+    # Read and prepare the data
+    print("Loading data...")
+    df = read_retail_data()
+    print(f"Initial data shape: {df.shape}")
+    
+    # Data preprocessing
+    print("\nCleaning data...")
+    df = clean_transactions(df)  # Remove cancelled orders, non-positive quantities and prices
+    print(f"Data shape after cleaning: {df.shape}")
+    return df
+
+# Read on first use, so importing this script loads no data; the cells below
+# run their charts only when it is executed as a notebook or a script
+sales_data = LazyFrame(load_and_clean_data)
 
 # %% [markdown]
 # ## 1. Monthly Sales Trends
 
 # %%
-plt.figure(figsize=(12, 6))
-monthly_sales = df.groupby(df['InvoiceDate'].dt.to_period('M'))['Sales'].sum().reset_index()
-monthly_sales['InvoiceDate'] = monthly_sales['InvoiceDate'].astype(str)
-
-plt.plot(monthly_sales['InvoiceDate'], monthly_sales['Sales'], 
-         marker='o', linewidth=2, markersize=8)
-plt.title('Monthly Sales Trends', fontsize=14, pad=20)
-plt.xlabel('Month', fontsize=12)
-plt.ylabel('Total Sales (£)', fontsize=12)
-plt.xticks(rotation=45)
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.show()
+def plot_monthly_sales_trend(data=sales_data):
+    df = frame_of(data)
+    plt, sns = pyplot()
+    plt.figure(figsize=(12, 6))
+    monthly_sales = df.groupby('MonthKey')['Sales'].sum().reset_index()
+    monthly_sales['InvoiceDate'] = month_labels(monthly_sales['MonthKey'])
+    
+    plt.plot(monthly_sales['InvoiceDate'], monthly_sales['Sales'], 
+             marker='o', linewidth=2, markersize=8)
+    plt.title('Monthly Sales Trends', fontsize=14, pad=20)
+    plt.xlabel('Month', fontsize=12)
+    plt.ylabel('Total Sales (£)', fontsize=12)
+    plt.xticks(rotation=45)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.show()
+
+if __name__ == "__main__":
+    plot_monthly_sales_trend()
 
 # %% [markdown]
 # ## 2. Best-selling Products
 
 # %%
-plt.figure(figsize=(12, 6))
-top_products = df.groupby('Description')['Sales'].sum().sort_values(ascending=True).tail(10)
-
-plt.barh(y=range(len(top_products)), width=top_products.values,
-        color=sns.color_palette('husl', 10))
-plt.yticks(range(len(top_products)), top_products.index, fontsize=10)
-plt.title('Top 10 Best-selling Products by Sales', fontsize=14, pad=20)
-plt.xlabel('Total Sales (£)', fontsize=12)
-plt.ylabel('Product Description', fontsize=12)
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.show()
+def plot_top_products(data=sales_data):
+    df = frame_of(data)
+    plt, sns = pyplot()
+    plt.figure(figsize=(12, 6))
+    top_products = top_k(df.groupby('Description', observed=True)['Sales'].sum(), 10)[::-1]
+    
+    plt.barh(y=range(len(top_products)), width=top_products.values,
+            color=sns.color_palette('husl', 10))
+    plt.yticks(range(len(top_products)), top_products.index, fontsize=10)
+    plt.title('Top 10 Best-selling Products by Sales', fontsize=14, pad=20)
+    plt.xlabel('Total Sales (£)', fontsize=12)
+    plt.ylabel('Product Description', fontsize=12)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.show()
+
+if __name__ == "__main__":
+    plot_top_products()
 
 # %% [markdown]
 # ## 3. Sales by Country
 
 # %%
-plt.figure(figsize=(12, 6))
-country_sales = df.groupby('Country')['Sales'].sum().sort_values(ascending=True)
-
-plt.barh(y=range(len(country_sales)), width=country_sales.values,
-        color=sns.color_palette('husl', len(country_sales)))
-plt.yticks(range(len(country_sales)), country_sales.index, fontsize=10)
-plt.title('Total Sales by Country', fontsize=14, pad=20)
-plt.xlabel('Total Sales (£)', fontsize=12)
-plt.ylabel('Country', fontsize=12)
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.show()
+def plot_country_sales(data=sales_data):
+    df = frame_of(data)
+    plt, sns = pyplot()
+    plt.figure(figsize=(12, 6))
+    country_sales = df.groupby('Country', observed=True)['Sales'].sum().sort_values(ascending=True)
+    
+    plt.barh(y=range(len(country_sales)), width=country_sales.values,
+            color=sns.color_palette('husl', len(country_sales)))
+    plt.yticks(range(len(country_sales)), country_sales.index, fontsize=10)
+    plt.title('Total Sales by Country', fontsize=14, pad=20)
+    plt.xlabel('Total Sales (£)', fontsize=12)
+    plt.ylabel('Country', fontsize=12)
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.show()
+
+if __name__ == "__main__":
+    plot_country_sales()
 
 # %% [markdown]
 # ## Conclusion
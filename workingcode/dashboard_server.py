@@ -0,0 +1,359 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pandas as pd
+
+# Shared loaders live in the project root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from rollup import SalesRollup
+from filter_engine import FilterEngine
+from distinct_count import count_distinct, format_count
+import interactive_sales_dashboard as dashboard
+
+DEFAULT_PORT = 8050
+SLICE_CACHE_SIZE = 128
+FIGURE_CACHE_SIZE = 512
+
+# Figure endpoints and the dashboard builders behind them
+FIGURES = {
+    'trend': dashboard.create_monthly_sales_trend,
+    'products': dashboard.create_top_products_chart,
+    'countries': dashboard.create_country_sales_map,
+    'seasonal': dashboard.create_seasonal_analysis,
+    'customers': dashboard.create_customer_analysis,
+}
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Sales Dashboard</title>
+<script src="/plotly.js"></script>
+<style>body{font-family:sans-serif;margin:1em} .chart{height:480px} label{margin-right:1em}</style>
+</head><body>
+<h1>Sales Dashboard</h1>
+<form id="filters">
+<label>From <input type="date" name="start"></label>
+<label>To <input type="date" name="end"></label>
+<label>Country <select name="country"><option value="">All</option></select></label>
+<label>Product <input name="product" list="products" size="40"></label>
+<datalist id="products"></datalist>
+<label>Trend <select name="granularity"><option>month</option><option>day</option>
+<option>hour</option><option>transaction</option></select></label>
+<label>Customers <select name="distinct"><option value="">Exact</option>
+<option value="approx">Approximate</option></select></label>
+</form>
+<pre id="metrics"></pre>
+<div id="trend" class="chart"></div><div id="products" class="chart"></div>
+<div id="countries" class="chart"></div><div id="seasonal" class="chart"></div>
+<div id="customers" class="chart"></div>
+<script>
+var form = document.getElementById('filters');
+function query() {
+  var params = new URLSearchParams();
+  new FormData(form).forEach(function (value, key) { if (value) { params.set(key, value); } });
+  return params.toString();
+}
+function refresh() {
+  var q = query();
+  fetch('/api/metrics?' + q).then(function (r) { return r.json(); }).then(function (m) {
+    document.getElementById('metrics').textContent = JSON.stringify(m, null, 2);
+  });
+  ['trend', 'products', 'countries', 'seasonal', 'customers'].forEach(function (name) {
+    fetch('/api/figure/' + name + '?' + q).then(function (r) { return r.json(); }).then(function (fig) {
+      if (fig.error) { document.getElementById(name).textContent = fig.error; return; }
+      Plotly.react(name, fig.data, fig.layout, {responsive: true, displayModeBar: false});
+    });
+  });
+}
+fetch('/api/options').then(function (r) { return r.json(); }).then(function (o) {
+  var select = form.elements.country;
+  o.countries.forEach(function (c) { select.add(new Option(c, c)); });
+  var list = document.getElementById('products');
+  o.products.forEach(function (p) { var opt = document.createElement('option'); opt.value = p; list.appendChild(opt); });
+  form.elements.start.value = o.start; form.elements.end.value = o.end;
+  refresh();
+});
+form.addEventListener('change', refresh);
+</script>
+</body></html>
+"""
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss counters"""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key, compute):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+        # Computed outside the lock so other requests are not blocked meanwhile
+        value = compute()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return value
+
+
+class DashboardData:
+    """Cleaned transactions loaded once, with cached aggregate slices per filter"""
+
+    def __init__(self, df, slice_cache_size=SLICE_CACHE_SIZE, figure_cache_size=FIGURE_CACHE_SIZE):
+        # Date-sorted rows with per-country/per-product position indexes (replaces the input frame)
+        self.engine = FilterEngine(df)
+        self.df = self.engine.frame
+        self.slices = LRUCache(slice_cache_size)
+        self.figures = LRUCache(figure_cache_size)
+        days = self.engine.dates[[0, -1]].astype('datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+        self.first_day, self.last_day = int(days[0]), int(days[1])
+        self._overall = None
+        self._overall_lock = threading.Lock()
+
+    def options(self):
+        """Filter choices for the page controls"""
+        return {
+            'countries': sorted(self.df['Country'].cat.categories.astype(str)),
+            'products': sorted(self.df['Description'].cat.categories.astype(str)),
+            'start': self.df['InvoiceDate'].min().strftime('%Y-%m-%d'),
+            'end': self.df['InvoiceDate'].max().strftime('%Y-%m-%d'),
+        }
+
+    def filter_key(self, params):
+        """Normalized filter tuple ``(start_day, end_day, country, product)`` used as cache key"""
+        key = []
+        for name in ('start', 'end'):
+            value = params.get(name)
+            key.append(int(pd.Timestamp(value).value // 86_400_000_000_000) if value else None)
+        key.extend(params.get(name) or None for name in ('country', 'product'))
+        return tuple(key)
+
+    def _select(self, key):
+        start_day, end_day, country, product = key
+        start = None if start_day is None else pd.Timestamp(start_day, unit='D')
+        # The end date is inclusive: stop at midnight of the following day
+        stop = None if end_day is None else pd.Timestamp(end_day + 1, unit='D')
+        return self.engine.rows(start, stop, Country=country, Description=product)
+
+    def rollup(self, key):
+        """Aggregate slice for a filter key, served from the LRU cache when possible"""
+        def compute():
+            subset = self._select(key)
+            if subset.empty:
+                raise LookupError('No sales match the selected filters')
+            return SalesRollup.from_frame(subset)
+        return self.slices.get_or_compute(key, compute)
+
+    def overall(self):
+        """Rollup of all rows, whose per (month, country) distinct-count summaries serve any filter"""
+        with self._overall_lock:
+            if self._overall is None:
+                self._overall = SalesRollup.from_frame(self.df)
+        return self._overall
+
+    def whole_months(self, key):
+        """``[start, stop)`` month keys equivalent to the date filter of ``key``, or None if it cuts a month"""
+        start_day, end_day = key[:2]
+        bounds = [-2 ** 31, 2 ** 31 - 1]
+        # A bound outside the data cuts nothing; one inside must fall on a month boundary
+        for i, day in ((0, start_day), (1, None if end_day is None else end_day + 1)):
+            if day is None or (i == 0 and day <= self.first_day) or (i == 1 and day > self.last_day):
+                continue
+            month = np.datetime64(day, 'D').astype('datetime64[M]')
+            if month.astype('datetime64[D]').astype(np.int64) != day:
+                return None
+            bounds[i] = int(month.astype(np.int64))
+        return tuple(bounds)
+
+    def distinct_customers(self, params):
+        """Distinct customers under the filters in ``params`` as ``(value, standard_error)``.
+
+        Whole-month date ranges and countries are answered from the
+        per-group bitsets of the full data, or its HyperLogLog sketches with
+        ``distinct=approx``; a product filter or a partial month counts the
+        filtered slice exactly.
+        """
+        key = self.filter_key(params)
+        months = self.whole_months(key)
+        if months is None or key[3] is not None:
+            return count_distinct(self.rollup(key).invoices['CustomerID']), 0.0
+        return self.overall().distinct_customers(months, key[2], approximate=params.get('distinct') == 'approx')
+
+    def figure_json(self, name, params):
+        """Serialized figure for ``name`` under the filters in ``params``"""
+        key = self.filter_key(params)
+        granularity = params.get('granularity', 'month') if name == 'trend' else None
+
+        def compute():
+            rollup = self.rollup(key)
+            if granularity is not None:
+                return FIGURES[name](rollup, granularity).to_json()
+            return FIGURES[name](rollup).to_json()
+        return self.figures.get_or_compute((name, granularity, key), compute)
+
+    def metrics(self, params):
+        metrics = self.rollup(self.filter_key(params)).key_metrics()
+        metrics = {name: value.item() if hasattr(value, 'item') else value for name, value in metrics.items()}
+        metrics['distinct_customers'] = format_count(*self.distinct_customers(params))
+        return metrics
+
+
+def make_handler(data):
+    """Request handler class bound to a :class:`DashboardData`"""
+    import plotly.graph_objects as go
+    from plotly.offline import get_plotlyjs
+    plotlyjs = get_plotlyjs().encode('utf-8')
+    # plotly imports its JSON engine (orjson) on first use; serialize once here so
+    # concurrent first requests never see a partially initialized module
+    go.Figure().to_json()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body, content_type='application/json'):
+            if isinstance(body, str):
+                body = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            params = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+            try:
+                if url.path == '/':
+                    self._send(200, PAGE, 'text/html; charset=utf-8')
+                elif url.path == '/plotly.js':
+                    self._send(200, plotlyjs, 'application/javascript')
+                elif url.path == '/api/options':
+                    self._send(200, json.dumps(data.options()))
+                elif url.path == '/api/metrics':
+                    self._send(200, json.dumps(data.metrics(params), default=str))
+                elif url.path.startswith('/api/figure/') and url.path[12:] in FIGURES:
+                    self._send(200, data.figure_json(url.path[12:], params))
+                else:
+                    self._send(404, json.dumps({'error': 'Not found'}))
+            except (LookupError, ValueError) as e:
+                self._send(400, json.dumps({'error': str(e)}))
+            except Exception as e:
+                self._send(500, json.dumps({'error': str(e)}))
+
+    return Handler
+
+
+def serve(data, port=DEFAULT_PORT, host='127.0.0.1'):
+    """Create (but do not start) the threaded dashboard server"""
+    return ThreadingHTTPServer((host, port), make_handler(data))
+
+
+def load_test(base_url, options, users=8, requests_per_user=40, filter_pool=20, seed=0):
+    """Simulate concurrent users changing filters; returns latency percentiles in milliseconds.
+
+    Each user draws filters from a shared pool of ``filter_pool`` combinations,
+    so repeated interactions (and different users picking the same view) are
+    represented as they would be in practice.
+    """
+    rng = random.Random(seed)
+    days = pd.date_range(options['start'], options['end'], freq='D').strftime('%Y-%m-%d')
+    pool = []
+    for _ in range(filter_pool):
+        start, end = sorted(rng.sample(list(days), 2))
+        filters = {'start': start, 'end': end}
+        if rng.random() < 0.5:
+            filters['country'] = rng.choice(options['countries'])
+        if rng.random() < 0.2:
+            filters['product'] = rng.choice(options['products'])
+        pool.append(filters)
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def user(user_seed):
+        user_rng = random.Random(user_seed)
+        for _ in range(requests_per_user):
+            path = f"/api/figure/{user_rng.choice(list(FIGURES))}?{urllib.parse.urlencode(user_rng.choice(pool))}"
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base_url + path) as response:
+                    response.read()
+            except urllib.error.HTTPError as e:
+                if e.code != 400:
+                    with lock:
+                        errors.append(e.code)
+            except OSError as e:
+                # Refused connections and timeouts (URLError and socket errors) count as failed requests
+                with lock:
+                    errors.append(type(e).__name__)
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=user, args=(seed + i,)) for i in range(users)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - start
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'requests_per_second': len(latencies) / wall,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve the interactive sales dashboard')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--load-test', action='store_true',
+                        help='Run a simulated multi-user load test with and without the slice cache, then exit')
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=40, help='Requests per simulated user')
+    args = parser.parse_args()
+
+    df = dashboard.load_and_clean_data()
+    if not args.load_test:
+        server = serve(DashboardData(df), args.port)
+        print(f"Dashboard running on http://127.0.0.1:{args.port}/ (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+    else:
+        for label, cache_size in (("Without cache", 0), ("With LRU cache", None)):
+            data = DashboardData(df) if cache_size is None else DashboardData(df, cache_size, cache_size)
+            server = serve(data, 0)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            results = load_test(f'http://127.0.0.1:{server.server_address[1]}', data.options(),
+                                users=args.users, requests_per_user=args.requests)
+            server.shutdown()
+            server.server_close()
+            print(f"\n{label}:")
+            for key, value in results.items():
+                print(f"  {key}: {value:.1f}" if isinstance(value, float) else f"  {key}: {value}")
+            print(f"  slice cache hits/misses: {data.slices.hits}/{data.slices.misses}")
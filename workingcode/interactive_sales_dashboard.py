@@ -1,54 +1,74 @@
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 from datetime import datetime
+import os
+import sys
+
+# Shared loaders live in the project root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from data_loader import read_retail_data
+from data_cleaning import clean_transactions
+from period_keys import calendar_month
+from rollup import ensure_rollup
+from downsample import DEFAULT_MAX_POINTS, downsample_positions
+
+# Rollup view, x-axis title and chart title behind each trend granularity
+TREND_VIEWS = {
+    'month': ('monthly_sales', 'Month', 'Monthly Sales Trends with Trend Line'),
+    'day': ('daily_sales', 'Date', 'Daily Sales Trends with Trend Line'),
+    'hour': ('hourly_sales', 'Hour', 'Hourly Sales Trends with Trend Line'),
+    'transaction': ('invoice_sales', 'Invoice Date', 'Sales per Transaction with Trend Line'),
+}
 
 def load_and_clean_data():
     """Load and clean the retail dataset"""
     print("Loading data...")
-    df = pd.read_excel('Online Retail Data Set.xlsx')
+    df = read_retail_data()
     print(f"Initial data shape: {df.shape}")
     
     print("\nCleaning data...")
-    # Convert date and create sales column
-    df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'])
-    df['Sales'] = df['Quantity'] * df['UnitPrice']
-    
-    # Remove cancelled orders and invalid entries
-    df = df[~df['InvoiceNo'].astype(str).str.startswith('C')]
-    df = df[(df['Quantity'] > 0) & (df['UnitPrice'] > 0)]
+    # Remove cancelled orders and invalid entries, apply the typed schema and add Sales
+    report = {}
+    df = clean_transactions(df, report=report, track_memory=True)
+    for rule, count in report['rows_dropped'].items():
+        print(f"  Dropped by {rule}: {count:,}")
+    print(f"  Cleaning peak memory: {report['peak_memory_mb']:.1f} MB")
     
     # Add month and year columns for analysis
-    df['Month'] = df['InvoiceDate'].dt.month
-    df['Year'] = df['InvoiceDate'].dt.year
-    df['YearMonth'] = df['InvoiceDate'].dt.strftime('%Y-%m')
+    df['Month'] = calendar_month(df['MonthKey'])
+    df['Year'] = df['MonthKey'] // 12 + 1970
     
     print(f"Data shape after cleaning: {df.shape}")
     return df
 
-def create_monthly_sales_trend(df):
-    """Create interactive monthly sales trend visualization"""
-    monthly_sales = df.groupby('YearMonth')['Sales'].sum().reset_index()
+def create_monthly_sales_trend(data, granularity='month', max_points=DEFAULT_MAX_POINTS):
+    """Create interactive sales trend visualization ('month', 'day', 'hour' or 'transaction')"""
+    view, x_title, title = TREND_VIEWS[granularity]
+    sales = getattr(ensure_rollup(data), view)()
+    
+    # The trend is fitted on every point; only the drawn traces are downsampled
+    z = np.polyfit(np.arange(len(sales)), sales.to_numpy(dtype=float), 1 if len(sales) > 1 else 0)
+    p = np.poly1d(z)
+    positions = downsample_positions(sales, max_points, method='minmax')
+    sales = sales.iloc[positions]
     
     fig = go.Figure()
     
     # Add lines and markers
     fig.add_trace(go.Scatter(
-        x=monthly_sales['YearMonth'],
-        y=monthly_sales['Sales'],
-        mode='lines+markers',
-        name='Monthly Sales',
-        hovertemplate='Month: %{x}<br>Sales: £%{y:,.2f}<extra></extra>'
+        x=sales.index,
+        y=sales.values,
+        mode='lines+markers' if len(sales) <= 100 else 'lines',
+        name='Sales',
+        hovertemplate=x_title + ': %{x}<br>Sales: £%{y:,.2f}<extra></extra>'
     ))
     
     # Add trend line
-    z = np.polyfit(range(len(monthly_sales)), monthly_sales['Sales'], 1)
-    p = np.poly1d(z)
     fig.add_trace(go.Scatter(
-        x=monthly_sales['YearMonth'],
-        y=p(range(len(monthly_sales))),
+        x=sales.index,
+        y=p(positions),
         mode='lines',
         name='Trend',
         line=dict(dash='dash'),
@@ -56,8 +76,8 @@ def create_monthly_sales_trend(df):
     ))
     
     fig.update_layout(
-        title='Monthly Sales Trends with Trend Line',
-        xaxis_title='Month',
+        title=title,
+        xaxis_title=x_title,
         yaxis_title='Total Sales (£)',
         hovermode='x unified',
         showlegend=True
@@ -65,9 +85,9 @@ def create_monthly_sales_trend(df):
     
     return fig
 
-def create_top_products_chart(df):
+def create_top_products_chart(data):
     """Create interactive top products visualization"""
-    top_products = df.groupby('Description')['Sales'].sum().sort_values(ascending=True).tail(10)
+    top_products = ensure_rollup(data).top_products(10)[::-1]
     
     fig = go.Figure(go.Bar(
         x=top_products.values,
@@ -88,9 +108,9 @@ def create_top_products_chart(df):
     
     return fig
 
-def create_country_sales_map(df):
+def create_country_sales_map(data):
     """Create interactive sales by country visualization"""
-    country_sales = df.groupby('Country')['Sales'].sum().reset_index()
+    country_sales = ensure_rollup(data).country_sales().reset_index()
     
     fig = px.choropleth(
         country_sales,
@@ -110,12 +130,13 @@ def create_country_sales_map(df):
     
     return fig
 
-def create_seasonal_analysis(df):
+def create_seasonal_analysis(data):
     """Create interactive seasonal analysis visualization"""
-    monthly_avg = df.groupby('Month')['Sales'].mean().reset_index()
+    monthly_avg = ensure_rollup(data).calendar_month_average().reset_index()
     month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
                    'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-    monthly_avg['MonthName'] = month_names
+    # Filtered slices may cover only some calendar months
+    monthly_avg['MonthName'] = [month_names[month - 1] for month in monthly_avg['Month']]
     
     fig = go.Figure(go.Bar(
         x=monthly_avg['MonthName'],
@@ -135,9 +156,9 @@ def create_seasonal_analysis(df):
     
     return fig
 
-def create_customer_analysis(df):
+def create_customer_analysis(data):
     """Create interactive customer analysis visualization"""
-    customer_orders = df.groupby('CustomerID')['InvoiceNo'].nunique()
+    customer_orders = ensure_rollup(data).orders_per_customer()
     
     fig = go.Figure(go.Histogram(
         x=customer_orders,
@@ -155,15 +176,6 @@ def create_customer_analysis(df):
     
     return fig
 
-def calculate_key_metrics(df):
-    """Calculate key business metrics"""
-    metrics = {
-        'total_sales': df['Sales'].sum(),
-        'total_orders': df['InvoiceNo'].nunique(),
-        'total_customers': df['CustomerID'].nunique(),
-        'total_products': df['Description'].nunique(),
-        'avg_order_value': df.groupby('InvoiceNo')['Sales'].sum().mean(),
-        'top_country': df.groupby('Country')['Sales'].sum().idxmax(),
-        'top_product': df.groupby('Description')['Sales'].sum().idxmax()
-    }
-    return metrics
+def calculate_key_metrics(data, workers=1):
+    """Calculate key business metrics (``workers > 1`` aggregates a frame in parallel)"""
+    return dict(ensure_rollup(data, workers).key_metrics())
@@ -1,180 +1,239 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from datetime import datetime
+import argparse
+import os
+import sys
+
+# Shared loaders live in the project root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from data_loader import read_retail_data
+from data_cleaning import clean_transactions
+from topk import top_k
+from period_keys import calendar_month, month_labels
+from figure_cache import FigureCache, code_digest
+from distinct_count import count_distinct
+from mpl_render import LAYOUTS, REPORT_DPIS, render_png, render_pngs, render_report, report_lines
+
+PLOT_STYLE = 'bmh'
+PNG_DPI = 300
+FIGURE_CACHE_DIR = '.figure_cache'
+
+# Reusable figure templates: size, plus the subplot margins the fixed layout keeps
+TEMPLATES = {
+    'trend': {'figsize': (15, 7), 'margins': {'left': 0.07, 'right': 0.98, 'bottom': 0.16, 'top': 0.88}},
+    # Wide left margin for long product descriptions
+    'bars': {'figsize': (15, 8), 'margins': {'left': 0.25, 'right': 0.98, 'bottom': 0.08, 'top': 0.9}},
+    'medium': {'figsize': (12, 6), 'margins': {'left': 0.09, 'right': 0.98, 'bottom': 0.1, 'top': 0.88}},
+}
+
+def apply_style():
+    """Plot style used by every chart; runs in each render worker too"""
+    plt.style.use(PLOT_STYLE)
+    sns.set_palette('husl')
+
+def chart_job(filename, data, plot, template, dpi=PNG_DPI, layout='tight'):
+    return {'path': filename, 'data': data, 'plot': plot, 'template': (template, TEMPLATES[template]),
+            'dpi': dpi, 'layout': layout}
+
+def chart_spec(job):
+    """Figure cache spec of a render job: everything besides the data that shapes the PNG"""
+    return {'plot': job['plot'].__name__, 'plot_code': code_digest(job['plot']), 'template': job['template'],
+            'dpi': job['dpi'], 'layout': job['layout'], 'style': PLOT_STYLE}
+
+def save_cached_png(cache, filename, data, plot, template, dpi=PNG_DPI, layout='tight'):
+    """Draw ``plot(ax, data)`` on a template and save it as ``filename`` unless the figure cache already holds it"""
+    job = chart_job(filename, data, plot, template, dpi, layout)
+    if cache is None:
+        render_png(job)
+        return False
+    return cache.render(filename, data, chart_spec(job), lambda: render_png(job), [filename])
 
 def load_and_clean_data():
     """Load and clean the retail dataset"""
     print("Loading data...")
-    df = pd.read_excel('Online Retail Data Set.xlsx')
+    df = read_retail_data()
     print(f"Initial data shape: {df.shape}")
     
     print("\nCleaning data...")
-    # Convert date and create sales column
-    df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'])
-    df['Sales'] = df['Quantity'] * df['UnitPrice']
-    
-    # Remove cancelled orders and invalid entries
-    df = df[~df['InvoiceNo'].astype(str).str.startswith('C')]
-    df = df[(df['Quantity'] > 0) & (df['UnitPrice'] > 0)]
+    # Remove cancelled orders and invalid entries, apply the typed schema and add Sales
+    report = {}
+    df = clean_transactions(df, report=report, track_memory=True)
+    for rule, count in report['rows_dropped'].items():
+        print(f"  Dropped by {rule}: {count:,}")
+    print(f"  Cleaning peak memory: {report['peak_memory_mb']:.1f} MB")
     
     # Add month and year columns for analysis
-    df['Month'] = df['InvoiceDate'].dt.month
-    df['Year'] = df['InvoiceDate'].dt.year
+    df['Month'] = calendar_month(df['MonthKey'])
+    df['Year'] = df['MonthKey'] // 12 + 1970
     
     print(f"Data shape after cleaning: {df.shape}")
     return df
 
-def create_monthly_trends(df):
-    """Create monthly sales trends visualization"""
-    plt.figure(figsize=(15, 7))
-    monthly_sales = df.groupby(df['InvoiceDate'].dt.to_period('M'))['Sales'].sum().reset_index()
-    monthly_sales['InvoiceDate'] = monthly_sales['InvoiceDate'].astype(str)
-    
+def plot_monthly_trends(ax, monthly_sales):
+    """Draw monthly sales with a linear trend line"""
     # Plot with trend line
-    plt.plot(monthly_sales['InvoiceDate'], monthly_sales['Sales'], 
-             marker='o', linewidth=2, markersize=8, label='Monthly Sales')
+    ax.plot(monthly_sales['InvoiceDate'], monthly_sales['Sales'], 
+            marker='o', linewidth=2, markersize=8, label='Monthly Sales')
     
     # Add trend line
     z = np.polyfit(range(len(monthly_sales)), monthly_sales['Sales'], 1)
     p = np.poly1d(z)
-    plt.plot(range(len(monthly_sales)), p(range(len(monthly_sales))), 
-             "r--", alpha=0.8, label='Trend Line')
-    
-    plt.title('Monthly Sales Trends with Trend Line', fontsize=14, pad=20)
-    plt.xlabel('Month', fontsize=12)
-    plt.ylabel('Total Sales (£)', fontsize=12)
-    plt.xticks(rotation=45)
-    plt.grid(True, alpha=0.3)
-    plt.legend()
-    plt.tight_layout()
-    plt.savefig('monthly_sales_trends.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-def create_top_products(df):
+    ax.plot(range(len(monthly_sales)), p(range(len(monthly_sales))), 
+            "r--", alpha=0.8, label='Trend Line')
+    
+    ax.set_title('Monthly Sales Trends with Trend Line', fontsize=14, pad=20)
+    ax.set_xlabel('Month', fontsize=12)
+    ax.set_ylabel('Total Sales (£)', fontsize=12)
+    ax.tick_params(axis='x', labelrotation=45)
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+
+def monthly_trends_data(df):
+    monthly_sales = df.groupby('MonthKey')['Sales'].sum().reset_index()
+    monthly_sales['InvoiceDate'] = month_labels(monthly_sales['MonthKey'])
+    return monthly_sales
+
+def create_monthly_trends(df, cache=None):
+    """Create monthly sales trends visualization"""
+    return save_cached_png(cache, 'monthly_sales_trends.png', monthly_trends_data(df), plot_monthly_trends, 'trend')
+
+def plot_sales_bars(ax, sales, title, ylabel):
+    """Draw sales as horizontal bars, each labelled with its value"""
+    bars = ax.barh(y=range(len(sales)), width=sales.values,
+                   color=sns.color_palette('husl', len(sales)))
+    
+    # Label all bars in one call instead of one text artist per loop iteration
+    ax.bar_label(bars, labels=[f'£{value:,.0f}' for value in sales.values], padding=2, fontsize=10)
+    # Leave room inside the axes for the labels of the longest bars
+    ax.margins(x=0.12)
+    
+    ax.set_yticks(range(len(sales)), sales.index, fontsize=10)
+    ax.set_title(title, fontsize=14, pad=20)
+    ax.set_xlabel('Total Sales (£)', fontsize=12)
+    ax.set_ylabel(ylabel, fontsize=12)
+    ax.grid(True, alpha=0.3)
+
+def plot_top_products(ax, top_products):
+    """Draw the best-selling products as horizontal bars"""
+    plot_sales_bars(ax, top_products, 'Top 10 Best-selling Products by Sales', 'Product Description')
+
+def top_products_data(df):
+    return top_k(df.groupby('Description', observed=True)['Sales'].sum(), 10)[::-1]
+
+def create_top_products(df, cache=None):
     """Create best-selling products visualization"""
-    plt.figure(figsize=(15, 8))
-    top_products = df.groupby('Description')['Sales'].sum().sort_values(ascending=True).tail(10)
-    
-    # Create horizontal bar chart
-    bars = plt.barh(y=range(len(top_products)), width=top_products.values,
-                   color=sns.color_palette('husl', 10))
-    
-    # Add value labels
-    for i, bar in enumerate(bars):
-        width = bar.get_width()
-        plt.text(width, bar.get_y() + bar.get_height()/2, 
-                f'£{width:,.0f}', 
-                ha='left', va='center', fontsize=10)
-    
-    plt.yticks(range(len(top_products)), top_products.index, fontsize=10)
-    plt.title('Top 10 Best-selling Products by Sales', fontsize=14, pad=20)
-    plt.xlabel('Total Sales (£)', fontsize=12)
-    plt.ylabel('Product Description', fontsize=12)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('top_products.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-def create_country_analysis(df):
+    return save_cached_png(cache, 'top_products.png', top_products_data(df), plot_top_products, 'bars')
+
+def plot_country_analysis(ax, country_sales):
+    """Draw sales per country as horizontal bars"""
+    plot_sales_bars(ax, country_sales, 'Total Sales by Country', 'Country')
+
+def country_analysis_data(df):
+    return df.groupby('Country', observed=True)['Sales'].sum().sort_values(ascending=True)
+
+def create_country_analysis(df, cache=None):
     """Create sales by country visualization"""
-    plt.figure(figsize=(15, 8))
-    country_sales = df.groupby('Country')['Sales'].sum().sort_values(ascending=True)
-    
-    # Create horizontal bar chart
-    bars = plt.barh(y=range(len(country_sales)), width=country_sales.values,
-                   color=sns.color_palette('husl', len(country_sales)))
-    
-    # Add value labels
-    for i, bar in enumerate(bars):
-        width = bar.get_width()
-        plt.text(width, bar.get_y() + bar.get_height()/2, 
-                f'£{width:,.0f}', 
-                ha='left', va='center', fontsize=10)
-    
-    plt.yticks(range(len(country_sales)), country_sales.index, fontsize=10)
-    plt.title('Total Sales by Country', fontsize=14, pad=20)
-    plt.xlabel('Total Sales (£)', fontsize=12)
-    plt.ylabel('Country', fontsize=12)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('sales_by_country.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-def create_seasonal_analysis(df):
-    """Create seasonal sales analysis visualization"""
-    plt.figure(figsize=(12, 6))
-    monthly_avg = df.groupby('Month')['Sales'].mean()
-    
+    return save_cached_png(cache, 'sales_by_country.png', country_analysis_data(df), plot_country_analysis, 'bars')
+
+def plot_seasonal_analysis(ax, monthly_avg):
+    """Draw average sales per calendar month"""
     # Create bar chart with average monthly sales
-    bars = plt.bar(range(1, 13), monthly_avg.values, 
+    bars = ax.bar(range(1, 13), monthly_avg.values, 
                   color=sns.color_palette('husl', 12))
-    
-    # Add value labels
-    for bar in bars:
-        height = bar.get_height()
-        plt.text(bar.get_x() + bar.get_width()/2, height,
-                f'£{height:,.0f}',
-                ha='center', va='bottom', fontsize=10)
-    
-    plt.title('Average Sales by Month (Seasonal Analysis)', fontsize=14, pad=20)
-    plt.xlabel('Month', fontsize=12)
-    plt.ylabel('Average Sales (£)', fontsize=12)
-    plt.xticks(range(1, 13), ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
-                              'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('seasonal_analysis.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-def create_customer_analysis(df):
-    """Create customer analysis visualization"""
-    plt.figure(figsize=(12, 6))
-    
-    # Calculate orders per customer
-    customer_orders = df.groupby('CustomerID')['InvoiceNo'].nunique()
-    
+    ax.bar_label(bars, labels=[f'£{value:,.0f}' for value in monthly_avg.values], fontsize=10)
+    
+    ax.set_title('Average Sales by Month (Seasonal Analysis)', fontsize=14, pad=20)
+    ax.set_xlabel('Month', fontsize=12)
+    ax.set_ylabel('Average Sales (£)', fontsize=12)
+    ax.set_xticks(range(1, 13), ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
+                                 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'])
+    ax.grid(True, alpha=0.3)
+
+def seasonal_analysis_data(df):
+    return df.groupby('Month')['Sales'].mean()
+
+def create_seasonal_analysis(df, cache=None):
+    """Create seasonal sales analysis visualization"""
+    return save_cached_png(cache, 'seasonal_analysis.png', seasonal_analysis_data(df), plot_seasonal_analysis, 'medium')
+
+def plot_customer_analysis(ax, customer_orders):
+    """Draw the distribution of orders per customer"""
     # Create histogram of orders per customer
-    plt.hist(customer_orders, bins=30, color='skyblue', edgecolor='black')
-    plt.title('Distribution of Orders per Customer', fontsize=14, pad=20)
-    plt.xlabel('Number of Orders', fontsize=12)
-    plt.ylabel('Number of Customers', fontsize=12)
-    plt.grid(True, alpha=0.3)
-    plt.tight_layout()
-    plt.savefig('customer_analysis.png', dpi=300, bbox_inches='tight')
-    plt.close()
-
-def main():
-    # Set style for better visualizations
-    plt.style.use('bmh')
-    sns.set_palette('husl')
-    
+    ax.hist(customer_orders, bins=30, color='skyblue', edgecolor='black')
+    ax.set_title('Distribution of Orders per Customer', fontsize=14, pad=20)
+    ax.set_xlabel('Number of Orders', fontsize=12)
+    ax.set_ylabel('Number of Customers', fontsize=12)
+    ax.grid(True, alpha=0.3)
+
+def customer_analysis_data(df):
+    # Calculate orders per customer
+    return df.groupby('CustomerID')['InvoiceNo'].nunique()
+
+def create_customer_analysis(df, cache=None):
+    """Create customer analysis visualization"""
+    return save_cached_png(cache, 'customer_analysis.png', customer_analysis_data(df), plot_customer_analysis, 'medium')
+
+# (output file, data preparation, plot, template) of every chart, in render order
+CHARTS = [
+    ('monthly_sales_trends.png', monthly_trends_data, plot_monthly_trends, 'trend'),
+    ('top_products.png', top_products_data, plot_top_products, 'bars'),
+    ('sales_by_country.png', country_analysis_data, plot_country_analysis, 'bars'),
+    ('seasonal_analysis.png', seasonal_analysis_data, plot_seasonal_analysis, 'medium'),
+    ('customer_analysis.png', customer_analysis_data, plot_customer_analysis, 'medium'),
+]
+
+def chart_jobs(df, dpi=PNG_DPI, layout='tight'):
+    """Render jobs (see ``mpl_render.render_png``) of every chart"""
+    return [chart_job(filename, prepare(df), plot, template, dpi, layout)
+            for filename, prepare, plot, template in CHARTS]
+
+def main(workers=1, layout='tight', dpi=PNG_DPI):
     # Load and clean data
     df = load_and_clean_data()
     
-    # Create all visualizations
+    # Create all visualizations; PNGs whose data and plot code are unchanged come from the figure cache,
+    # the rest are rendered with the Agg backend, over a process pool when workers > 1
     print("\nCreating visualizations...")
-    create_monthly_trends(df)
-    create_top_products(df)
-    create_country_analysis(df)
-    create_seasonal_analysis(df)
-    create_customer_analysis(df)
+    cache = FigureCache(FIGURE_CACHE_DIR)
+    jobs = chart_jobs(df, dpi, layout)
+    keys = {job['path']: cache.key(job['data'], chart_spec(job)) for job in jobs}
+    stale = [job for job in jobs if not cache.lookup(job['path'], keys[job['path']], [job['path']])]
+    for result in render_pngs(stale, workers, setup=apply_style):
+        cache.store(result['path'], keys[result['path']], [result['path']])
+        print(f"  Rendered {result['path']} in {result['seconds']:.2f}s ({result['bytes'] / 1024:,.0f} KB)")
+    cache.evict()
     
     print("All visualizations have been created and saved as PNG files.")
+    print("\n".join(cache.summary()))
     
     # Return some key statistics
+    # Distinct counts read the categorical codes instead of hashing every value
     stats = {
         'total_sales': df['Sales'].sum(),
-        'total_orders': df['InvoiceNo'].nunique(),
-        'total_customers': df['CustomerID'].nunique(),
-        'total_products': df['Description'].nunique(),
-        'avg_order_value': df.groupby('InvoiceNo')['Sales'].sum().mean()
+        'total_orders': count_distinct(df['InvoiceNo']),
+        'total_customers': count_distinct(df['CustomerID']),
+        'total_products': count_distinct(df['Description']),
+        'avg_order_value': df.groupby('InvoiceNo', observed=True)['Sales'].sum().mean()
     }
     return stats
 
 if __name__ == "__main__":
-    stats = main()
+    parser = argparse.ArgumentParser(description='Render the enhanced sales analysis PNG charts')
+    parser.add_argument('--workers', type=int, default=1, help='Render processes for the charts')
+    parser.add_argument('--layout', choices=LAYOUTS, default='tight',
+                        help="'fixed' keeps the template margins and skips the tight bounding-box pass")
+    parser.add_argument('--dpi', type=int, default=PNG_DPI)
+    parser.add_argument('--report', action='store_true',
+                        help='Only report per-chart render time and file size at dpi 150 and 300 in both layouts')
+    args = parser.parse_args()
+
+    if args.report:
+        rows = render_report(chart_jobs(load_and_clean_data()), REPORT_DPIS, setup=apply_style)
+        print("\n".join(report_lines(rows)))
+        sys.exit(0)
+    stats = main(args.workers, args.layout, args.dpi)
     print("\nKey Statistics:")
     print(f"Total Sales: £{stats['total_sales']:,.2f}")
     print(f"Total Orders: {stats['total_orders']:,}")
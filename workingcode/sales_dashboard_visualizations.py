@@ -1,26 +1,31 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 from datetime import datetime
 import numpy as np
+import os
+import sys
+
+# Shared loaders live in the project root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+from data_loader import read_retail_data
+from data_cleaning import clean_transactions
+from topk import top_k
+from period_keys import month_labels
 
 # Set style for better visualizations
 plt.style.use('bmh')
 sns.set_palette('husl')
 
 # Read and prepare the data
-df = pd.read_excel('Online Retail Data Set.xlsx')
+df = read_retail_data()
 
 # Data preprocessing
-df['InvoiceDate'] = pd.to_datetime(df['InvoiceDate'])
-df['Sales'] = df['Quantity'] * df['UnitPrice']
-df = df[~df['InvoiceNo'].astype(str).str.startswith('C')]
-df = df[(df['Quantity'] > 0) & (df['UnitPrice'] > 0)]
+df = clean_transactions(df)  # Remove cancelled orders, non-positive quantities and prices
 
 # 1. Monthly Sales Trends
 plt.figure(figsize=(12, 6))
-monthly_sales = df.groupby(df['InvoiceDate'].dt.to_period('M'))['Sales'].sum().reset_index()
-monthly_sales['InvoiceDate'] = monthly_sales['InvoiceDate'].astype(str)
+monthly_sales = df.groupby('MonthKey')['Sales'].sum().reset_index()
+monthly_sales['InvoiceDate'] = month_labels(monthly_sales['MonthKey'])
 
 plt.plot(monthly_sales['InvoiceDate'], monthly_sales['Sales'], 
          marker='o', linewidth=2, markersize=8)
@@ -35,7 +40,7 @@ plt.close()
 
 # 2. Best-selling Products (Top 10)
 plt.figure(figsize=(12, 6))
-top_products = df.groupby('Description')['Sales'].sum().sort_values(ascending=True).tail(10)
+top_products = top_k(df.groupby('Description', observed=True)['Sales'].sum(), 10)[::-1]
 
 sns.barh(y=top_products.index, x=top_products.values, 
          color=sns.color_palette('husl', 10))
@@ -49,7 +54,7 @@ plt.close()
 
 # 3. Sales by Country
 plt.figure(figsize=(12, 6))
-country_sales = df.groupby('Country')['Sales'].sum().sort_values(ascending=True)
+country_sales = df.groupby('Country', observed=True)['Sales'].sum().sort_values(ascending=True)
 
 sns.barh(y=country_sales.index, x=country_sales.values,
          color=sns.color_palette('husl', len(country_sales)))